@@ -1,16 +1,31 @@
 from core.llm import LLMAdapter
 from core.system_agent import SystemAgent
+from core.executor import tool_name
+from core.tool_inventory import get_inventory
+from orchestrator.ingest import StreamIngester
+from orchestrator.guardrails import get_guardrails
 
 class BaseAgent:
     """Foundational class for all specialized agents with learning capabilities."""
-    
-    def __init__(self, name, description, memory_system=None):
+
+    TOOLS = ()  # Tools this agent's prompts offer; checked against the inventory
+
+    def __init__(self, name, description, memory_system=None, guard=None):
         self.name = name
         self.description = description
         self.llm = LLMAdapter()
         self.sys = SystemAgent() # Existing system execution logic
+        self.tools = get_inventory()
         self.memory = memory_system  # Access to shared memory
         self.execution_history = []  # Track this agent's actions
+        self.state = None  # Mission StateManager, bound by the Supervisor
+        self.timeouts = {}  # Tool -> seconds, overriding the executor's learned deadlines for this agent
+        # The Supervisor's guard (shared by default); every command is validated before it runs
+        self.guard = guard or get_guardrails()
+
+    def bind_state(self, state):
+        """Give the agent read access to the mission's attack graph."""
+        self.state = state
 
     def execute(self, task):
         """Standard entry point for task execution."""
@@ -20,9 +35,35 @@ class BaseAgent:
         """Use LLM to decide on next actions."""
         return self.llm.query(prompt, system_prompt=system_prompt or f"You are the STINGBOT {self.name.upper()} Agent.")
 
-    def run_cmd(self, cmd):
-        """wrapper for system execution."""
-        return self.sys.execute(cmd)
+    def run_cmd(self, cmd, timeout=None, cache=True):
+        """wrapper for system execution.
+
+        Commands that match a blacklisted pattern, or name a host, range or
+        URL outside the engagement scope, are refused without running.
+        Output of recognised tools (nmap, gobuster, enum4linux, hydra, ...) is
+        parsed into hosts, services, paths, shares, users and credentials in
+        the bound mission state as it streams in, and the command's CPU, memory,
+        wall time and output size are added to the mission's resource totals.
+        ``timeout`` (or this agent's ``timeouts`` entry for the tool) replaces
+        the deadline the executor learned from past runs. ``cache=False``
+        bypasses the executor's result cache, for a fresh look at something
+        that may have changed.
+        """
+        safe, reason = self.guard.filter_action("terminal", cmd)
+        if not safe:
+            return {"stdout": "", "stderr": f"SECURITY BLOCK: {reason}", "code": 1}
+        timeout = timeout or self.timeouts.get(tool_name(cmd))
+        if self.state is None:
+            return self.sys.execute(cmd, timeout, cache=cache)
+        # Findings land in the mission state while the tool is still running
+        ingester = StreamIngester(self.state, cmd)
+        result = self.sys.execute(cmd, timeout, consumers=[ingester] if ingester.ingester else (), cache=cache)
+        ingester.drain()
+        if ingester.added or ingester.edges:
+            print(f"[State] {ingester.tool}: {ingester.added} new assets, {ingester.edges} relations")
+        if "usage" in result:
+            self.state.record_usage(self.name, cmd, result["usage"])
+        return result
 
     def summarize_result(self, cmd, result):
         """Use LLM to turn raw output into a technical insight."""
@@ -2,7 +2,9 @@ from agents.base_agent import BaseAgent
 
 class NetPentester(BaseAgent):
     """Specialist for network-layer reconnaissance and exploitation."""
-    
+
+    TOOLS = ("nmap", "masscan", "nc", "msfconsole", "enum4linux", "smbclient", "snmpwalk")
+
     def __init__(self):
         super().__init__("Network Pentester", "Logic for Nmap, Metasploit, and network services.")
 
@@ -44,7 +46,7 @@ class NetPentester(BaseAgent):
         
         CRITICAL: Priority is SPEED. If scanning a whole network, start with FAST discovery.
         
-        Available Tools: nmap, masscan, netcat, metasploit (msfconsole -x), enum4linux, smbclient, snmpwalk.
+        Available Tools: {self.tools.describe(self.TOOLS)}. Metasploit runs as msfconsole -x.
         
         Nmap Speed Tips:
         - Host Discovery ONLY: nmap -sn <target>
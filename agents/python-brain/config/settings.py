@@ -21,6 +21,33 @@ class Settings:
         self.GEMINI_KEY = ""
         self.PUTER_API_KEY = ""  # Puter.com API key for free AI access
         
+        # State Config
+        self.STATE_BACKEND = "json" # json (small missions), sqlite (large engagements)
+        self.STATE_DURABILITY = "batched" # none, batched, fsync (per turn)
+
+        # Scope Config (files of IPs/CIDRs, one or more per line, # comments)
+        self.SCOPE_ALLOW_FILE = "" # In-scope ranges; empty = everything not prohibited
+        self.SCOPE_DENY_FILE = ""  # Exclusions, added to the built-in prohibited ranges
+
+        # DNS Config
+        self.DNS_NAMESERVERS = [] # "ip" or "ip:port" entries; empty = /etc/resolv.conf
+        self.DNS_TIMEOUT = 2.0    # Seconds per query attempt
+        self.DNS_RESOLVE_TARGETS = True # Guardrails check the addresses hostnames resolve to
+
+        # Execution Config
+        self.EXEC_MAX_CONCURRENCY = 16 # Commands running at once across all agents
+        self.EXEC_TOOL_LIMITS = {"nmap": 4, "masscan": 1, "hydra": 2, "sqlmap": 2} # Per-tool caps
+        self.EXEC_OUTPUT_LIMIT = 256 * 1024 # Characters per output stream kept in memory; the rest spills to disk
+        # Seconds results of read-only commands are reused (see ResultCache for the key syntax). Opt-in:
+        # live recon goes stale mid-engagement, so add e.g. {"ip addr $": 60, "dig": 300} deliberately. {} disables
+        self.EXEC_CACHE_TTLS = {"which": 3600}
+        self.EXEC_ADAPTIVE_TIMEOUTS = True # Learn per-tool deadlines from past runtimes instead of a flat 300 s
+        self.EXEC_TIMEOUT_BOUNDS = (10, 3600) # Seconds: shortest and longest learned deadline
+        self.EXEC_DIRECT = True # Spawn commands that use no shell syntax directly, skipping /bin/sh
+        self.EXEC_WORKERS = [w for w in os.environ.get("STINGBOT_WORKERS", "").split(",") if w] # tcp://host:port or unix:///path of executor workers
+        self.EXEC_WORKER_SECRET = os.environ.get("STINGBOT_WORKER_SECRET", "") # Shared secret workers authenticate with
+        self.EVENT_STREAM = os.environ.get("STINGBOT_EVENTS") == "1" # JSON command events on stdout (gateway bridge)
+
         # Voice Config
         self.VOICE_ENABLED = False
         
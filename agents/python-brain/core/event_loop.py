@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+def get_loop():
+    """The process-wide asyncio loop, running in a daemon thread.
+
+    Async services (DNS resolution, command execution) are shared by the
+    Supervisor, agents and tools, all of which are synchronous; they submit
+    coroutines here instead of each starting an event loop of their own.
+    """
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="stingbot-loop", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+def run_sync(coro, timeout=None):
+    """Run ``coro`` on the shared loop and block until it returns.
+
+    Must not be called from the loop thread itself; coroutines running there
+    should simply ``await``. On timeout the coroutine is cancelled and
+    ``TimeoutError`` is raised; an interrupt cancels it as well.
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the shared event loop; await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except (TimeoutError, KeyboardInterrupt):
+        # Ctrl-C in the caller also cancels the work on the loop
+        future.cancel()
+        raise
@@ -0,0 +1,567 @@
+import asyncio
+import codecs
+import errno
+import os
+import queue
+import re
+import shlex
+import signal
+import threading
+import time
+from config.settings import config
+from core.event_loop import get_loop, run_sync
+from core.jobs import KILLED_NOTE, JobTable
+from core.remote import WorkerPool
+from core.result_cache import ResultCache
+from core.spool import OutputSpool
+from core.streaming import EventStream, LineSplitter, OutputConsumer, QueueConsumer
+from core.timeout_model import TimeoutModel
+
+DEFAULT_TIMEOUT = 300  # Seconds, when there is no timeout model or explicit timeout
+PIPE_CHUNK = 65536
+DRAIN_TIMEOUT = 1.0  # Seconds to read what is left in the pipes after a kill
+SIGNALS = {"kill": signal.SIGKILL, "stop": signal.SIGSTOP, "cont": signal.SIGCONT}
+
+# Launchers that prefix the real tool; the int is how many arguments they take
+WRAPPERS = {"sudo": 0, "env": 0, "time": 0, "nice": 0, "nohup": 0, "proxychains": 0, "proxychains4": 0, "timeout": 1}
+
+# Pipeline stages that only feed or glue the real tool (echo | openssl ...)
+PASSIVE = frozenset({"echo", "printf", "cat", "true", "cd"})
+
+def command_stages(cmd):
+    """Each stage of a pipeline or command list as ``(program name, argv from the program on)``.
+
+    Launchers (``sudo``, ``timeout 60``, ...) and ``VAR=value`` prefixes are skipped.
+    """
+    lexer = shlex.shlex(cmd, posix=True, punctuation_chars=True)
+    lexer.whitespace_split = True
+    try:
+        words = list(lexer)
+    except ValueError:
+        words = cmd.split()
+    stages, stage = [], []
+    for word in words + ["|"]:
+        if word in ("|", "||", "&&", ";"):
+            if stage:
+                stages.append(stage)
+            stage = []
+        else:
+            stage.append(word)
+    programs = []
+    for stage in stages:
+        i = 0
+        while i < len(stage):
+            name = os.path.basename(stage[i])
+            if name in WRAPPERS:
+                i += 1
+                while i < len(stage) and stage[i].startswith("-"):
+                    i += 1
+                i += WRAPPERS[name]
+            elif "=" in stage[i] and not stage[i].startswith("-"):
+                i += 1  # VAR=value prefix
+            else:
+                programs.append((name, stage[i:]))
+                break
+    return programs
+
+def tool_name(cmd):
+    """Name of the program a shell command is about, for per-tool limits and stats."""
+    names = [name for name, _ in command_stages(cmd)]
+    return next((name for name in names if name not in PASSIVE), names[0] if names else "")
+
+# Characters that need a shell when they appear outside single quotes
+SHELL_SYNTAX = frozenset("|&;<>()$`\\*?[]{}~!#\n")
+
+# Builtins that change or depend on shell state (no standalone binary equivalent)
+SHELL_BUILTINS = frozenset({
+    "cd", "export", "source", ".", "alias", "unalias", "unset", "set", "exit", "exec", "eval",
+    "ulimit", "umask", "read", "wait", "trap", "shift", "type", "command", "hash", "local",
+    "return", "break", "continue",
+})
+
+def simple_argv(cmd):
+    """``argv`` for a command that uses no shell features, else None.
+
+    Pipes, redirects, globbing, substitutions, escapes, variable
+    assignments and state-changing builtins all need ``/bin/sh``; plain
+    words and quoted arguments do not.
+    """
+    quote = None
+    for ch in cmd:
+        if quote == "'":
+            if ch == "'":
+                quote = None
+        elif quote == '"':
+            if ch == '"':
+                quote = None
+            elif ch in '$`\\':
+                return None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in SHELL_SYNTAX:
+            return None
+    if quote:
+        return None
+    argv = shlex.split(cmd)
+    if not argv or argv[0] in SHELL_BUILTINS or "=" in argv[0]:
+        return None
+    return argv
+
+def _notify(consumers, hook, *args):
+    for consumer in consumers:
+        try:
+            getattr(consumer, hook)(*args)
+        except Exception as e:
+            print(f"[Executor] Output consumer {type(consumer).__name__} failed in {hook}(): {e}")
+
+async def _drain(consumers):
+    """Wait for consumers that push output elsewhere to catch up (``OutputConsumer.drain``)."""
+    for consumer in consumers:
+        try:
+            await consumer.drain()
+        except Exception as e:
+            print(f"[Executor] Output consumer {type(consumer).__name__} failed in drain(): {e}")
+
+def _close(spools, note=None):
+    """Result fields from the stream spools: bounded text, plus artifacts for spilled streams.
+
+    ``note`` (why the command was stopped) is appended to stderr.
+    """
+    result = {}
+    for stream, spool in spools.items():
+        result[stream], artifact = spool.close()
+        if artifact is not None:
+            result[f"{stream}_artifact"] = artifact
+    if note:
+        stderr = result["stderr"]
+        result["stderr"] = stderr + ("\n" if stderr and not stderr.endswith("\n") else "") + note
+    return result
+
+def _signal_group(pid, action):
+    try:
+        os.killpg(pid, SIGNALS[action])
+    except ProcessLookupError:
+        pass
+
+def _dropped():
+    """Result of a command killed before it started."""
+    return {"stdout": "", "stderr": KILLED_NOTE, "code": -1, "killed": True}
+
+def _launch(argv):
+    """``posix_spawn`` ``argv`` in a new session, stdin on /dev/null.
+
+    Returns the pid and the read ends of its stdout and stderr pipes.
+    """
+    out_read, out_write = os.pipe()
+    err_read, err_write = os.pipe()
+    try:
+        pid = os.posix_spawnp(argv[0], argv, os.environ, setsid=True, file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+            (os.POSIX_SPAWN_DUP2, out_write, 1),
+            (os.POSIX_SPAWN_DUP2, err_write, 2),
+        ])
+    except BaseException:
+        os.close(out_read)
+        os.close(err_read)
+        raise
+    finally:
+        os.close(out_write)
+        os.close(err_write)
+    return pid, os.fdopen(out_read, "rb", 0), os.fdopen(err_read, "rb", 0)
+
+async def _wait4(pid):
+    """Reap ``pid`` without blocking the loop; returns ``os.wait4``'s ``(pid, status, rusage)``."""
+    loop = asyncio.get_running_loop()
+    try:
+        fd = os.pidfd_open(pid)
+    except (AttributeError, OSError):  # No pidfd (old kernel, not Linux): block a worker thread
+        return await loop.run_in_executor(None, os.wait4, pid, 0)
+    exited = loop.create_future()
+    loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+    try:
+        await exited
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+    return os.wait4(pid, 0)
+
+def _usage(tool, started, rusage, received):
+    """Resource accounting for one command: wall and CPU seconds, peak RSS, output bytes."""
+    usage = {"tool": tool, "wall": round(time.monotonic() - started, 3)}
+    if rusage is not None:
+        usage["cpu_user"] = round(rusage.ru_utime, 3)
+        usage["cpu_sys"] = round(rusage.ru_stime, 3)
+        usage["max_rss_kb"] = rusage.ru_maxrss  # Largest of the shell and the children it waited for
+    usage.update((f"{stream}_bytes", size) for stream, size in received.items())
+    return usage
+
+class _AsyncQueueConsumer(OutputConsumer):
+    def __init__(self, lines):
+        self.lines = lines
+
+    def line(self, run_id, stream, text):
+        self.lines.put_nowait((stream, text))
+
+    def finish(self, run_id, result):
+        self.lines.put_nowait(("result", result))
+
+class CommandExecutor:
+    """Runs shell commands as asyncio subprocesses on the shared event loop.
+
+    A global semaphore caps how many commands run at once, and per-tool
+    semaphores cap heavy tools (``tool_limits``, e.g. ``{"nmap": 4}``), so
+    callers can fan out dozens of commands without overloading the box.
+    ``run``/``run_many`` are coroutines; ``run_sync``/``run_many_sync`` are
+    for the synchronous agents and modules, and ``submit`` returns a future
+    whose ``cancel()`` kills the command. Results have the same
+    ``{"stdout", "stderr", "code"}`` shape as ``SystemAgent.execute``.
+    Output can also be followed live, through ``stream``/``stream_sync`` or
+    by attaching ``OutputConsumer`` objects (parsers, UI, event stream).
+    Each stream keeps at most ``output_limit`` characters in memory; beyond
+    that the full output goes to a file in ``artifact_dir`` and the result
+    holds its head and tail plus an ``Artifact`` handle
+    (``stdout_artifact``/``stderr_artifact``). With ``cache_ttls``, simple
+    read-only commands (``which``, ``ip addr``, ...) are served from a
+    ``ResultCache`` while fresh. Every command that ran also reports a
+    ``usage`` dict: tool, wall time, user/system CPU and peak RSS of the
+    process tree (from ``wait4``), and bytes written to each stream.
+    Commands that need no shell (see ``simple_argv``) are spawned directly
+    instead of through ``/bin/sh -c`` unless ``direct_exec`` is False.
+    Each command runs in its own session; on timeout the whole process
+    group is killed and the result keeps the output collected so far, with
+    ``"timed_out": True`` and code -1. Without an explicit ``timeout`` the
+    deadline comes from ``timeouts`` (a ``TimeoutModel`` that learns from
+    every run), or ``DEFAULT_TIMEOUT``. With a ``WorkerPool`` in
+    ``workers``, commands whose tool a remote worker has are run there
+    (output still streams to the consumers); the rest run locally.
+    Every command gets a ``Job`` in ``jobs`` (``start`` returns it): its
+    status, elapsed time and recent output, and ``kill``/``pause``/
+    ``resume``. A killed command returns its partial output with
+    ``"killed": True`` rather than raising.
+    """
+
+    def __init__(self, max_concurrency=16, tool_limits=None, artifact_dir=None, output_limit=None,
+                 cache_ttls=None, direct_exec=True, timeouts=None, workers=None):
+        self.max_concurrency = max_concurrency
+        self.tool_limits = dict(tool_limits or {})
+        self.artifact_dir = artifact_dir or os.path.join(config.LOG_DIR, "artifacts")
+        self.output_limit = config.EXEC_OUTPUT_LIMIT if output_limit is None else output_limit
+        self.cache = ResultCache(cache_ttls) if cache_ttls else None
+        self.direct_exec = direct_exec
+        self.timeouts = timeouts
+        self.workers = workers
+        self.jobs = JobTable()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._tool_slots = {}
+        self.consumers = []  # Replaced, never mutated, so readers need no lock
+        self.running = 0
+        self._next_id = 0
+
+    def _tool_slot(self, tool):
+        limit = self.tool_limits.get(tool)
+        if limit is None:
+            return None
+        slot = self._tool_slots.get(tool)
+        if slot is None:
+            slot = self._tool_slots[tool] = asyncio.Semaphore(limit)
+        return slot
+
+    def add_consumer(self, consumer):
+        """Stream the output of every command to ``consumer`` (an ``OutputConsumer``)."""
+        self.consumers = self.consumers + [consumer]
+
+    def remove_consumer(self, consumer):
+        self.consumers = [c for c in self.consumers if c is not consumer]
+
+    async def run(self, cmd, timeout=None, tool=None, consumers=(), cache=True, job=None):
+        """Run ``cmd`` once a global and a per-tool slot are free.
+
+        Output lines go to the registered consumers plus ``consumers`` as
+        they arrive; the complete result is returned at the end either way.
+        Commands with a result cache policy are answered from the cache
+        while fresh (``"cached": True`` in the result) unless ``cache`` is
+        False. ``job`` is the ``Job`` to report through (default: a new one
+        in ``jobs``).
+        """
+        consumers = self.consumers + list(consumers)
+        argv = simple_argv(cmd)
+        ttl = self.cache.ttl(argv) if argv and cache and self.cache is not None else None
+        if ttl:
+            cached = self.cache.get(argv)
+            if cached is not None:
+                result = self._replay(cmd, cached, consumers)
+                if job is not None:
+                    job.complete(result)
+                return result
+        tool = tool or tool_name(cmd)
+        job = job or self.jobs.add(cmd, tool)
+        job.tool = job.tool or tool
+        consumers.append(job)
+        adaptive = timeout is None
+        if adaptive:
+            timeout = self.timeouts.deadline(tool, cmd) if self.timeouts else DEFAULT_TIMEOUT
+        try:
+            result = await self._remote(cmd, timeout, consumers, tool, job) if self.workers else None
+            if result is None:
+                result = await self._local(cmd, timeout, consumers, tool, argv, job)
+        except BaseException as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            job.complete({"stdout": "", "stderr": "Cancelled" if cancelled else str(e), "code": -1})
+            raise
+        job.complete(result)
+        # A run cut short by an explicit deadline (or the operator) says nothing about the learned one
+        if self.timeouts and "usage" in result and not result.get("killed") \
+                and (adaptive or not result.get("timed_out")):
+            self.timeouts.record(tool, cmd, result["usage"]["wall"], result.get("timed_out", False))
+        # Failed launches, timeouts and spilled outputs are not worth keeping
+        if ttl and result["code"] >= 0 and "stdout_artifact" not in result and "stderr_artifact" not in result:
+            self.cache.put(argv, result, ttl)
+        return result
+
+    async def _local(self, cmd, timeout, consumers, tool, argv, job=None):
+        tool_slot = self._tool_slot(tool)
+        async with self._slots:
+            if tool_slot is None:
+                return await self._spawn(cmd, timeout, consumers, tool, argv, job)
+            async with tool_slot:
+                return await self._spawn(cmd, timeout, consumers, tool, argv, job)
+
+    async def _remote(self, cmd, timeout, consumers, tool, job=None):
+        """Run ``cmd`` on a remote worker; None if no worker could."""
+        if job is not None and job.killed:
+            return _dropped()
+        run_id = None
+
+        def started():
+            nonlocal run_id
+            self._next_id += 1
+            run_id = self._next_id
+            _notify(consumers, "start", run_id, cmd)
+
+        try:
+            result = await self.workers.run(cmd, timeout, tool, started,
+                                            lambda stream, text: _notify(consumers, "line", run_id, stream, text), job)
+        except asyncio.CancelledError:
+            if run_id is not None:
+                _notify(consumers, "finish", run_id, {"stdout": "", "stderr": "Cancelled", "code": -1})
+            raise
+        if run_id is not None:
+            # Every worker that took it was lost: close this run before it is retried locally
+            _notify(consumers, "finish", run_id, result or {"stdout": "", "stderr": "Worker lost", "code": -1})
+        return result
+
+    def _replay(self, cmd, result, consumers):
+        """Feed a cached result to consumers as if it had just run."""
+        self._next_id += 1
+        run_id = self._next_id
+        result["cached"] = True
+        result.pop("usage", None)  # Nothing ran this time
+        _notify(consumers, "start", run_id, cmd)
+        if consumers:
+            for stream in ("stdout", "stderr"):
+                splitter = LineSplitter(self.output_limit)
+                for line in splitter.feed(result[stream]) + splitter.flush():
+                    _notify(consumers, "line", run_id, stream, line)
+        _notify(consumers, "finish", run_id, result)
+        return result
+
+    def _spool(self, run_id, tool, stream):
+        label = re.sub(r"[^\w.+-]", "_", tool or "sh")
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{run_id}-{label}.{stream}.log"
+        return OutputSpool(os.path.join(self.artifact_dir, name), self.output_limit)
+
+    async def _spawn(self, cmd, timeout, consumers, tool=None, argv=None, job=None):
+        """Launch and collect one command; ``argv`` (from ``simple_argv``) skips the shell."""
+        if job is not None and job.killed:
+            return _dropped()
+        self._next_id += 1
+        run_id = self._next_id
+        _notify(consumers, "start", run_id, cmd)
+        started = time.monotonic()
+        direct = bool(argv) and self.direct_exec
+        # posix_spawn rather than asyncio's subprocess API: the executor reaps
+        # the child itself with wait4, which is what yields its rusage
+        try:
+            pid, stdout, stderr = _launch(argv if direct else ["/bin/sh", "-c", cmd])
+        except OSError as e:
+            # The exit codes the shell gives for a missing or non-executable program
+            code = {errno.ENOENT: 127, errno.EACCES: 126}.get(e.errno, -1) if direct else -1
+            result = {"stdout": "", "stderr": f"{argv[0]}: {e.strerror}\n" if direct else str(e), "code": code}
+            _notify(consumers, "finish", run_id, result)
+            return result
+        pipes = {"stdout": stdout, "stderr": stderr}
+        self.running += 1
+        loop = asyncio.get_running_loop()
+        spools = {stream: self._spool(run_id, tool, stream) for stream in ("stdout", "stderr")}
+        received = {"stdout": 0, "stderr": 0}
+        transports = []
+        pumps = []
+        waiter = asyncio.ensure_future(_wait4(pid))
+        if job is not None:
+            job.attach(lambda action: _signal_group(pid, action))
+        try:
+            for stream in ("stdout", "stderr"):
+                reader = asyncio.StreamReader(limit=PIPE_CHUNK)
+                transport, _ = await loop.connect_read_pipe(
+                    lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipes[stream])
+                transports.append(transport)
+                pumps.append(asyncio.ensure_future(
+                    self._pump(reader, stream, spools[stream], run_id, consumers, received)))
+            done, _ = await asyncio.wait(pumps + [waiter], timeout=timeout)
+            timed_out = len(done) <= len(pumps)
+            if timed_out:
+                await self._kill(pid, waiter, pumps)
+        except asyncio.CancelledError:
+            await self._kill(pid, waiter, pumps)
+            result = _close(spools, "Cancelled")
+            result.update(code=-1, usage=_usage(tool, started, waiter.result()[2], received))
+            _notify(consumers, "finish", run_id, result)
+            raise
+        finally:
+            if job is not None:
+                job.detach()
+            self.running -= 1
+            for pump in pumps:
+                pump.cancel()
+            for transport in transports:
+                transport.close()
+            for pipe in pipes.values():
+                pipe.close()
+        _, status, rusage = waiter.result()
+        if timed_out:
+            # Keep what the tool printed before the deadline: parsers can still use it
+            result = _close(spools, f"Command '{cmd}' timed out after {timeout} seconds")
+            result.update(code=-1, timed_out=True)
+        elif job is not None and job.killed:
+            # Likewise for a command the operator cut short: the mission goes on with what it got
+            result = _close(spools, KILLED_NOTE)
+            result.update(code=-1, killed=True)
+        else:
+            result = _close(spools)
+            result["code"] = os.waitstatus_to_exitcode(status)
+        result["usage"] = _usage(tool, started, rusage, received)
+        _notify(consumers, "finish", run_id, result)
+        return result
+
+    async def _pump(self, reader, stream, spool, run_id, consumers, received):
+        """Collect one pipe; split it into lines only when someone listens."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        splitter = LineSplitter(self.output_limit) if consumers else None
+        draining = [consumer for consumer in consumers if hasattr(consumer, "drain")]
+        while True:
+            data = await reader.read(PIPE_CHUNK)
+            received[stream] += len(data)
+            text = decoder.decode(data, final=not data)
+            if text:
+                spool.write(text)
+                if splitter:
+                    for line in splitter.feed(text):
+                        _notify(consumers, "line", run_id, stream, line)
+                    if draining:
+                        await _drain(draining)
+            if not data:
+                break
+        if splitter:
+            for line in splitter.flush():
+                _notify(consumers, "line", run_id, stream, line)
+            if draining:
+                await _drain(draining)
+
+    async def _kill(self, pid, waiter, pumps):
+        """SIGKILL the command's session, reap it and collect the output still in the pipes."""
+        # The shell's children hold the output pipes too: kill the whole session
+        try:
+            os.killpg(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await asyncio.shield(waiter)
+        if pumps:
+            # A daemon that left the session could keep the pipes open: do not wait on it forever
+            await asyncio.wait(pumps, timeout=DRAIN_TIMEOUT)
+
+    async def run_many(self, cmds, timeout=None):
+        """Results for ``cmds`` in order, run concurrently within the limits."""
+        return list(await asyncio.gather(*(self.run(cmd, timeout) for cmd in cmds)))
+
+    def invalidate_cache(self, tool=None):
+        """Drop cached results, for one tool or all of them; returns how many."""
+        return self.cache.invalidate(tool) if self.cache is not None else 0
+
+    def run_sync(self, cmd, timeout=None, consumers=(), cache=True):
+        return run_sync(self.run(cmd, timeout, consumers=consumers, cache=cache))
+
+    def run_many_sync(self, cmds, timeout=None):
+        return run_sync(self.run_many(cmds, timeout))
+
+    def submit(self, cmd, timeout=None, consumers=(), cache=True, job=None):
+        """Start ``cmd`` without waiting; returns a ``concurrent.futures.Future``."""
+        return asyncio.run_coroutine_threadsafe(self.run(cmd, timeout, consumers=consumers, cache=cache, job=job),
+                                                get_loop())
+
+    def start(self, cmd, timeout=None, consumers=(), cache=True):
+        """Start ``cmd`` without waiting; returns its ``Job`` (``job.wait()`` gives the result)."""
+        job = self.jobs.add(cmd, tool_name(cmd))
+        self.submit(cmd, timeout, consumers, cache, job)
+        return job
+
+    async def stream(self, cmd, timeout=None):
+        """Async generator of ``(stream, line)`` as output arrives, then ``("result", result)``."""
+        lines = asyncio.Queue()
+        consumer = _AsyncQueueConsumer(lines)
+        task = asyncio.ensure_future(self.run(cmd, timeout, consumers=[consumer]))
+        try:
+            while True:
+                item = await lines.get()
+                yield item
+                if item[0] == "result":
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def stream_sync(self, cmd, timeout=None):
+        """Generator version of ``stream`` for synchronous callers.
+
+        Closing the generator early (``break``) cancels the command.
+        """
+        consumer = QueueConsumer()
+        future = self.submit(cmd, timeout, consumers=[consumer])
+        try:
+            while True:
+                try:
+                    item = consumer.queue.get(timeout=0.5)
+                except queue.Empty:
+                    if future.done() and not future.cancelled() and future.exception() is not None:
+                        raise future.exception()
+                    continue
+                yield item
+                if item[0] == "result":
+                    break
+        finally:
+            future.cancel()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _timeout_model():
+    if not config.EXEC_ADAPTIVE_TIMEOUTS:
+        return None
+    minimum, maximum = config.EXEC_TIMEOUT_BOUNDS
+    return TimeoutModel(os.path.join(config.LOG_DIR, "command_runtimes.json"),
+                        default=DEFAULT_TIMEOUT, minimum=minimum, maximum=maximum)
+
+def get_executor():
+    """The process-wide executor configured from settings (EXEC_MAX_CONCURRENCY, EXEC_TOOL_LIMITS)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CommandExecutor(config.EXEC_MAX_CONCURRENCY, config.EXEC_TOOL_LIMITS,
+                                        output_limit=config.EXEC_OUTPUT_LIMIT, cache_ttls=config.EXEC_CACHE_TTLS,
+                                        direct_exec=config.EXEC_DIRECT, timeouts=_timeout_model())
+            if config.EVENT_STREAM:
+                _executor.add_consumer(EventStream())
+            if config.EXEC_WORKERS and config.EXEC_WORKER_SECRET:
+                _executor.workers = WorkerPool(config.EXEC_WORKERS, config.EXEC_WORKER_SECRET)
+            elif config.EXEC_WORKERS:
+                print("[Executor] STINGBOT_WORKERS is set without STINGBOT_WORKER_SECRET; running commands locally")
+        return _executor
@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import deque
+
+from core.streaming import OutputConsumer
+
+TAIL_LINES = 500  # Output lines each job keeps for 'tail'
+KEEP_FINISHED = 200  # Finished jobs kept in the table
+
+KILLED_NOTE = "Killed by operator"
+
+class Job(OutputConsumer):
+    """Handle on one command: status, elapsed time, recent output and controls.
+
+    The executor attaches a job to every command it runs. ``kill()``
+    SIGKILLs the command's process group (on a remote worker too), and the
+    command returns the output it produced so far with ``"killed": True``
+    instead of raising, so the agent that ran it carries on with the rest
+    of its mission. ``pause()``/``resume()`` stop and continue the process
+    group; the command's deadline keeps running while it is paused.
+    """
+
+    def __init__(self, job_id, cmd, tool=None):
+        self.id = job_id
+        self.cmd = cmd
+        self.tool = tool
+        self.node = None  # Remote worker running it, if any
+        self.status = "queued"
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.killed = False
+        self.output = deque(maxlen=TAIL_LINES)  # (stream, text)
+        self._control = None  # action ("kill", "stop", "cont") -> None, set while it runs
+        self._paused = False  # Applied by attach() if paused before the process existed
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def start(self, run_id, cmd):
+        if self.started is None:
+            self.started = time.monotonic()
+        self.status = "running"
+
+    def line(self, run_id, stream, text):
+        self.output.append((stream, text))
+
+    def tail(self, n=20):
+        """The last ``n`` output lines as ``(stream, text)``."""
+        return list(self.output)[-n:] if n > 0 else []
+
+    def attach(self, control):
+        """Called by the executor once the command is running; ``control`` signals it."""
+        with self._lock:
+            self._control = control
+            if self.killed:
+                control("kill")
+            elif self._paused:
+                control("stop")
+
+    def detach(self):
+        with self._lock:
+            self._control = None
+
+    def _signal(self, action):
+        with self._lock:
+            if self._control is not None:
+                self._control(action)
+
+    def kill(self):
+        """Stop the command now; it returns its partial output. False if it already finished."""
+        if self.done:
+            return False
+        self.killed = True
+        self.status = "killing"
+        self._signal("kill")  # Not started yet: it is dropped when its turn comes
+        return True
+
+    def pause(self):
+        if self.status != "running":
+            return False
+        self._paused = True
+        self._signal("stop")  # Launched but not attached yet: attach() stops it
+        self.status = "paused"
+        return True
+
+    def resume(self):
+        if self.status != "paused":
+            return False
+        self._paused = False
+        self._signal("cont")
+        self.status = "running"
+        return True
+
+    def complete(self, result):
+        """Record the final result (called by the executor, once)."""
+        with self._lock:
+            self._control = None
+        self.result = result
+        self.finished = time.monotonic()
+        if self.started is None:
+            self.started = self.finished
+        if result.get("killed"):
+            self.status = "killed"
+        elif result.get("timed_out"):
+            self.status = "timed out"
+        else:
+            self.status = "done" if result.get("code") == 0 else "failed"
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """The result once the command has finished, or None after ``timeout`` seconds."""
+        return self.result if self._done.wait(timeout) else None
+
+    def to_dict(self):
+        return {"id": self.id, "cmd": self.cmd, "tool": self.tool, "node": self.node, "status": self.status,
+                "elapsed": round(self.elapsed, 1), "lines": len(self.output)}
+
+class JobTable:
+    """The executor's jobs by id: every running command plus recently finished ones."""
+
+    def __init__(self, keep=KEEP_FINISHED):
+        self.keep = keep
+        self.jobs = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def add(self, cmd, tool=None):
+        with self._lock:
+            self._next_id += 1
+            job = self.jobs[self._next_id] = Job(self._next_id, cmd, tool)
+            finished = [job_id for job_id, j in self.jobs.items() if j.done]
+            for job_id in finished[:max(0, len(finished) - self.keep)]:
+                del self.jobs[job_id]
+        return job
+
+    def get(self, job_id):
+        try:
+            return self.jobs.get(int(job_id))
+        except (TypeError, ValueError):
+            return None
+
+    def list(self, active_only=False):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job for job in jobs if not (active_only and job.done)]
+
+    def kill_all(self):
+        """Kill every unfinished job; returns how many."""
+        return sum(job.kill() for job in self.list(active_only=True))
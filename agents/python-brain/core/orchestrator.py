@@ -1,5 +1,6 @@
 from core.llm import LLMAdapter
 from core.system_agent import SystemAgent
+from core.tool_inventory import get_inventory
 from config.settings import config
 from modules.recon import ReconModule
 from modules.audit import AuditModule
@@ -45,6 +46,7 @@ class CoreOrchestrator:
                     f"API Key: {'CONFIGURED' if (config.GEMINI_KEY or config.OPENAI_KEY or self.llm.provider == 'ollama') else 'MISSING'}"
                 ]
             },
+            "Tool Inventory": self._tool_check(),
             "Safety Protocol": {
                 "status": "success" if config.SAFETY_MODE else "warning",
                 "messages": [
@@ -67,6 +69,16 @@ class CoreOrchestrator:
         
         return "Doctor Complete."
 
+    def _tool_check(self):
+        """Doctor section listing installed and missing tools from the shared inventory."""
+        tools = get_inventory()
+        installed = tools.available()
+        missing = [tool for tool in tools.tools if tool not in installed]
+        messages = [f"{tool}: {tools.version(tool) or 'installed'} ({tools.path(tool)})" for tool in installed]
+        if missing:
+            messages.append(f"Not installed: {', '.join(missing)}")
+        return {"status": "success" if not missing else "warning", "messages": messages}
+
     def run_mission(self, objective):
         """High-speed Generalist Execution Loop."""
         
@@ -201,7 +213,9 @@ class CoreOrchestrator:
                 # Basic protection for critical installs
                 if "sudo" in clean or "root" in clean:
                      return "Error: Elevated installation requires manual user confirmation."
-                return self.sys.execute(f"pip3 install {tool} || sudo apt-get install {tool} -y")
+                result = self.sys.execute(f"pip3 install {tool} || sudo apt-get install {tool} -y")
+                get_inventory().refresh(tool)  # check_tool and the prompts see the new tool at once
+                return result
 
         if "scan " in clean:
             target = get_target("scan ", clean)
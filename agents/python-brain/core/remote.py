@@ -0,0 +1,264 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import time
+
+# One JSON message per line; command output lines can be long
+MESSAGE_LIMIT = 16 * 1024 * 1024
+CONNECT_TIMEOUT = 3.0
+RETRY_DELAY = 10.0  # Seconds before reconnecting to a worker that was lost
+RESULT_GRACE = 30.0  # Seconds past a command's timeout to wait for the worker's result
+
+class WorkerLost(Exception):
+    """The connection to a worker dropped before the command finished."""
+
+def sign(secret, role, nonce):
+    """Proof that the sender knows ``secret``, bound to the peer's ``nonce`` and the sender's role."""
+    return hmac.new(secret.encode(), f"{role}:{nonce}".encode(), hashlib.sha256).hexdigest()
+
+def post(writer, message):
+    """Queue ``message`` without waiting, for callbacks that cannot await; keep these small."""
+    writer.write(json.dumps(message).encode() + b"\n")
+
+async def send(writer, message):
+    """Write ``message`` and wait until the peer has taken enough of the backlog."""
+    post(writer, message)
+    await writer.drain()
+
+async def receive(reader):
+    """Next message, or None when the peer has gone or sent something that is not a message."""
+    try:
+        line = await reader.readline()
+        message = json.loads(line) if line else None
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        return None
+    return message if isinstance(message, dict) else None
+
+async def open_address(address, **kwargs):
+    """Connect to ``tcp://host:port`` or ``unix:///path``."""
+    if address.startswith("unix://"):
+        return await asyncio.open_unix_connection(address[len("unix://"):], limit=MESSAGE_LIMIT, **kwargs)
+    host, _, port = address[len("tcp://"):].rpartition(":") if address.startswith("tcp://") else ("", "", "")
+    if not host or not port.isdigit():
+        raise ValueError(f"Worker address must be tcp://host:port or unix:///path, not {address!r}")
+    return await asyncio.open_connection(host.strip("[]"), int(port), limit=MESSAGE_LIMIT, **kwargs)
+
+class RemoteWorker:
+    """Client side of one executor worker (see ``core.worker``).
+
+    Connecting runs a mutual HMAC challenge over the shared secret: the
+    worker proves it knows the secret too, so commands never go to an
+    impostor. The worker then reports its installed tools and capacity.
+    Commands are multiplexed over the connection by id; their output lines
+    stream back as they are produced. If the connection drops, every
+    pending ``run`` raises ``WorkerLost``.
+    """
+
+    def __init__(self, address, secret):
+        self.address = address
+        self.secret = secret
+        self.name = address
+        self.tools = frozenset()
+        self.slots = 1
+        self.running = 0    # Commands the worker last reported running (all clients)
+        self.inflight = 0   # Commands this client is waiting on
+        self.down_until = 0.0
+        self._writer = None
+        self._runs = {}     # id -> asyncio.Queue of messages
+        self._next_id = 0
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def load(self):
+        return max(self.running, self.inflight) / max(self.slots, 1)
+
+    async def connect(self):
+        reader, writer = await open_address(self.address)
+        try:
+            hello = await receive(reader)
+            if not hello or hello.get("type") != "hello" or not isinstance(hello.get("nonce"), str):
+                raise ConnectionError("no greeting")
+            nonce = os.urandom(16).hex()
+            await send(writer, {"type": "auth", "mac": sign(self.secret, "client", hello["nonce"]), "nonce": nonce})
+            ready = await receive(reader)
+            if not ready or not hmac.compare_digest(str(ready.get("mac", "")), sign(self.secret, "worker", nonce)):
+                raise ConnectionError("authentication failed")
+            name = str(hello.get("name") or self.address)
+            tools = frozenset(str(tool) for tool in hello.get("tools", ()))
+            slots, running = int(hello.get("slots", 1)), int(hello.get("running", 0))
+        except (TypeError, ValueError) as e:
+            writer.close()
+            raise ConnectionError(f"malformed greeting: {e}") from None
+        except BaseException:
+            writer.close()
+            raise
+        self.name, self.tools, self.slots, self.running = name, tools, slots, running
+        self._writer = writer
+        asyncio.ensure_future(self._read_loop(reader, writer))
+
+    async def _read_loop(self, reader, writer):
+        try:
+            while True:
+                message = await receive(reader)
+                if message is None:
+                    break
+                if "running" in message:
+                    self.running = message["running"]
+                queue = self._runs.get(message.get("id"))
+                if queue is not None:
+                    queue.put_nowait(message)
+        finally:
+            # Whatever ended the loop, pending runs must not wait forever
+            self._lost(writer)
+
+    def _lost(self, writer):
+        writer.close()
+        if self._writer is writer:
+            self._writer = None
+            self.down_until = time.monotonic() + RETRY_DELAY
+            for queue in self._runs.values():
+                queue.put_nowait(None)
+
+    def _signal(self, run_id, action):
+        if self._writer is not None and run_id in self._runs:
+            post(self._writer, {"type": "signal", "id": run_id, "action": action})
+
+    async def run(self, cmd, timeout, on_line, job=None):
+        """Run ``cmd`` on the worker; ``on_line(stream, text)`` sees output as it arrives.
+
+        ``job`` (a ``core.jobs.Job``) kills, pauses and resumes it on the worker.
+        Raises ``WorkerLost`` if the connection drops, a message is malformed
+        or no result arrives within ``timeout`` plus ``RESULT_GRACE``.
+        """
+        if self._writer is None:
+            raise WorkerLost(f"{self.name} is not connected")
+        self._next_id += 1
+        run_id = self._next_id
+        queue = self._runs[run_id] = asyncio.Queue()
+        deadline = None if timeout is None else time.monotonic() + timeout + RESULT_GRACE
+        self.inflight += 1
+        try:
+            try:
+                await send(self._writer, {"type": "run", "id": run_id, "cmd": cmd, "timeout": timeout})
+            except ConnectionError:
+                raise WorkerLost(f"Lost connection to {self.name}") from None
+            if job is not None:
+                # Job controls are used from other threads
+                loop = asyncio.get_running_loop()
+                job.attach(lambda action: loop.call_soon_threadsafe(self._signal, run_id, action))
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), None if deadline is None
+                                                     else max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self._signal(run_id, "kill")
+                    raise WorkerLost(f"{self.name} sent no result in time") from None
+                if message is None:
+                    raise WorkerLost(f"Lost connection to {self.name}")
+                try:
+                    if message["type"] == "line":
+                        on_line(message["stream"], message["text"])
+                    elif message["type"] == "exit":
+                        result = message["result"]
+                        if not isinstance(result, dict) or not isinstance(result.get("code"), int):
+                            raise ValueError("bad result")
+                        return result
+                except (KeyError, TypeError, ValueError):
+                    # A worker that breaks the protocol is dropped like a lost one
+                    if self._writer is not None:
+                        self._lost(self._writer)
+                    raise WorkerLost(f"Malformed message from {self.name}") from None
+        except asyncio.CancelledError:
+            if self._writer is not None:
+                post(self._writer, {"type": "cancel", "id": run_id})
+            raise
+        finally:
+            if job is not None:
+                job.detach()
+            self.inflight -= 1
+            self._runs.pop(run_id, None)
+
+class WorkerPool:
+    """Places commands on remote workers by tool availability and load.
+
+    A command goes to the least loaded connected worker that has its tool
+    installed. If that worker is lost mid-run the command is retried on
+    another one, up to ``retries`` times. ``run`` returns None when no
+    worker can take the command, and the caller runs it locally instead.
+    Workers that cannot be reached are retried after ``RETRY_DELAY``.
+    """
+
+    def __init__(self, addresses, secret, retries=2):
+        self.workers = [RemoteWorker(address, secret) for address in addresses]
+        self.retries = retries
+
+    async def _connect(self, worker):
+        try:
+            await asyncio.wait_for(worker.connect(), CONNECT_TIMEOUT)
+            print(f"[Workers] Connected to {worker.name} ({len(worker.tools)} tools, {worker.slots} slots)")
+        except (OSError, ValueError, ConnectionError, asyncio.TimeoutError) as e:
+            worker.down_until = time.monotonic() + RETRY_DELAY
+            print(f"[Workers] Could not reach {worker.address}: {e or type(e).__name__}")
+
+    async def place(self, tool, exclude=()):
+        """The worker ``tool`` should run on, or None."""
+        now = time.monotonic()
+        pending = [w for w in self.workers if not w.connected and w.down_until <= now]
+        if pending:
+            await asyncio.gather(*(self._connect(w) for w in pending))
+        candidates = [w for w in self.workers if w.connected and tool in w.tools and w not in exclude]
+        return min(candidates, key=RemoteWorker.load, default=None)
+
+    async def run(self, cmd, timeout, tool, on_start, on_line, job=None):
+        """Result of ``cmd`` from a worker, or None if none could run it.
+
+        ``on_start`` is called once, when the command is first dispatched.
+        When a retry replays output ``on_line`` already saw, those lines are
+        not passed on again.
+        """
+        tried = []
+        delivered = {"stdout": [], "stderr": []}  # Hashes of the lines passed to on_line, in order
+        for _ in range(self.retries + 1):
+            worker = await self.place(tool, tried)
+            if worker is None:
+                return None
+            if not tried:
+                on_start()
+            tried.append(worker)
+            if job is not None:
+                job.node = worker.name
+            try:
+                result = await worker.run(cmd, timeout, self._dedupe(on_line, delivered), job)
+            except WorkerLost as e:
+                print(f"[Workers] {e} while running {tool}; retrying elsewhere")
+                continue
+            if isinstance(result.get("usage"), dict):
+                result["usage"]["node"] = worker.name
+            return result
+        return None
+
+    @staticmethod
+    def _dedupe(on_line, delivered):
+        """``on_line`` for one attempt, skipping the prefix of output an earlier attempt delivered."""
+        position = {"stdout": 0, "stderr": 0}
+        diverged = {"stdout": False, "stderr": False}
+
+        def forward(stream, text):
+            seen = delivered.setdefault(stream, [])
+            pos = position.get(stream, 0)
+            position[stream] = pos + 1
+            digest = hash(text)
+            if pos < len(seen) and not diverged.get(stream):
+                if seen[pos] == digest:
+                    return
+                diverged[stream] = True
+            on_line(stream, text)
+            if pos < len(seen):
+                seen[pos] = digest
+            else:
+                seen.append(digest)
+        return forward
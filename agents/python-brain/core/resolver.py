@@ -0,0 +1,367 @@
+import asyncio
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from config.settings import config
+from core.event_loop import run_sync
+
+# Record types the resolver understands
+RECORD_TYPES = {"A": 1, "NS": 2, "CNAME": 5, "SOA": 6, "PTR": 12, "MX": 15, "TXT": 16, "AAAA": 28}
+_TYPE_NAMES = {value: name for name, value in RECORD_TYPES.items()}
+
+NOERROR, SERVFAIL, NXDOMAIN = 0, 2, 3
+
+class ResolverError(Exception):
+    """No nameserver gave a usable answer (timeout, SERVFAIL, refused, bad reply)."""
+
+def _encode_name(name):
+    labels = name.rstrip(".").encode("idna").split(b".") if name.strip(".") else []
+    out = bytearray()
+    for label in labels:
+        if not label or len(label) > 63:
+            raise ValueError(f"Invalid DNS name: {name!r}")
+        out += bytes([len(label)]) + label
+    return bytes(out) + b"\x00"
+
+def build_query(qid, name, rtype):
+    """Wire-format query with recursion desired."""
+    return struct.pack("!HHHHHH", qid, 0x0100, 1, 0, 0, 0) + _encode_name(name) + struct.pack("!HH", rtype, 1)
+
+def _read_name(data, offset):
+    """Decompress the name at ``offset``; returns ``(name, offset after it)``."""
+    labels, end, jumps = [], None, 0
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if jumps > 64:
+                raise ValueError("DNS name compression loop")
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            jumps += 1
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(data[offset:offset + length].decode("ascii", "replace"))
+        offset += length
+    return ".".join(labels).lower(), end if end is not None else offset
+
+def _rdata(data, rtype, offset, length):
+    if rtype == 1:
+        return socket.inet_ntop(socket.AF_INET, data[offset:offset + length])
+    if rtype == 28:
+        return socket.inet_ntop(socket.AF_INET6, data[offset:offset + length])
+    if rtype in (2, 5, 12):
+        return _read_name(data, offset)[0]
+    if rtype == 15:
+        return f"{struct.unpack_from('!H', data, offset)[0]} {_read_name(data, offset + 2)[0]}"
+    if rtype == 16:
+        strings, pos = [], offset
+        while pos < offset + length:
+            strings.append(data[pos + 1:pos + 1 + data[pos]].decode("utf-8", "replace"))
+            pos += 1 + data[pos]
+        return "".join(strings)
+    if rtype == 6:
+        mname, pos = _read_name(data, offset)
+        rname, pos = _read_name(data, pos)
+        return " ".join([mname, rname] + [str(v) for v in struct.unpack_from("!IIIII", data, pos)])
+    return data[offset:offset + length].hex()
+
+def parse_response(data):
+    """``(id, flags, answers, authority)``; records are ``(name, type, ttl, value)``."""
+    qid, flags, qdcount, ancount, nscount, _ = struct.unpack_from("!HHHHHH", data, 0)
+    offset = 12
+    for _ in range(qdcount):
+        offset = _read_name(data, offset)[1] + 4
+    sections = []
+    for count in (ancount, nscount):
+        records = []
+        for _ in range(count):
+            name, offset = _read_name(data, offset)
+            rtype, _, ttl, length = struct.unpack_from("!HHIH", data, offset)
+            offset += 10
+            records.append((name, rtype, ttl, _rdata(data, rtype, offset, length)))
+            offset += length
+        sections.append(records)
+    return qid, flags, sections[0], sections[1]
+
+class _QueryProtocol(asyncio.DatagramProtocol):
+    def __init__(self, qid):
+        self.qid = qid
+        self.reply = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        # Connected socket: only the nameserver can reach us; match the query id too
+        if len(data) >= 12 and struct.unpack_from("!H", data)[0] == self.qid and not self.reply.done():
+            self.reply.set_result(data)
+
+    def error_received(self, exc):
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+def parse_nameserver(entry):
+    """``"10.0.0.2"``, ``"10.0.0.2:5353"`` or ``"[::1]:53"`` as ``(host, port)``."""
+    if isinstance(entry, tuple):
+        return entry
+    if entry.startswith("["):
+        host, _, port = entry[1:].partition("]:")
+        return host.rstrip("]"), int(port or 53)
+    if entry.count(":") == 1:
+        host, port = entry.split(":")
+        return host, int(port)
+    return entry, 53
+
+def system_nameservers(path="/etc/resolv.conf"):
+    servers = []
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 2 and fields[0] == "nameserver":
+                    servers.append((fields[1].split("%")[0], 53))
+    except OSError:
+        pass
+    return servers or [("127.0.0.1", 53)]
+
+def parse_hosts(path="/etc/hosts"):
+    """``{name: [addresses]}`` from a hosts file; names are lower-cased."""
+    hosts = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) < 2:
+                    continue
+                try:
+                    address = str(ipaddress.ip_address(fields[0].split("%")[0]))
+                except ValueError:
+                    continue
+                for name in fields[1:]:
+                    addresses = hosts.setdefault(name.lower().rstrip("."), [])
+                    if address not in addresses:
+                        addresses.append(address)
+    except OSError:
+        pass
+    return hosts
+
+class Resolver:
+    """Asynchronous stub resolver with a shared TTL cache.
+
+    Queries go over UDP (TCP when the reply is truncated) to the configured
+    nameservers in turn. Answers are cached for the lowest TTL in the answer
+    chain, NXDOMAIN/NODATA for the SOA negative TTL (RFC 2308), and server
+    failures for ``failure_ttl`` so an unreachable resolver is not waited on
+    again for every check. Concurrent lookups of the same name share one
+    query. All queries run on the shared event loop; the ``*_sync`` methods
+    are for synchronous callers and answer from the cache without a thread
+    hop when they can. Like the system resolver, ``addresses`` answers
+    names listed in ``hosts_file`` (lab names such as ``box.htb``) from
+    that file before asking any nameserver; it is re-read when it changes.
+    """
+
+    def __init__(self, nameservers=None, timeout=2.0, attempts=2, negative_ttl=60,
+                 failure_ttl=30, max_ttl=3600, max_entries=4096, clock=time.monotonic, hosts_file="/etc/hosts"):
+        self.nameservers = [parse_nameserver(ns) for ns in nameservers] if nameservers else system_nameservers()
+        self.timeout = timeout
+        self.attempts = attempts
+        self.negative_ttl = negative_ttl
+        self.failure_ttl = failure_ttl
+        self.max_ttl = max_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = {"queries": 0, "hits": 0, "misses": 0}
+        self._cache = OrderedDict()  # (name, type) -> (expires, records tuple or ResolverError)
+        self._inflight = {}
+        self.hosts_file = hosts_file
+        self._hosts, self._hosts_mtime = {}, None
+
+    def _key(self, name, rtype):
+        return name.lower().rstrip("."), rtype.upper()
+
+    def cached(self, name, rtype="A"):
+        """Unexpired cached records, or None. Raises a cached ``ResolverError``."""
+        entry = self._cache.get(self._key(name, rtype))
+        if entry is None or entry[0] <= self.clock():
+            return None
+        if isinstance(entry[1], ResolverError):
+            raise entry[1]
+        return list(entry[1])
+
+    def clear(self):
+        self._cache.clear()
+
+    def _store(self, key, ttl, value):
+        self._cache[key] = (self.clock() + min(ttl, self.max_ttl), value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def resolve(self, name, rtype="A"):
+        """Records of type ``rtype`` for ``name``; ``[]`` when there are none."""
+        key = self._key(name, rtype)
+        if key[1] not in RECORD_TYPES:
+            raise ValueError(f"Unsupported record type: {rtype}")
+        try:
+            records = self.cached(*key)
+        except ResolverError:
+            self.stats["hits"] += 1
+            raise
+        if records is not None:
+            self.stats["hits"] += 1
+            return records
+        self.stats["misses"] += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(self._lookup(key))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return list(await asyncio.shield(task))
+
+    async def _lookup(self, key):
+        name, rtype = key
+        try:
+            ttl, records = await self._query(name, RECORD_TYPES[rtype])
+        except ResolverError as e:
+            self._store(key, self.failure_ttl, e)
+            raise
+        self._store(key, ttl, records)
+        return records
+
+    async def _query(self, name, qtype):
+        _encode_name(name)  # Bad names are the caller's error, not a server failure
+        errors = []
+        for _ in range(self.attempts):
+            for server in self.nameservers:
+                try:
+                    reply = await self._exchange(server, name, qtype)
+                    return self._answer(reply, name, qtype)
+                except (OSError, ValueError, struct.error, asyncio.TimeoutError, ResolverError) as e:
+                    errors.append(f"{server[0]}:{server[1]}: {str(e) or type(e).__name__}")
+        raise ResolverError(f"{name} {_TYPE_NAMES[qtype]}: " + "; ".join(errors[-len(self.nameservers):]))
+
+    async def _exchange(self, server, name, qtype):
+        qid = struct.unpack("!H", os.urandom(2))[0]
+        query = build_query(qid, name, qtype)
+        self.stats["queries"] += 1
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(lambda: _QueryProtocol(qid), remote_addr=server)
+        try:
+            transport.sendto(query)
+            reply = await asyncio.wait_for(protocol.reply, self.timeout)
+        finally:
+            transport.close()
+        if struct.unpack_from("!H", reply, 2)[0] & 0x0200:
+            reply = await self._exchange_tcp(server, query)
+        return reply
+
+    async def _exchange_tcp(self, server, query):
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(*server), self.timeout)
+        try:
+            writer.write(struct.pack("!H", len(query)) + query)
+            length = struct.unpack("!H", await asyncio.wait_for(reader.readexactly(2), self.timeout))[0]
+            return await asyncio.wait_for(reader.readexactly(length), self.timeout)
+        finally:
+            writer.close()
+
+    def _answer(self, reply, name, qtype):
+        """``(ttl, records)`` from a reply, following CNAMEs inside the answer."""
+        _, flags, answers, authority = parse_response(reply)
+        rcode = flags & 0x000F
+        if rcode not in (NOERROR, NXDOMAIN):
+            raise ResolverError(f"rcode {rcode}")
+        owner, ttls, records = name.lower().rstrip("."), [], []
+        for _ in range(16):  # CNAME chain length bound
+            rrs = [rr for rr in answers if rr[0] == owner]
+            matched = [rr for rr in rrs if rr[1] == qtype]
+            alias = next((rr for rr in rrs if rr[1] == 5), None)
+            if matched or alias is None:
+                ttls += [rr[2] for rr in matched]
+                records = [rr[3] for rr in matched]
+                break
+            ttls.append(alias[2])
+            owner = alias[3]
+        if records:
+            return min(ttls), tuple(records)
+        # NXDOMAIN or NODATA: cache for min(SOA TTL, SOA minimum)
+        soa = next((rr for rr in authority if rr[1] == 6), None)
+        ttl = min(soa[2], int(soa[3].split()[-1])) if soa else self.negative_ttl
+        return min([ttl] + ttls), ()
+
+    async def resolve_many(self, names, rtype="A"):
+        """``{name: records}`` for many names at once; failed lookups map to ``[]``."""
+        names = list(dict.fromkeys(names))
+        results = await asyncio.gather(*(self.resolve(n, rtype) for n in names), return_exceptions=True)
+        return {n: ([] if isinstance(r, Exception) else r) for n, r in zip(names, results)}
+
+    def hosts_addresses(self, host):
+        """Addresses ``hosts_file`` gives ``host``, or None if it is not listed."""
+        if not self.hosts_file:
+            return None
+        try:
+            mtime = os.stat(self.hosts_file).st_mtime
+        except OSError:
+            mtime = None
+        if mtime != self._hosts_mtime:
+            self._hosts = parse_hosts(self.hosts_file) if mtime is not None else {}
+            self._hosts_mtime = mtime
+        addresses = self._hosts.get(host.lower().rstrip("."))
+        return list(addresses) if addresses else None
+
+    async def addresses(self, host):
+        """IPv4 and IPv6 addresses of ``host``; an IP literal is returned as is."""
+        try:
+            return [str(ipaddress.ip_address(host))]
+        except ValueError:
+            pass
+        local = self.hosts_addresses(host)
+        if local:
+            return local
+        results = await asyncio.gather(self.resolve(host, "A"), self.resolve(host, "AAAA"), return_exceptions=True)
+        found = [r for r in results if not isinstance(r, Exception)]
+        if not found:
+            raise results[0]
+        return [address for records in found for address in records]
+
+    async def addresses_many(self, hosts):
+        """``{host: addresses}`` for many hosts at once; failed lookups map to ``[]``."""
+        hosts = list(dict.fromkeys(hosts))
+        results = await asyncio.gather(*(self.addresses(h) for h in hosts), return_exceptions=True)
+        return {h: ([] if isinstance(r, Exception) else r) for h, r in zip(hosts, results)}
+
+    async def reverse(self, address):
+        """PTR names for an IP address."""
+        return await self.resolve(ipaddress.ip_address(address).reverse_pointer, "PTR")
+
+    def resolve_sync(self, name, rtype="A"):
+        records = self.cached(name, rtype)
+        return records if records is not None else run_sync(self.resolve(name, rtype))
+
+    def cached_addresses(self, host):
+        """Cached A and AAAA records of ``host`` together, or None unless both are cached."""
+        local = self.hosts_addresses(host)
+        if local:
+            return local
+        try:
+            v4, v6 = self.cached(host, "A"), self.cached(host, "AAAA")
+        except ResolverError:
+            return None
+        return v4 + v6 if v4 is not None and v6 is not None else None
+
+    def addresses_sync(self, host):
+        addresses = self.cached_addresses(host)
+        return addresses if addresses is not None else run_sync(self.addresses(host))
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver():
+    """The process-wide resolver configured from settings (DNS_NAMESERVERS, DNS_TIMEOUT)."""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = Resolver(nameservers=config.DNS_NAMESERVERS or None, timeout=config.DNS_TIMEOUT)
+        return _resolver
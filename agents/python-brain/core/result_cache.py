@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Environment that changes what a cached command would print
+RELEVANT_ENV = ("PATH", "LANG", "HTTP_PROXY", "HTTPS_PROXY", "http_proxy", "https_proxy")
+
+def writes_output(argv):
+    """Whether ``argv`` asks for output files (``-oX out.xml``, ``--output``, ``tee``): never cached."""
+    return any(arg.startswith(("-o", "--output")) or arg in (">", ">>", "tee") for arg in argv[1:]) \
+        or os.path.basename(argv[0]) == "tee"
+
+class ResultCache:
+    """TTL cache of command results for idempotent, read-only invocations.
+
+    Only commands with a policy are cached. ``ttls`` maps a tool name to
+    seconds (``"which": 3600``). A key with arguments is more specific and
+    takes precedence over the bare tool: its flags (``"nmap -sn": 300``)
+    must be present anywhere, its other words are subcommands the command
+    must start with (``"ip route show"`` matches ``ip -4 route show`` but
+    not ``ip route add``), and a trailing ``$`` allows nothing else
+    (``"ifconfig $"`` is plain ``ifconfig``). Commands that write output
+    files are never cached. Keys combine the normalised argv, the working
+    directory and ``RELEVANT_ENV``. Hits and misses are counted per tool.
+    """
+
+    def __init__(self, ttls, max_entries=1024, clock=time.monotonic):
+        self.rules = {}
+        for rule, ttl in ttls.items():
+            tool, *args = rule.split()
+            exact = args[-1:] == ["$"]
+            args = args[:-1] if exact else args
+            flags = frozenset(arg for arg in args if arg.startswith("-"))
+            words = tuple(arg for arg in args if not arg.startswith("-"))
+            self.rules.setdefault(tool, []).append((flags, words, exact, ttl))
+        for rules in self.rules.values():
+            rules.sort(key=lambda rule: -len(rule[0]) - len(rule[1]))  # Most specific first
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = {}
+        self._entries = OrderedDict()  # key -> (expires, tool, result)
+        self._lock = threading.Lock()
+
+    def ttl(self, argv):
+        """Seconds ``argv`` may be cached for, or None if it has no policy."""
+        if writes_output(argv):
+            return None
+        flags = {arg for arg in argv[1:] if arg.startswith("-")}
+        words = tuple(arg for arg in argv[1:] if not arg.startswith("-"))
+        for rule_flags, rule_words, exact, ttl in self.rules.get(os.path.basename(argv[0]), ()):
+            if exact and len(argv) - 1 != len(rule_flags) + len(rule_words):
+                continue
+            if rule_flags <= flags and words[:len(rule_words)] == rule_words:
+                return ttl
+        return None
+
+    def key(self, argv):
+        return (tuple(argv), os.getcwd()) + tuple(os.environ.get(name) for name in RELEVANT_ENV)
+
+    def _count(self, tool, field):
+        counts = self.stats.setdefault(tool, {"hits": 0, "misses": 0})
+        counts[field] += 1
+
+    def get(self, argv):
+        """A copy of the cached result, or None."""
+        tool = os.path.basename(argv[0])
+        key = self.key(argv)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                self._entries.pop(key, None)
+                self._count(tool, "misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count(tool, "hits")
+            return dict(entry[2])
+
+    def put(self, argv, result, ttl):
+        with self._lock:
+            key = self.key(argv)
+            self._entries[key] = (self.clock() + ttl, os.path.basename(argv[0]), dict(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tool=None):
+        """Drop cached results, for one tool or all of them; returns how many."""
+        with self._lock:
+            if tool is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [key for key, entry in self._entries.items() if entry[1] == tool]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
@@ -0,0 +1,93 @@
+import mmap
+import os
+from collections import deque
+
+class Artifact:
+    """Full output of one command stream, spilled to a file.
+
+    Result dicts carry this handle next to the bounded ``stdout``/``stderr``
+    text; parsers that need everything read it lazily through ``lines()``
+    or ``mmap()`` instead of holding the whole output as a Python string.
+    """
+
+    __slots__ = ("path", "size")
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size  # Characters written
+
+    def lines(self):
+        """Iterate over the lines (without newlines)."""
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def mmap(self):
+        """Read-only memory map of the UTF-8 bytes; close it when done."""
+        with open(self.path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+
+    def to_dict(self):
+        return {"path": self.path, "size": self.size}
+
+    def __repr__(self):
+        return f"Artifact({self.path!r}, {self.size} chars)"
+
+class OutputSpool:
+    """Bounded in-memory capture of one output stream.
+
+    Output up to ``limit`` characters stays in memory as is. Past that,
+    everything is written to ``path`` and only the first and last
+    ``limit // 2`` characters are kept, so memory per command stays flat
+    however much a tool prints. ``close()`` returns the text for the
+    result dict (with a marker where output was elided) and the
+    ``Artifact``, or None if nothing was spilled.
+    """
+
+    def __init__(self, path, limit):
+        self.path = path
+        self.limit = limit
+        self.half = limit // 2
+        self.size = 0
+        self.chunks = []       # Everything, until the spool spills
+        self.head = ""
+        self.tail = deque()
+        self.tail_size = 0
+        self.file = None
+
+    def write(self, text):
+        self.size += len(text)
+        if self.file is None:
+            self.chunks.append(text)
+            if self.size <= self.limit:
+                return
+            self._spill()
+            return
+        self.file.write(text)
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size - len(self.tail[0]) >= self.half:
+            self.tail_size -= len(self.tail.popleft())
+
+    def _spill(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        text = "".join(self.chunks)
+        self.chunks = None
+        self.file = open(self.path, "w", encoding="utf-8", errors="replace")
+        self.file.write(text)
+        self.head = text[:self.half]
+        self.tail = deque([text[-self.half:]]) if self.half else deque()
+        self.tail_size = min(len(text), self.half)
+
+    def close(self):
+        if self.file is None:
+            return "".join(self.chunks), None
+        self.file.close()
+        tail = "".join(self.tail)[-self.half:] if self.half else ""
+        elided = self.size - len(self.head) - len(tail)
+        marker = f"\n[... {elided} characters not shown; full output in {self.path} ...]\n"
+        return self.head + marker + tail, Artifact(self.path, self.size)
@@ -0,0 +1,109 @@
+import json
+import queue
+import sys
+import time
+
+EVENT_PREFIX = "STINGBOT_EVENT "
+
+class OutputConsumer:
+    """Receives a command's output line by line while it runs.
+
+    Override the hooks you need. They are called on the executor's event
+    loop thread, so they must be quick; an exception in a consumer is
+    logged and never affects the command or the other consumers.
+    """
+
+    def start(self, run_id, cmd):
+        pass
+
+    def line(self, run_id, stream, text):
+        """``stream`` is ``"stdout"`` or ``"stderr"``; ``text`` has no newline."""
+        pass
+
+    def finish(self, run_id, result):
+        pass
+
+    async def drain(self):
+        """Awaited after each chunk of output; return once the consumer can take more.
+
+        A consumer that passes output on (over a socket, say) waits here,
+        and the command's pipe is not read again until it returns.
+        """
+
+class LineSplitter:
+    """Turns arbitrary output chunks into complete lines.
+
+    An unterminated line is collected as a list of pieces, so a tool that
+    prints one huge line costs linear time. With a ``limit``, a line keeps
+    at most that many characters and ends with a marker saying how many
+    were dropped, so memory stays bounded like the command's output spool.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.pieces = []
+        self.size = 0
+        self.dropped = 0
+
+    def _add(self, text):
+        if self.limit is not None and self.size + len(text) > self.limit:
+            keep = max(0, self.limit - self.size)
+            self.dropped += len(text) - keep
+            text = text[:keep]
+        if text:
+            self.pieces.append(text)
+            self.size += len(text)
+
+    def _take(self):
+        line = "".join(self.pieces)
+        if self.dropped:
+            line += f" [... {self.dropped} characters not shown]"
+        self.pieces, self.size, self.dropped = [], 0, 0
+        return line.rstrip("\r")
+
+    def feed(self, chunk):
+        *complete, rest = chunk.split("\n")
+        lines = []
+        for text in complete:
+            self._add(text)
+            lines.append(self._take())
+        self._add(rest)
+        return lines
+
+    def flush(self):
+        return [self._take()] if self.pieces or self.dropped else []
+
+class QueueConsumer(OutputConsumer):
+    """Hands lines to another thread: ``(stream, text)`` items, then ``("result", result)``."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+
+    def line(self, run_id, stream, text):
+        self.queue.put((stream, text))
+
+    def finish(self, run_id, result):
+        self.queue.put(("result", result))
+
+class EventStream(OutputConsumer):
+    """Structured command events as JSON lines, for the gateway's PythonBridge.
+
+    Each event is written as ``STINGBOT_EVENT {"type": ..., "id": ...}`` so
+    the bridge can tell events apart from ordinary log output on stdout.
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+
+    def _emit(self, event):
+        self.out.write(EVENT_PREFIX + json.dumps(event) + "\n")
+        self.out.flush()
+
+    def start(self, run_id, cmd):
+        self._emit({"type": "start", "id": run_id, "cmd": cmd, "time": time.time()})
+
+    def line(self, run_id, stream, text):
+        self._emit({"type": "output", "id": run_id, "stream": stream, "line": text})
+
+    def finish(self, run_id, result):
+        self._emit({"type": "exit", "id": run_id, "code": result.get("code")})
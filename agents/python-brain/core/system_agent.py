@@ -1,31 +1,54 @@
-import subprocess
-import os
 from config.settings import config
+from core.executor import get_executor
+from core.tool_inventory import get_inventory
 
 class SystemAgent:
     """Safe abstraction for OS interactions."""
     
     def __init__(self):
         self.safety_mode = config.SAFETY_MODE
+        self.executor = get_executor()
 
-    def execute(self, cmd):
-        """Run a shell command safely."""
-        # Safety Protocol
+    def _blocked(self, cmd):
         if self.safety_mode:
             forbidden = ["rm -rf", "mkfs", ":(){ :|:& };:"]
             if any(f in cmd for f in forbidden):
                 return {"stdout": "", "stderr": "Command blocked by Safety Protocol.", "code": 1}
+        return None
+
+    def execute(self, cmd, timeout=None, consumers=(), cache=True):
+        """Run a shell command safely; ``consumers`` see its output live.
 
+        A command still running after ``timeout`` seconds (by default the
+        deadline the executor learned for this kind of command) is killed
+        with its whole process group; the result keeps the output it had
+        produced and has ``timed_out`` set. ``cache=False`` runs it even if
+        the executor holds a fresh cached result.
+        """
+        # Safety Protocol
+        blocked = self._blocked(cmd)
+        if blocked:
+            return blocked
         try:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=300)
-            return {
-                "stdout": result.stdout, 
-                "stderr": result.stderr, 
-                "code": result.returncode
-            }
+            return self.executor.run_sync(cmd, timeout, consumers=consumers, cache=cache)
         except Exception as e:
             return {"stdout": "", "stderr": str(e), "code": -1}
 
+    def invalidate_cache(self, tool=None):
+        """Forget cached command results (for ``tool`` only, if given); returns how many."""
+        return self.executor.invalidate_cache(tool)
+
+    def execute_many(self, cmds, timeout=None):
+        """Run independent commands concurrently; results in the same order."""
+        cmds = list(cmds)
+        results = [self._blocked(cmd) for cmd in cmds]
+        runnable = [cmd for cmd, blocked in zip(cmds, results) if blocked is None]
+        try:
+            ran = iter(self.executor.run_many_sync(runnable, timeout))
+        except Exception as e:
+            ran = iter([{"stdout": "", "stderr": str(e), "code": -1}] * len(runnable))
+        return [blocked or next(ran) for blocked in results]
+
     def check_tool(self, tool_name):
-        """Verify if a tool is installed."""
-        return self.execute(f"which {tool_name}").get("code") == 0
+        """Verify if a tool is installed (answered from the tool inventory, no fork)."""
+        return get_inventory().has(tool_name)
@@ -0,0 +1,136 @@
+import atexit
+import ipaddress
+import json
+import os
+import re
+import shlex
+import threading
+from collections import deque
+
+WINDOW = 64        # Most recent runtimes kept per signature
+MIN_SAMPLES = 5    # Fewer than this and the default deadline is used
+MAX_FLAGS = 8
+
+# nmap-style octet ranges: 10.0.0.1-50, 10.0.1,2.*
+OCTET_RANGE = re.compile(r"^(\*|\d+(-\d+)?(,\d+(-\d+)?)*)$")
+
+def _addresses(word):
+    """How many addresses a target word covers (CIDR or octet range), or 0 if it is not one."""
+    try:
+        return ipaddress.ip_network(word, strict=False).num_addresses
+    except ValueError:
+        pass
+    octets = word.split(".")
+    if len(octets) != 4 or not all(OCTET_RANGE.match(octet) for octet in octets):
+        return 0
+    count = 1
+    for octet in octets:
+        if octet == "*":
+            count *= 256
+            continue
+        spans = [part.partition("-") for part in octet.split(",")]
+        count *= sum(max(1, int(high) - int(low) + 1) if high else 1 for low, _, high in spans)
+    return count
+
+def signature(tool, cmd):
+    """Runtime class of a command: the tool, the option flags it uses (not their values) and
+    the width of its IP targets, rounded up to a power of two.
+
+    ``nmap -sV -p- 10.0.0.1`` and ``nmap -p- -sV 10.0.0.2`` share ``nmap -p- -sV``;
+    ``nmap -p- -sV 10.0.0.0/24`` is ``nmap -p- -sV x256``.
+    """
+    try:
+        words = shlex.split(cmd)
+    except ValueError:
+        words = cmd.split()
+    flags = sorted({word.split("=", 1)[0] for word in words if word.startswith("-") and len(word) > 1})
+    width = sum(_addresses(word) for word in words if not word.startswith("-"))
+    parts = [tool or "sh"] + flags[:MAX_FLAGS]
+    if width > 1:
+        parts.append(f"x{1 << (width - 1).bit_length()}")
+    return " ".join(parts)
+
+class TimeoutModel:
+    """Per-invocation deadlines learned from how long commands actually take.
+
+    Runtimes are recorded per ``signature()`` in a window of the last
+    ``WINDOW`` runs. A deadline is the ``quantile`` of that window times
+    ``margin`` plus ``slack`` seconds, clamped to ``[minimum, maximum]``: a
+    ``which`` that always takes milliseconds gets the minimum, a full port
+    scan gets what its history says it needs. A signature without enough
+    history of its own gets ``default`` - a quick ping sweep says nothing
+    about a full version scan with the same tool. Each consecutive timeout
+    of a signature doubles its deadline, so a scan that was cut short gets
+    longer next time. History is saved to ``path`` and reused by later
+    missions.
+    """
+
+    def __init__(self, path=None, default=300, minimum=10, maximum=3600, quantile=0.95, margin=3.0, slack=5.0):
+        self.path = path
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.quantile = quantile
+        self.margin = margin
+        self.slack = slack
+        self.samples = {}   # signature or tool -> deque of seconds
+        self.timeouts = {}  # signature -> consecutive timeouts
+        self._dirty = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+                self.samples = {key: deque(values, maxlen=WINDOW) for key, values in saved["samples"].items()}
+                self.timeouts = saved.get("timeouts", {})
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[Executor] Ignoring unreadable timeout history {path}: {e}")
+        if path:
+            atexit.register(self.save)
+
+    def estimate(self, key):
+        """The ``quantile`` of the recorded runtimes of ``key``, or None without enough history."""
+        samples = self.samples.get(key)
+        if not samples or len(samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))]
+
+    def deadline(self, tool, cmd):
+        """Seconds ``cmd`` may run before it is considered hung."""
+        sig = signature(tool, cmd)
+        estimate = self.estimate(sig)
+        if estimate is None:
+            seconds = max(self.minimum, self.default)
+        else:
+            seconds = max(self.minimum, estimate * self.margin + self.slack)
+        return min(self.maximum, seconds * 2 ** self.timeouts.get(sig, 0))
+
+    def record(self, tool, cmd, seconds, timed_out=False):
+        """Add a run of ``cmd`` that took ``seconds``; a timeout only counts against its deadline."""
+        sig = signature(tool, cmd)
+        with self._lock:
+            if timed_out:
+                self.timeouts[sig] = min(self.timeouts.get(sig, 0) + 1, 8)
+            else:
+                self.timeouts.pop(sig, None)
+                self.samples.setdefault(sig, deque(maxlen=WINDOW)).append(round(seconds, 3))
+            self._dirty += 1
+        if self._dirty >= 20:
+            self.save()
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            saved = {"samples": {key: list(values) for key, values in self.samples.items()},
+                     "timeouts": dict(self.timeouts)}
+            self._dirty = 0
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(saved, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[Executor] Could not save timeout history: {e}")
@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import config
+
+# Tools the agents and modules use -> arguments that make them print a version
+# (None: presence only, the tool has no cheap, side-effect free version flag)
+KNOWN_TOOLS = {
+    "nmap": ["--version"], "masscan": ["--version"], "nc": None, "msfconsole": None,
+    "enum4linux": None, "smbclient": ["--version"], "snmpwalk": ["-V"],
+    "sqlmap": ["--version"], "nikto": ["-Version"], "gobuster": ["version"], "ffuf": ["-V"],
+    "dirb": None, "hydra": ["-h"], "curl": ["--version"], "whatweb": ["--version"],
+    "subfinder": ["-version"], "amass": ["-version"], "whois": None, "dig": ["-v"], "host": ["-V"],
+    "openssl": ["version"], "mysql": ["--version"],
+    "strings": ["--version"], "file": ["--version"], "readelf": ["--version"], "objdump": ["--version"],
+    "nm": ["--version"], "r2": ["-v"], "ltrace": ["-V"], "strace": ["-V"], "gdb": ["--version"],
+    "checksec": ["--version"],
+}
+VERSION_TIMEOUT = 5
+MISS_TTL = 30  # Seconds a tool found missing is believed missing before it is looked up again
+_VERSION = re.compile(r"\d+(?:\.\d+)+[\w-]*")
+
+def probe_version(path, args):
+    """First version-looking token ``path args`` prints, or None."""
+    try:
+        proc = subprocess.run([path] + args, stdin=subprocess.DEVNULL, capture_output=True,
+                              timeout=VERSION_TIMEOUT, start_new_session=True)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION.search((proc.stdout + proc.stderr).decode("utf-8", "replace"))
+    return match.group(0) if match else None
+
+class ToolInventory:
+    """Which tools are installed, where, and which version, without forking per question.
+
+    ``scan()`` resolves every tool with ``shutil.which`` on a thread pool
+    and probes versions there too. Versions are cached in ``cache_path``
+    keyed on the binary's path and mtime, so they are only probed again
+    after an upgrade. Lookups (``has``, ``path``, ``version``) are answered
+    in-process; the inventory rescans when ``PATH`` changes, and a tool
+    found missing is looked up again after ``miss_ttl`` seconds (or at once
+    with ``refresh(tool)``, e.g. after installing it).
+    """
+
+    def __init__(self, tools=None, cache_path=None, workers=8, miss_ttl=MISS_TTL, clock=time.monotonic):
+        self.tools = dict(KNOWN_TOOLS if tools is None else tools)
+        self.cache_path = cache_path
+        self.workers = workers
+        self.miss_ttl = miss_ttl
+        self.clock = clock
+        self.entries = {}  # tool -> {"path", "mtime", "version"}; path is None when missing
+        self.env_path = None
+        self._lock = threading.Lock()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, entries):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            print(f"[Inventory] Could not save tool cache: {e}")
+
+    def _lookup(self, tool, cached, env_path):
+        path = shutil.which(tool, path=env_path)
+        if path is None:
+            return {"path": None, "mtime": None, "version": None, "checked": self.clock()}
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+        previous = cached.get(tool)
+        if previous and previous.get("path") == path and previous.get("mtime") == mtime:
+            return previous
+        args = self.tools.get(tool)
+        return {"path": path, "mtime": mtime, "version": probe_version(path, args) if args else None}
+
+    def scan(self):
+        """(Re)build the inventory for the current ``PATH``; returns it."""
+        env_path = os.environ.get("PATH", os.defpath)
+        cached = self._load_cache()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            found = dict(zip(self.tools, pool.map(lambda tool: self._lookup(tool, cached, env_path), self.tools)))
+        with self._lock:
+            self.entries = found
+            self.env_path = env_path
+        installed = {tool: entry for tool, entry in found.items() if entry["path"]}
+        if installed != cached:
+            self._save_cache(installed)
+        print(f"[Inventory] {len(installed)}/{len(found)} known tools available")
+        return self
+
+    def refresh(self, tool):
+        """Look ``tool`` up again now (after installing or removing it); returns whether it is installed."""
+        entry = self._lookup(tool, {}, self.env_path)
+        with self._lock:
+            self.entries[tool] = entry
+        return entry["path"] is not None
+
+    def _entry(self, tool):
+        if self.env_path != os.environ.get("PATH", os.defpath):
+            self.scan()
+        entry = self.entries.get(tool)
+        # Unknown tools are resolved on first use, missing ones again once the miss is stale
+        if entry is None or (entry["path"] is None and self.clock() - entry.get("checked", 0) >= self.miss_ttl):
+            self.refresh(tool)
+            entry = self.entries[tool]
+        return entry
+
+    def has(self, tool):
+        return self._entry(tool)["path"] is not None
+
+    def path(self, tool):
+        return self._entry(tool)["path"]
+
+    def version(self, tool):
+        return self._entry(tool)["version"]
+
+    def available(self, tools=None):
+        """Installed tools among ``tools`` (default: all known ones)."""
+        return [tool for tool in (tools or self.tools) if self.has(tool)]
+
+    def describe(self, tools=None):
+        """One line for prompts: installed tools with versions, then the missing ones."""
+        tools = list(tools or self.tools)
+        installed = [f"{tool} {self.version(tool)}" if self.version(tool) else tool
+                     for tool in tools if self.has(tool)]
+        missing = [tool for tool in tools if not self.has(tool)]
+        line = ", ".join(installed) or "none"
+        return line + (f" (not installed: {', '.join(missing)})" if missing else "")
+
+_inventory = None
+_inventory_lock = threading.Lock()
+
+def get_inventory():
+    """The process-wide inventory, scanned on first use."""
+    global _inventory
+    with _inventory_lock:
+        if _inventory is None:
+            _inventory = ToolInventory(cache_path=os.path.join(config.LOG_DIR, "tool_inventory.json")).scan()
+        return _inventory
@@ -0,0 +1,167 @@
+"""
+Executor worker daemon: runs commands for a remote Supervisor.
+
+Start one per scanner node, with the same shared secret the Supervisor
+has in STINGBOT_WORKER_SECRET, then list the nodes in STINGBOT_WORKERS
+(comma-separated) on the Supervisor side:
+
+    STINGBOT_WORKER_SECRET=... python3 -m core.worker --listen tcp://0.0.0.0:7070
+    STINGBOT_WORKER_SECRET=... python3 -m core.worker --listen unix:///run/stingbot/worker.sock
+
+Authentication only: on untrusted networks carry the TCP port over SSH or
+a VPN, since commands and output travel in the clear.
+"""
+
+import argparse
+import asyncio
+import hmac
+import os
+import socket
+import sys
+
+from config.settings import config
+from core.executor import get_executor
+from core.remote import MESSAGE_LIMIT, post, receive, send, sign
+from core.streaming import OutputConsumer
+from core.system_agent import SystemAgent
+from core.tool_inventory import get_inventory
+
+class _Forward(OutputConsumer):
+    def __init__(self, writer, run_id):
+        self.writer = writer
+        self.run_id = run_id
+
+    def line(self, run_id, stream, text):
+        post(self.writer, {"type": "line", "id": self.run_id, "stream": stream, "text": text})
+
+    async def drain(self):
+        # A slow client holds the command's pipe, not this node's memory
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            pass  # handle() sees the client go and cancels the run
+
+def _valid(message, tasks):
+    """Whether a client message is well formed; anything else ends the connection."""
+    run_id = message.get("id")
+    if not isinstance(run_id, int) or isinstance(run_id, bool):
+        return False
+    kind = message.get("type")
+    if kind == "run":
+        timeout = message.get("timeout")
+        return (isinstance(message.get("cmd"), str) and run_id not in tasks
+                and (timeout is None or isinstance(timeout, (int, float)) and not isinstance(timeout, bool)
+                     and timeout > 0))
+    if kind == "signal":
+        return message.get("action") in ("kill", "stop", "cont")
+    return kind == "cancel"
+
+def _portable(result):
+    """Result dict safe to send: spilled-output artifacts become path/size records on this node."""
+    return {key: value.to_dict() if key.endswith("_artifact") else value for key, value in result.items()}
+
+class WorkerServer:
+    """Serves authenticated clients, running their commands on this node's executor."""
+
+    def __init__(self, secret, executor, tools, name=None, safety=None):
+        self.secret = secret
+        self.executor = executor
+        self.tools = list(tools)
+        self.name = name or socket.gethostname()
+        self.safety = safety  # cmd -> refusal result or None (SystemAgent._blocked)
+
+    async def handle(self, reader, writer):
+        nonce = os.urandom(16).hex()
+        await send(writer, {"type": "hello", "name": self.name, "nonce": nonce, "tools": self.tools,
+                      "slots": self.executor.max_concurrency, "running": self.executor.running})
+        auth = await receive(reader)
+        mac = auth.get("mac") if auth else None
+        if (not isinstance(mac, str) or not isinstance(auth.get("nonce"), str)
+                or not hmac.compare_digest(mac.encode(), sign(self.secret, "client", nonce).encode())):
+            print(f"[Worker] Rejected unauthenticated client {writer.get_extra_info('peername')}")
+            writer.close()
+            return
+        await send(writer, {"type": "ready", "mac": sign(self.secret, "worker", auth["nonce"])})
+        tasks = {}
+        jobs = {}
+        try:
+            while True:
+                message = await receive(reader)
+                if message is None:
+                    break
+                if not _valid(message, tasks):
+                    print(f"[Worker] Dropping client {writer.get_extra_info('peername')}: malformed message")
+                    break
+                if message["type"] == "run":
+                    run_id = message["id"]
+                    jobs[run_id] = self.executor.jobs.add(message["cmd"])
+                    task = asyncio.ensure_future(self._run(writer, message, jobs[run_id]))
+                    tasks[run_id] = task
+                    task.add_done_callback(lambda _, run_id=run_id: self._forget(run_id, tasks, jobs))
+                elif message["type"] == "cancel" and message["id"] in tasks:
+                    tasks[message["id"]].cancel()
+                elif message["type"] == "signal" and message["id"] in jobs:
+                    job = jobs[message["id"]]
+                    {"kill": job.kill, "stop": job.pause, "cont": job.resume}[message["action"]]()
+        finally:
+            # The client is gone: nobody will read the results
+            for task in list(tasks.values()):
+                task.cancel()
+            writer.close()
+
+    @staticmethod
+    def _forget(run_id, tasks, jobs):
+        tasks.pop(run_id, None)
+        job = jobs.pop(run_id, None)
+        if job is not None and not job.done:  # Cancelled before it started
+            job.complete({"stdout": "", "stderr": "Cancelled", "code": -1})
+
+    async def _run(self, writer, message, job=None):
+        cmd = message["cmd"]
+        result = self.safety(cmd) if self.safety else None
+        if result is None:
+            result = await self.executor.run(cmd, message.get("timeout"),
+                                             consumers=[_Forward(writer, message["id"])], job=job)
+        elif job is not None:
+            job.complete(result)
+        if not writer.is_closing():
+            try:
+                await send(writer, {"type": "exit", "id": message["id"], "result": _portable(result),
+                                    "running": self.executor.running})
+            except ConnectionError:
+                pass
+
+    async def serve(self, address):
+        if address.startswith("unix://"):
+            path = address[len("unix://"):]
+            if os.path.exists(path):
+                os.unlink(path)
+            server = await asyncio.start_unix_server(self.handle, path, limit=MESSAGE_LIMIT)
+            os.chmod(path, 0o600)
+        else:
+            host, _, port = address[len("tcp://"):].rpartition(":")
+            server = await asyncio.start_server(self.handle, host.strip("[]"), int(port), limit=MESSAGE_LIMIT)
+        print(f"[Worker] {self.name} listening on {address} with {len(self.tools)} tools", flush=True)
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="STINGBOT executor worker")
+    parser.add_argument("--listen", required=True, help="tcp://host:port or unix:///path")
+    parser.add_argument("--name", help="Node name reported to clients (default: hostname)")
+    parser.add_argument("--tools", help="Comma-separated tools to offer (default: every installed known tool)")
+    args = parser.parse_args(argv)
+    secret = os.environ.get("STINGBOT_WORKER_SECRET", "")
+    if not secret:
+        sys.exit("STINGBOT_WORKER_SECRET must be set")
+    # This node runs what it is sent; it must not forward to other workers
+    config.EXEC_WORKERS = []
+    tools = args.tools.split(",") if args.tools else get_inventory().available()
+    server = WorkerServer(secret, get_executor(), tools, args.name, SystemAgent()._blocked)
+    try:
+        asyncio.run(server.serve(args.listen))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -62,18 +62,18 @@ class AuditModule:
         """Check SSL/TLS configuration."""
         results = {"target": target, "checks": {}}
         
-        # Check certificate
-        cert_result = self.sys.execute(f"echo | openssl s_client -connect {target}:443 2>/dev/null | openssl x509 -noout -dates -subject 2>/dev/null")
+        # Certificate and every protocol probe at once
+        protocols = ["ssl3", "tls1", "tls1_1", "tls1_2", "tls1_3"]
+        cert_result, *proto_checks = self.sys.execute_many(
+            [f"echo | openssl s_client -connect {target}:443 2>/dev/null | openssl x509 -noout -dates -subject 2>/dev/null"]
+            + [f"echo | timeout 5 openssl s_client -{proto} -connect {target}:443 2>/dev/null | grep -q 'CONNECTED' && echo {proto}"
+               for proto in protocols]
+        )
         if cert_result.get("code") == 0:
             results["checks"]["certificate"] = cert_result.get("stdout", "")
         
         # Check supported protocols
-        protocols = ["ssl3", "tls1", "tls1_1", "tls1_2", "tls1_3"]
-        supported = []
-        for proto in protocols:
-            proto_check = self.sys.execute(f"echo | timeout 5 openssl s_client -{proto} -connect {target}:443 2>/dev/null | grep -q 'CONNECTED' && echo {proto}")
-            if proto_check.get("stdout", "").strip():
-                supported.append(proto)
+        supported = [proto for proto, check in zip(protocols, proto_checks) if check.get("stdout", "").strip()]
         results["checks"]["protocols"] = supported
         
         return results
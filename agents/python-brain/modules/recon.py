@@ -1,11 +1,15 @@
 from core.system_agent import SystemAgent
+from core.event_loop import run_sync
+from core.resolver import get_resolver
+import asyncio
 import re
 
 class ReconModule:
     """Wrapper for Reconnaissance Tools (Nmap, Subfinder, DNS)."""
     
-    def __init__(self, sys_agent):
+    def __init__(self, sys_agent, resolver=None):
         self.sys = sys_agent
+        self.resolver = resolver or get_resolver()
 
     def scan(self, target, scan_type="fast"):
         """Perform an Nmap scan with configurable intensity."""
@@ -29,15 +33,23 @@ class ReconModule:
         
         results = {"domain": domain, "subdomains": [], "methods": []}
         
+        # Methods 1, 2 and 4 are independent external sources: query them concurrently
+        commands = [
+            f"subfinder -d {domain} -silent 2>/dev/null | head -50" if self.sys.check_tool("subfinder") else None,
+            f"timeout 60 amass enum -passive -d {domain} 2>/dev/null | head -50" if self.sys.check_tool("amass") else None,
+            f"curl -s 'https://crt.sh/?q=%25.{domain}&output=json' 2>/dev/null | grep -oP '\"name_value\":\"[^\"]+\"' | cut -d'\"' -f4 | sort -u | head -30",
+        ]
+        ran = iter(self.sys.execute_many([cmd for cmd in commands if cmd]))
+        subfinder_result, amass_result, ct_result = [
+            next(ran) if cmd else {"stdout": "", "stderr": "not installed", "code": 127} for cmd in commands]
+        
         # Method 1: Subfinder (if available)
-        subfinder_result = self.sys.execute(f"which subfinder && subfinder -d {domain} -silent 2>/dev/null | head -50")
         if subfinder_result.get("code") == 0 and subfinder_result.get("stdout"):
             subs = [s.strip() for s in subfinder_result["stdout"].split("\n") if s.strip() and domain in s]
             results["subdomains"].extend(subs)
             results["methods"].append("subfinder")
         
         # Method 2: Amass (passive, if available)
-        amass_result = self.sys.execute(f"which amass && timeout 60 amass enum -passive -d {domain} 2>/dev/null | head -50")
         if amass_result.get("code") == 0 and amass_result.get("stdout"):
             subs = [s.strip() for s in amass_result["stdout"].split("\n") if s.strip() and domain in s]
             results["subdomains"].extend(subs)
@@ -48,19 +60,16 @@ class ReconModule:
                           "blog", "shop", "store", "cdn", "assets", "static", "ns1", "ns2",
                           "vpn", "remote", "portal", "webmail", "smtp", "pop", "imap"]
         
-        dns_found = []
-        for prefix in common_prefixes[:10]:  # Limit to avoid long execution
-            subdomain = f"{prefix}.{domain}"
-            dns_result = self.sys.execute(f"host {subdomain} 2>/dev/null | grep -q 'has address' && echo {subdomain}")
-            if dns_result.get("code") == 0 and dns_result.get("stdout", "").strip():
-                dns_found.append(subdomain)
+        # All prefixes at once through the shared resolver (cached, no `host` per name)
+        names = [f"{prefix}.{domain}" for prefix in common_prefixes]
+        answers = run_sync(self.resolver.resolve_many(names, "A"))
+        dns_found = [name for name in names if answers[name]]
         
         if dns_found:
             results["subdomains"].extend(dns_found)
             results["methods"].append("dns_bruteforce")
         
         # Method 4: Certificate Transparency logs
-        ct_result = self.sys.execute(f"curl -s 'https://crt.sh/?q=%25.{domain}&output=json' 2>/dev/null | grep -oP '\"name_value\":\"[^\"]+\"' | cut -d'\"' -f4 | sort -u | head -30")
         if ct_result.get("code") == 0 and ct_result.get("stdout"):
             ct_subs = [s.strip() for s in ct_result["stdout"].split("\n") if s.strip() and domain in s and "*" not in s]
             results["subdomains"].extend(ct_subs)
@@ -80,21 +89,21 @@ class ReconModule:
         
         record_types = ["A", "AAAA", "MX", "NS", "TXT", "SOA", "CNAME"]
         
-        for rtype in record_types:
-            cmd = f"dig +short {target} {rtype} 2>/dev/null"
-            res = self.sys.execute(cmd)
-            if res.get("stdout", "").strip():
-                results["records"][rtype] = res["stdout"].strip().split("\n")
-        
-        # Reverse DNS if A record found
-        if results["records"].get("A"):
-            for ip in results["records"]["A"][:2]:
-                rev_cmd = f"dig +short -x {ip} 2>/dev/null"
-                rev_res = self.sys.execute(rev_cmd)
-                if rev_res.get("stdout", "").strip():
-                    results["records"]["PTR"] = results["records"].get("PTR", [])
-                    results["records"]["PTR"].append(f"{ip} -> {rev_res['stdout'].strip()}")
-        
+        async def lookup():
+            answers = await asyncio.gather(*(self.resolver.resolve(target, rtype) for rtype in record_types),
+                                           return_exceptions=True)
+            records = {rtype: found for rtype, found in zip(record_types, answers)
+                       if found and not isinstance(found, Exception)}
+            # Reverse DNS if A record found
+            addresses = records.get("A", [])[:2]
+            names = await asyncio.gather(*(self.resolver.reverse(ip) for ip in addresses), return_exceptions=True)
+            ptr = [f"{ip} -> {', '.join(found)}" for ip, found in zip(addresses, names)
+                   if found and not isinstance(found, Exception)]
+            if ptr:
+                records["PTR"] = ptr
+            return records
+        
+        results["records"] = run_sync(lookup())
         return results
 
     def whois_lookup(self, target):
@@ -107,8 +116,7 @@ class ReconModule:
         print(f"[*] Recon: Port discovery on {target}...")
         
         # Try masscan first (faster for large scans)
-        masscan_check = self.sys.execute("which masscan")
-        if masscan_check.get("code") == 0:
+        if self.sys.check_tool("masscan"):
             return self.sys.execute(f"sudo masscan {target} -p1-65535 --rate=1000 2>/dev/null | head -100")
         
         # Fallback to nmap
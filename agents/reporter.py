@@ -1,4 +1,5 @@
 from agents.base_agent import BaseAgent
+from orchestrator.resource_usage import format_usage
 import os
 
 class ReporterAgent(BaseAgent):
@@ -11,13 +12,19 @@ class ReporterAgent(BaseAgent):
 
     def execute(self, mission_data):
         # mission_data contains the summary of the attack graph etc.
+        attack_paths = "\n".join(self.state.attack_path_facts()) if self.state else "Not available"
         prompt = f"""
         Mission Data: {mission_data}
+        Attack Path Analysis: {attack_paths}
         
         Task: Create a professional Markdown security report.
-        Include Executive Summary, Findings, and Recommendations.
+        Include Executive Summary, Findings, Attack Paths, and Recommendations.
         """
         report_content = self.reason(prompt, system_prompt="You are a STINGBOT SENIOR PENETRATION TESTER.")
+        if self.state:
+            usage = format_usage(self.state.resource_usage())
+            if usage:
+                report_content += "\n\n## Resource Usage\n\n" + "\n".join(usage) + "\n"
         
         report_path = os.path.join(self.log_dir, "mission_report.md")
         with open(report_path, "w") as f:
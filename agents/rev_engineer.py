@@ -3,7 +3,9 @@ import os
 
 class RevEngineer(BaseAgent):
     """Specialist for binary analysis and reverse engineering."""
-    
+
+    TOOLS = ("strings", "file", "readelf", "objdump", "r2", "nm", "ltrace", "strace", "checksec", "gdb")
+
     def __init__(self):
         super().__init__("Reverse Engineer", "Logic for Ghidra, Radare2, and binary auditing.")
         self.analysis_history = []
@@ -16,6 +18,7 @@ class RevEngineer(BaseAgent):
         Reverse Engineering Task: {task}
         Previous Analysis: {self.analysis_history[-3:] if self.analysis_history else 'None'}
         
+        Installed: {self.tools.describe(self.TOOLS)}
         Available Tools and Use Cases:
         - strings <file>: Extract readable strings (first step for unknown binaries)
         - file <file>: Identify file type and architecture
@@ -2,7 +2,9 @@ from agents.base_agent import BaseAgent
 
 class WebPentester(BaseAgent):
     """Specialist for web-based reconnaissance and exploitation."""
-    
+
+    TOOLS = ("sqlmap", "nikto", "gobuster", "ffuf", "curl")
+
     def __init__(self):
         super().__init__("Web Pentester", "Logic for Burp, ZAP, SQLMap, Nikto, and web vulns.")
 
@@ -11,7 +13,7 @@ class WebPentester(BaseAgent):
         prompt = f"""
         Task: {task}
         
-        Available Tools: sqlmap, nikto, gobuster, ffuf, curl.
+        Available Tools: {self.tools.describe(self.TOOLS)}.
         Determine the best command to run.
         Output ONLY the command or [COMPLETE] if done.
         """
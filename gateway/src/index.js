@@ -17,6 +17,7 @@ const io = new Server(httpServer, {
 
 const PORT = 18789;
 const PYTHON_BRAIN_PATH = path.resolve(__dirname, '../../agents/python-brain');
+const EVENT_PREFIX = 'STINGBOT_EVENT '; // Structured tool events (core/streaming.py)
 
 // Serve static files for the client dashboard
 app.use(express.static(path.resolve(__dirname, '../../client/dist')));
@@ -61,19 +62,32 @@ result = orchestrator.run_mission("${objective.replace(/"/g, '\\"')}")
 print("MISSION_RESULT:" + str(result))
             `], {
                 cwd: PYTHON_BRAIN_PATH,
-                env: { ...process.env, PYTHONUNBUFFERED: '1' }
+                env: { ...process.env, PYTHONUNBUFFERED: '1', STINGBOT_EVENTS: '1' }
             });
 
             let output = '';
             let errorOutput = '';
+            let partial = '';
 
             this.process.stdout.on('data', (data) => {
-                const chunk = data.toString();
-                output += chunk;
+                const chunk = partial + data.toString();
                 
-                // Stream real-time updates to client
-                const lines = chunk.split('\n').filter(l => l.trim());
+                // Stream real-time updates to client (keep an unfinished line for the next chunk)
+                const lines = chunk.split('\n');
+                partial = lines.pop();
                 lines.forEach(line => {
+                    // Structured tool events from the executor: forward, keep out of the log
+                    if (line.startsWith(EVENT_PREFIX)) {
+                        try {
+                            const event = JSON.parse(line.slice(EVENT_PREFIX.length));
+                            this.socket.emit(`tool:${event.type}`, event);
+                        } catch (e) {
+                            this.socket.emit('neural:log', { message: line });
+                        }
+                        return;
+                    }
+                    output += line + '\n';
+                    if (!line.trim()) return;
                     // Parse log types from Python output
                     if (line.includes('[*]') || line.includes('→')) {
                         this.socket.emit('neural:update', { 
@@ -95,6 +109,7 @@ print("MISSION_RESULT:" + str(result))
             });
 
             this.process.on('close', (code) => {
+                output += partial;
                 console.log(chalk.gray(`Python Brain exited with code ${code}`));
                 if (code === 0) {
                     resolve(output);
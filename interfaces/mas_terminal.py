@@ -2,6 +2,7 @@ import sys
 import os
 import yaml
 import time
+import threading
 
 # Ensure python-brain is in path for CLI imports
 base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -11,16 +12,44 @@ from interfaces.cli import cli, console, COLOR_SECONDARY, COLOR_PRIMARY
 from rich.panel import Panel
 from rich.align import Align
 from rich.markdown import Markdown
+from rich.markup import escape
 from orchestrator.supervisor import Supervisor
+from orchestrator.resource_usage import format_usage
+from orchestrator.state_summary import format_edge, format_node
 from agents.conversation_agent import ConversationAgent
 from core.memory_system import MemorySystem
+from core.executor import get_executor, tool_name
+from core.streaming import OutputConsumer
+
+class LiveOutput(OutputConsumer):
+    """Echoes tool output to the console as it is produced ('live on')."""
+
+    def __init__(self):
+        self.tools = {}
+
+    def start(self, run_id, cmd):
+        self.tools[run_id] = tool_name(cmd) or "sh"
+
+    def line(self, run_id, stream, text):
+        style = "red" if stream == "stderr" else "dim"
+        console.print(f"[{style}]  {escape(self.tools.get(run_id, '?'))} #{run_id} │ {escape(text)}[/]", highlight=False)
+
+    def finish(self, run_id, result):
+        self.tools.pop(run_id, None)
 
 class MASTerminal:
     """Session-based Interactive Terminal for Stingbot MAS with Autonomous Capabilities."""
 
+    GRAPH_PAGE_SIZE = 25
+    RECENT_JOBS = 10  # Finished jobs 'jobs' lists after the active ones
+
     def __init__(self, workspace_path):
         self.workspace = workspace_path
         self.supervisor = Supervisor(workspace_path)
+        self.snapshot = None  # GraphSnapshot being paged by the 'graph' command
+        self.snapshot_live = False  # True when that snapshot was exported from the live mission
+        self.live = None  # LiveOutput consumer while 'live on'
+        self.mission = None  # Thread running the current mission, so the prompt stays usable
         
         # Initialize Autonomous Components
         try:
@@ -66,6 +95,10 @@ class MASTerminal:
                 args = cmd_parts[1] if len(cmd_parts) > 1 else ""
 
                 if cmd in ['exit', 'quit']:
+                    if self._mission_running():
+                        cli.log("Stopping the running mission...", "warning")
+                        self.supervisor.request_stop()
+                        self.mission.join(timeout=10)
                     cli.log("Disconnecting from MAS Neural Link...", "info")
                     break
                 elif cmd == 'clear':
@@ -74,8 +107,17 @@ class MASTerminal:
                 elif cmd == 'help':
                     self._show_help()
                 elif cmd == 'graph':
-                    summary = self.supervisor.state.export_summary()
-                    cli.log(f"Attack Graph Summary: {summary}", "info")
+                    self._handle_graph(args)
+                elif cmd == 'live':
+                    self._handle_live(args)
+                elif cmd == 'cache':
+                    self._handle_cache(args)
+                elif cmd == 'usage':
+                    self._show_usage()
+                elif cmd == 'jobs':
+                    self._show_jobs(args)
+                elif cmd in ('kill', 'tail', 'pause', 'resume'):
+                    self._handle_job(cmd, args)
                 elif cmd == 'memory':
                     if self.autonomous_mode:
                         cli.log(self.memory.export_memory_summary(), "info")
@@ -93,10 +135,18 @@ class MASTerminal:
                         self._run_legacy_mission(user_input)
 
             except KeyboardInterrupt:
-                cli.log("\nInterrupted.", "warning")
+                if self._mission_running():
+                    killed = self.supervisor.request_stop()
+                    cli.log(f"\nMission aborted by operator: stopping after this turn ({killed} command(s) killed).",
+                            "warning")
+                else:
+                    cli.log("\nInterrupted.", "warning")
             except Exception as e:
                 cli.log(f"System Error: {str(e)}", "error")
 
+    def _mission_running(self):
+        return self.mission is not None and self.mission.is_alive()
+
     def _handle_conversation(self, user_input):
         """Process natural language input via ConversationAgent."""
         
@@ -119,8 +169,17 @@ class MASTerminal:
                  self._run_mission(user_input)
 
     def _run_mission(self, goal):
-        """Execute a mission via Supervisor."""
+        """Start a mission via Supervisor in the background; the prompt stays open for job control."""
+        if self._mission_running():
+            cli.log("A mission is already running. Use 'jobs' to follow it, or Ctrl-C to abort it.", "warning")
+            return
         cli.log(f"Initiating Mission: {goal}", "action")
+        cli.log("Running in the background: 'jobs', 'tail <id>' and 'kill <id>' control its commands; "
+                "Ctrl-C aborts the mission.", "info")
+        self.mission = threading.Thread(target=self._mission_body, args=(goal,), name="mission", daemon=True)
+        self.mission.start()
+
+    def _mission_body(self, goal):
         try:
              result = self.supervisor.run_mission(goal)
              cli.log(result, "success")
@@ -134,8 +193,6 @@ class MASTerminal:
                  )
                  self._print_agent_response(reflection_msg)
                  
-        except KeyboardInterrupt:
-            cli.log("\nMission aborted by operator.", "warning")
         except Exception as e:
             cli.log(f"Mission failed: {str(e)}", "error")
 
@@ -157,6 +214,157 @@ class MASTerminal:
                 console.print(f"  {i}. {sugg}")
             console.print("")
 
+    def _handle_graph(self, args):
+        """Show the live graph summary or page through a binary snapshot."""
+        parts = args.split()
+        if not parts:
+            summary = self.supervisor.state.export_summary()
+            cli.log(f"Attack Graph Summary: {summary}", "info")
+            return
+
+        subcmd = parts[0].lower()
+        if subcmd == "open":
+            if len(parts) < 2:
+                cli.log("Usage: graph open <snapshot.sgb>", "warning")
+                return
+            self._open_snapshot(parts[1])
+        elif subcmd in ("nodes", "edges"):
+            state = self.supervisor.state
+            if self.snapshot is None or (self.snapshot_live and self.snapshot.counts() != tuple(state.counts())):
+                # Nothing opened yet, or the live mission grew since: snapshot it and page that
+                self._open_snapshot(state.export_snapshot(), live=True)
+            if self.snapshot is None:
+                return
+            try:
+                page = max(1, int(parts[1])) if len(parts) > 1 else 1
+            except ValueError:
+                cli.log("Page must be a number.", "warning")
+                return
+            self._show_graph_page(subcmd, page)
+        elif subcmd == "find":
+            if self.snapshot is None or len(parts) < 2:
+                cli.log("Usage: graph find <node_id> (after 'graph open' or 'graph nodes')", "warning")
+                return
+            node = self.snapshot.get_node(parts[1])
+            if node is None:
+                cli.log(escape(f"No node '{parts[1]}' in snapshot."), "warning")
+            else:
+                cli.log(escape(f"{node['id']} ({node['type']}) {node['data']} @ {node['timestamp']}"), "info")
+        else:
+            cli.log("Usage: graph [open <path> | nodes [page] | edges [page] | find <node_id>]", "warning")
+
+    def _handle_live(self, args):
+        """Toggle live streaming of tool output to the console."""
+        executor = get_executor()
+        mode = args.strip().lower() or ("off" if self.live else "on")
+        if mode == "on" and self.live is None:
+            self.live = LiveOutput()
+            executor.add_consumer(self.live)
+        elif mode == "off" and self.live is not None:
+            executor.remove_consumer(self.live)
+            self.live = None
+        elif mode not in ("on", "off"):
+            cli.log("Usage: live [on|off]", "warning")
+            return
+        cli.log(f"Live tool output {'on' if self.live else 'off'}.", "info")
+
+    def _handle_cache(self, args):
+        """Show command result cache hits per tool, or clear it."""
+        cache = get_executor().cache
+        if cache is None:
+            cli.log("Command result cache is disabled (EXEC_CACHE_TTLS is empty).", "warning")
+            return
+        parts = args.split()
+        if parts and parts[0] == "clear":
+            tool = parts[1] if len(parts) > 1 else None
+            dropped = cache.invalidate(tool)
+            cli.log(f"Dropped {dropped} cached result(s){' for ' + tool if tool else ''}.", "info")
+        elif parts:
+            cli.log("Usage: cache [clear [tool]]", "warning")
+        elif not cache.stats:
+            cli.log("No cacheable commands run yet.", "info")
+        else:
+            for tool, counts in sorted(cache.stats.items()):
+                cli.log(f"  {tool:<12} {counts['hits']} hit(s), {counts['misses']} miss(es)")
+
+    def _show_usage(self):
+        """Resource totals of the mission's commands per tool and agent."""
+        lines = format_usage(self.supervisor.state.resource_usage())
+        if not lines:
+            cli.log("No commands recorded yet.", "info")
+        for line in lines:
+            cli.log(escape(line))
+
+    def _show_jobs(self, args):
+        """Table of running commands, then the most recently finished ones ('jobs all': every one kept)."""
+        jobs = get_executor().jobs.list()
+        if args.strip() != "all":
+            active = [job for job in jobs if not job.done]
+            jobs = active + [job for job in jobs if job.done][-self.RECENT_JOBS:]
+        if not jobs:
+            cli.log("No commands run yet.", "info")
+            return
+        cli.log(f"  {'ID':>4}  {'STATUS':<10} {'ELAPSED':>8}  {'TOOL':<12} {'NODE':<12} COMMAND", "info")
+        for job in jobs:
+            cmd = job.cmd if len(job.cmd) <= 60 else job.cmd[:57] + "..."
+            cli.log(escape(f"  {job.id:>4}  {job.status:<10} {job.elapsed:>7.1f}s  {job.tool or '-':<12} "
+                           f"{job.node or 'local':<12} {cmd}"))
+
+    def _handle_job(self, action, args):
+        """kill/tail/pause/resume one job by id ('kill all' kills every running command)."""
+        parts = args.split()
+        jobs = get_executor().jobs
+        if action == "kill" and parts == ["all"]:
+            cli.log(f"Killed {jobs.kill_all()} command(s).", "warning")
+            return
+        job = jobs.get(parts[0]) if parts else None
+        if job is None:
+            usage = {"tail": "tail <id> [lines]", "kill": "kill <id> | kill all"}.get(action, f"{action} <id>")
+            cli.log(escape(f"No such job. Usage: {usage} (see 'jobs')"), "warning")
+            return
+        if action == "tail":
+            try:
+                count = int(parts[1]) if len(parts) > 1 else 20
+            except ValueError:
+                cli.log("Line count must be a number.", "warning")
+                return
+            cli.log(escape(f"#{job.id} {job.status} {job.elapsed:.1f}s: {job.cmd}"), "info")
+            for stream, text in job.tail(count):
+                style = "red" if stream == "stderr" else "dim"
+                console.print(f"[{style}]  {escape(text)}[/]", highlight=False)
+            return
+        if getattr(job, action)():
+            cli.log(f"Job #{job.id} ({job.tool or 'sh'}): {job.status}.", "warning" if action == "kill" else "info")
+        else:
+            cli.log(f"Job #{job.id} is {job.status}; cannot {action} it.", "warning")
+
+    def _open_snapshot(self, path, live=False):
+        try:
+            snapshot = self.supervisor.state.open_snapshot(path)
+        except (OSError, ValueError) as e:
+            cli.log(escape(f"Cannot open snapshot: {e}"), "error")
+            return
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.snapshot = snapshot
+        self.snapshot_live = live
+        nodes, edges = snapshot.counts()
+        cli.log(escape(f"Opened {path}: {nodes} nodes, {edges} edges"), "info")
+
+    def _show_graph_page(self, kind, page):
+        size = self.GRAPH_PAGE_SIZE
+        total = self.snapshot.node_count if kind == "nodes" else self.snapshot.edge_count
+        pages = max(1, -(-total // size))
+        start = (page - 1) * size
+        if kind == "nodes":
+            lines = [format_node(n['id'], n['type']) for n in self.snapshot.nodes(start, size)]
+        else:
+            lines = [format_edge(e['source'], e['target'], e['action'], e['result'])
+                     for e in self.snapshot.edges(start, size)]
+        cli.log(f"{kind.capitalize()} page {page}/{pages} ({total} total)", "info")
+        for line in lines:
+            console.print(f"  {escape(line)}")
+
     def _handle_config(self, args):
         """Handle configuration commands."""
         parts = args.split()
@@ -211,6 +419,16 @@ class MASTerminal:
         cli.log("Commands:", "info")
         cli.log("  (Just type)     : Chat with Sting or give instructions")
         cli.log("  graph           : View attack graph")
+        cli.log("  graph open <f>  : Open a binary graph snapshot (attack_graph.sgb)")
+        cli.log("  graph nodes|edges [page] : Page through the snapshot")
+        cli.log("  graph find <id> : Look up a node in the snapshot")
+        cli.log("  live [on|off]   : Stream tool output to the console as it runs")
+        cli.log("  cache [clear [tool]] : Command result cache hits, or drop cached results")
+        cli.log("  usage           : CPU, memory, time and output of commands per tool/agent")
+        cli.log("  jobs [all]      : Running and recent commands with status and elapsed time")
+        cli.log("  tail <id> [n]   : Last n output lines of a command")
+        cli.log("  kill <id>|all   : Kill a command; the mission continues with its partial output")
+        cli.log("  pause|resume <id> : Stop or continue a running command")
         cli.log("  memory          : View agent memory stats")
         cli.log("  clear           : Clear screen")
         cli.log("  exit            : Quit")
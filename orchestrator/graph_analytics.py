@@ -0,0 +1,265 @@
+import heapq
+import random
+from array import array
+from collections import deque
+
+# Traversal cost of an edge by its recorded result: confirmed steps are cheap,
+# failed attempts are possible but expensive to retry.
+RESULT_COSTS = {
+    "success": 1.0,
+    "open": 1.5,
+    "found": 1.5,
+    "unknown": 3.0,
+    "failed": 10.0,
+}
+DEFAULT_COST = 3.0
+
+# Bookkeeping edges (supervisor -> agent delegations) are not attack steps
+IGNORED_SOURCES = frozenset({"supervisor"})
+
+# Node types worth reaching when no explicit target is given
+HIGH_VALUE_TYPES = ("credential", "vulnerability", "vuln", "share")
+
+class AttackGraphAnalytics:
+    """Path, reachability and centrality analysis over a frozen attack graph.
+
+    Node ids are interned to ints and edges are packed into CSR arrays
+    (``array`` of offsets/targets/costs, forward and reverse), so traversals
+    touch flat machine-typed buffers instead of dicts and scale to graphs
+    with 100k+ edges. Build once per graph version via ``from_state``.
+    """
+
+    BETWEENNESS_SAMPLES = 16          # Max sampled sources for betweenness
+    BETWEENNESS_BUDGET = 400_000      # Edge visits allowed per choke-point query
+
+    def __init__(self, node_ids, node_types, edges):
+        """``edges`` is an iterable of ``(source, target, action, result)``."""
+        self.ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.types = dict(node_types)
+
+        sources, targets, costs = array("l"), array("l"), array("d")
+        for source, target, action, result in edges:
+            if source in IGNORED_SOURCES:
+                continue
+            sources.append(self._intern(source))
+            targets.append(self._intern(target))
+            costs.append(RESULT_COSTS.get(result, DEFAULT_COST))
+
+        n = len(self.ids)
+        self.node_count, self.edge_count = n, len(sources)
+        self.out_offsets, self.out_targets, self.out_costs = self._csr(n, sources, targets, costs)
+        self.in_offsets, self.in_targets, _ = self._csr(n, targets, sources, costs)
+
+    @classmethod
+    def from_state(cls, state):
+        node_ids, node_types = [], {}
+        for node in state.store.iter_nodes():
+            node_ids.append(node['id'])
+            node_types[node['id']] = node['type']
+        edges = ((e['source'], e['target'], e['action'], e['result']) for e in state.store.iter_edges())
+        return cls(node_ids, node_types, edges)
+
+    def _intern(self, node_id):
+        i = self.index.get(node_id)
+        if i is None:
+            i = self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+        return i
+
+    @staticmethod
+    def _csr(n, sources, targets, costs):
+        """Counting sort of edges by source into offset/target/cost arrays."""
+        offsets = array("l", [0]) * (n + 1)
+        for s in sources:
+            offsets[s + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        cursor = array("l", offsets)
+        packed_targets = array("l", [0]) * len(sources)
+        packed_costs = array("d", [0.0]) * len(sources)
+        for s, t, c in zip(sources, targets, costs):
+            pos = cursor[s]
+            packed_targets[pos] = t
+            packed_costs[pos] = c
+            cursor[s] = pos + 1
+        return offsets, packed_targets, packed_costs
+
+    # --- Queries -----------------------------------------------------------
+
+    def reachable(self, foothold):
+        """All node ids reachable from ``foothold`` along edge direction."""
+        start = self.index.get(foothold)
+        if start is None:
+            return set()
+        offsets, targets = self.out_offsets, self.out_targets
+        seen = bytearray(len(self.ids))
+        seen[start] = 1
+        order = [start]
+        for u in order:
+            for v in targets[offsets[u]:offsets[u + 1]]:
+                if not seen[v]:
+                    seen[v] = 1
+                    order.append(v)
+        return {self.ids[i] for i in order}
+
+    def shortest_path(self, source, target):
+        """Fewest-hops path as a list of node ids, or None."""
+        start, goal = self.index.get(source), self.index.get(target)
+        if start is None or goal is None:
+            return None
+        offsets, targets = self.out_offsets, self.out_targets
+        parent = array("l", [-1]) * len(self.ids)
+        parent[start] = start
+        queue = deque([start])
+        while queue:
+            u = queue.popleft()
+            if u == goal:
+                return self._unwind(parent, start, goal)
+            for pos in range(offsets[u], offsets[u + 1]):
+                v = targets[pos]
+                if parent[v] == -1:
+                    parent[v] = u
+                    queue.append(v)
+        return None
+
+    def _dijkstra(self, start, goal=None):
+        """Settled costs and predecessor array from ``start``; stops early once ``goal`` is settled."""
+        offsets, targets, costs = self.out_offsets, self.out_targets, self.out_costs
+        dist = {start: 0.0}
+        settled = {}
+        parent = array("l", [-1]) * len(self.ids)
+        parent[start] = start
+        heap = [(0.0, start)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in settled:
+                continue
+            settled[u] = d
+            if u == goal:
+                break
+            for pos in range(offsets[u], offsets[u + 1]):
+                v, nd = targets[pos], d + costs[pos]
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return settled, parent
+
+    def cheapest_path(self, source, target):
+        """Lowest total cost path as ``(cost, [node ids])``, or None."""
+        start, goal = self.index.get(source), self.index.get(target)
+        if start is None or goal is None:
+            return None
+        settled, parent = self._dijkstra(start, goal)
+        if goal not in settled:
+            return None
+        return settled[goal], self._unwind(parent, start, goal)
+
+    def cheapest_paths(self, source, targets):
+        """``(cost, [node ids])`` to each reachable target in ``targets``, from one single-source search."""
+        start = self.index.get(source)
+        if start is None:
+            return []
+        settled, parent = self._dijkstra(start)
+        goals = {self.index[t] for t in targets if t in self.index}
+        return [(settled[g], self._unwind(parent, start, g)) for g in goals if g in settled]
+
+    def _unwind(self, parent, start, goal):
+        path = [goal]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        return [self.ids[i] for i in reversed(path)]
+
+    def components(self):
+        """Weakly connected components as lists of node ids, largest first."""
+        n = len(self.ids)
+        out_offsets, out_targets = self.out_offsets, self.out_targets
+        in_offsets, in_targets = self.in_offsets, self.in_targets
+        seen = bytearray(n)
+        groups = []
+        for start in range(n):
+            if seen[start]:
+                continue
+            seen[start] = 1
+            members = [start]
+            for u in members:  # grows while iterating: BFS without a deque
+                for offsets, targets in ((out_offsets, out_targets), (in_offsets, in_targets)):
+                    for v in targets[offsets[u]:offsets[u + 1]]:
+                        if not seen[v]:
+                            seen[v] = 1
+                            members.append(v)
+            groups.append([self.ids[i] for i in members])
+        return sorted(groups, key=len, reverse=True)
+
+    def choke_points(self, k=5, samples=None, seed=0):
+        """Top-``k`` ``(node id, betweenness)`` by Brandes' algorithm.
+
+        Exact for small graphs; otherwise it estimates from a seeded random
+        sample of sources, scaled to the full graph. The default sample size
+        shrinks with graph size so one query stays within
+        ``BETWEENNESS_BUDGET`` edge visits.
+        """
+        n = len(self.ids)
+        if n == 0:
+            return []
+        if samples is None:
+            per_source = n + self.edge_count
+            samples = max(2, min(self.BETWEENNESS_SAMPLES, self.BETWEENNESS_BUDGET // per_source))
+        sources = range(n) if n <= samples else random.Random(seed).sample(range(n), samples)
+        scale = n / len(sources)
+        out_offsets, out_targets = self.out_offsets, self.out_targets
+        in_offsets, in_targets = self.in_offsets, self.in_targets
+        centrality = [0.0] * n
+        for s in sources:
+            depth = [-1] * n
+            sigma = [0] * n
+            depth[s], sigma[s] = 0, 1
+            order = [s]
+            for u in order:  # BFS in discovery order
+                du, su = depth[u] + 1, sigma[u]
+                for v in out_targets[out_offsets[u]:out_offsets[u + 1]]:
+                    if depth[v] < 0:
+                        depth[v] = du
+                        order.append(v)
+                    if depth[v] == du:
+                        sigma[v] += su
+            # Back-propagate dependencies; predecessors come from the reverse CSR
+            delta = [0.0] * n
+            for w in reversed(order):
+                dw = depth[w] - 1
+                coeff = (1 + delta[w]) / sigma[w]
+                for u in in_targets[in_offsets[w]:in_offsets[w + 1]]:
+                    if depth[u] == dw:
+                        delta[u] += sigma[u] * coeff
+                if w != s:
+                    centrality[w] += delta[w] * scale
+        ranked = heapq.nlargest(k, range(n), key=centrality.__getitem__)
+        return [(self.ids[i], centrality[i]) for i in ranked if centrality[i] > 0]
+
+    # --- Prompt / report facts ---------------------------------------------
+
+    def facts(self, foothold=None, targets=None, k=3):
+        """Precomputed findings as short sentences for prompts and reports."""
+        facts = []
+        if not self.edge_count:
+            return facts
+
+        if foothold in self.index:
+            reach = self.reachable(foothold)
+            hosts = [i for i in reach if self.types.get(i) == "host" and i != foothold]
+            facts.append(f"From foothold {foothold}: {len(reach) - 1} nodes reachable, including {len(hosts)} hosts.")
+            if targets is None:
+                targets = [i for i in reach if self.types.get(i) in HIGH_VALUE_TYPES]
+            paths = [found for found in self.cheapest_paths(foothold, targets or []) if len(found[1]) > 1]
+            for cost, path in sorted(paths)[:k]:
+                facts.append(f"Cheapest path to {path[-1]} (cost {cost:.1f}, {len(path) - 1} steps): {' -> '.join(path)}")
+
+        chokes = self.choke_points(k)
+        if chokes:
+            facts.append("Choke points: " + ", ".join(f"{node_id} ({score:.1f})" for node_id, score in chokes))
+
+        groups = self.components()
+        if len(groups) > 1:
+            facts.append(f"{len(groups)} disconnected clusters; largest has {len(groups[0])} nodes.")
+        return facts
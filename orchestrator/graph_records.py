@@ -0,0 +1,109 @@
+import sys
+import time
+from datetime import datetime
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+def _epoch(timestamp):
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(timestamp).timestamp()
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch).isoformat()
+
+def json_default(obj):
+    """``json.dump`` hook: records become plain dicts only at the JSON boundary."""
+    to_dict = getattr(obj, "to_dict", None)
+    return to_dict() if to_dict else str(obj)
+
+class NodeRecord:
+    """Compact attack-graph node.
+
+    ``__slots__`` instead of a per-node dict, interned id/type strings shared
+    with every edge that references them, a float epoch timestamp instead of
+    an ISO string and no data dict at all for nodes without data. Item access
+    (``node['id']``, ``node['timestamp']``) keeps the old dict interface.
+    """
+
+    __slots__ = ("id", "type", "data", "ts")
+    FIELDS = ("id", "type", "data", "timestamp")
+
+    def __init__(self, node_id, node_type, data=None, timestamp=None):
+        self.id = _intern(node_id)
+        self.type = _intern(node_type)
+        self.data = data or None
+        self.ts = _epoch(timestamp)
+
+    def __getitem__(self, key):
+        if key == "id":
+            return self.id
+        if key == "type":
+            return self.type
+        if key == "data":
+            return self.data if self.data is not None else {}
+        if key == "timestamp":
+            return _iso(self.ts)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        return {"id": self.id, "type": self.type, "data": self["data"], "timestamp": _iso(self.ts)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["id"], d["type"], d.get("data"), d.get("timestamp"))
+
+    def __repr__(self):
+        return f"NodeRecord({self.to_dict()!r})"
+
+class EdgeRecord:
+    """Compact attack-graph edge; see ``NodeRecord``."""
+
+    __slots__ = ("source", "target", "action", "result", "ts")
+    FIELDS = ("source", "target", "action", "result", "timestamp")
+
+    def __init__(self, source, target, action, result="unknown", timestamp=None):
+        self.source = _intern(source)
+        self.target = _intern(target)
+        self.action = _intern(action)
+        self.result = _intern(result)
+        self.ts = _epoch(timestamp)
+
+    def __getitem__(self, key):
+        if key == "timestamp":
+            return _iso(self.ts)
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return self.FIELDS
+
+    def to_dict(self):
+        return {"source": self.source, "target": self.target, "action": self.action,
+                "result": self.result, "timestamp": _iso(self.ts)}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["source"], d["target"], d["action"], d.get("result", "unknown"), d.get("timestamp"))
+
+    def __repr__(self):
+        return f"EdgeRecord({self.to_dict()!r})"
@@ -0,0 +1,225 @@
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from orchestrator.graph_records import EdgeRecord, NodeRecord, _epoch, json_default
+
+# Binary attack-graph snapshot (``attack_graph.sgb``), little-endian:
+#
+#   header    MAGIC, version, section offsets and counts (HEADER)
+#   nodes     fixed-width NODE records: id, type (string indexes), ts, data slice
+#   edges     fixed-width EDGE records: source, target, action, result, ts
+#   id index  u32 node positions sorted by the UTF-8 bytes of the node id
+#   strings   (string_count + 1) u64 offsets into the blob, then the UTF-8 blob
+#   data      JSON blobs of node data, referenced by (offset into section, length)
+#   meta      JSON: memory
+#
+# Fixed-width records make node i / edge i a single offset computation, so a
+# reader can jump anywhere without scanning what comes before it. Readers find
+# every section through the header, so the writer can stream records straight
+# to disk and fill the header in last.
+MAGIC = b"SBGRAPH\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQQQQQQ")
+NODE = struct.Struct("<IIdQI")
+EDGE = struct.Struct("<IIIId")
+OFFSET = struct.Struct("<Q")
+POSITION = struct.Struct("<I")
+CHUNK = 65536  # Offsets/positions packed per write
+
+def _write_packed(f, code, values):
+    for start in range(0, len(values), CHUNK):
+        chunk = values[start:start + CHUNK]
+        f.write(struct.pack(f"<{len(chunk)}{code}", *chunk))
+
+def write_snapshot(path, nodes, edges, memory=None):
+    """Write ``nodes``/``edges`` (records or dicts) as a binary snapshot.
+
+    Records go to disk as they are read; only the string table and one id
+    index per node stay in memory. Node data is spooled to a temporary file
+    and copied in after the string table. The file is written next to
+    ``path`` and moved into place atomically. Returns ``(node count, edge count)``.
+    """
+    table = {}  # string -> index; dict order is the string table order
+
+    def intern(value):
+        return table.setdefault(value, len(table))
+
+    ids = array("I")
+    edge_count = 0
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f, tempfile.TemporaryFile(dir=os.path.dirname(tmp_path) or ".") as data:
+        f.seek(HEADER.size)
+        nodes_off = f.tell()
+        for node in nodes:
+            if isinstance(node, NodeRecord):
+                node_id, node_type, node_data, ts = node.id, node.type, node.data, node.ts
+            else:
+                node_id, node_type, node_data, ts = (node["id"], node["type"], node["data"],
+                                                     _epoch(node.get("timestamp")))
+            blob = json.dumps(node_data, default=json_default).encode() if node_data else b""
+            ids.append(intern(node_id))
+            f.write(NODE.pack(ids[-1], intern(node_type), ts, data.tell(), len(blob)))
+            data.write(blob)
+        edges_off = f.tell()
+        for edge in edges:
+            if isinstance(edge, EdgeRecord):
+                fields, ts = (edge.source, edge.target, edge.action, edge.result), edge.ts
+            else:
+                fields = (edge["source"], edge["target"], edge["action"], edge["result"])
+                ts = _epoch(edge.get("timestamp"))
+            f.write(EDGE.pack(*map(intern, fields), ts))
+            edge_count += 1
+
+        # str order is code point order, which is also UTF-8 byte order
+        strings = list(table)
+        index_off = f.tell()
+        _write_packed(f, "I", sorted(range(len(ids)), key=lambda i: strings[ids[i]]))
+
+        strings_off = f.tell()
+        position = 0
+        offsets = [0]
+        for s in strings:
+            position += len(s.encode())
+            offsets.append(position)
+        _write_packed(f, "Q", offsets)
+        del offsets
+        for start in range(0, len(strings), CHUNK):
+            f.write("".join(strings[start:start + CHUNK]).encode())
+
+        data_off = f.tell()
+        data.seek(0)
+        shutil.copyfileobj(data, f)
+        meta_off = f.tell()
+        meta = json.dumps({"memory": memory or {}}, default=json_default).encode()
+        f.write(meta)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(ids), edge_count, len(strings),
+                            strings_off, nodes_off, edges_off, index_off, data_off, meta_off, len(meta)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(ids), edge_count
+
+class GraphSnapshot:
+    """Read-only, memory-mapped view of a binary attack-graph snapshot.
+
+    Opening only maps the file and reads the header; nodes, edges, strings
+    and node data are decoded on access, so the cost of a lookup or a page
+    does not depend on the size of the engagement. Decoded strings are
+    cached and interned, like the live store's records.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a graph snapshot: {path}")
+        if len(self._mm) < HEADER.size:
+            self.close()
+            raise ValueError(f"Not a graph snapshot: {path}")
+        (magic, version, _, self.node_count, self.edge_count, self.string_count,
+         self._strings_off, self._nodes_off, self._edges_off, self._index_off,
+         self._data_off, self._meta_off, self._meta_len) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported graph snapshot: {path}")
+        self._blob_off = self._strings_off + OFFSET.size * (self.string_count + 1)
+        self._strings = {}
+        self._meta = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.node_count
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    # --- Decoding ----------------------------------------------------------
+
+    def _raw_string(self, i):
+        start, end = struct.unpack_from("<QQ", self._mm, self._strings_off + OFFSET.size * i)
+        return self._mm[self._blob_off + start:self._blob_off + end]
+
+    def _string(self, i):
+        s = self._strings.get(i)
+        if s is None:
+            s = self._strings[i] = self._raw_string(i).decode()
+        return s
+
+    def node(self, i):
+        """The ``i``-th node in insertion order as a ``NodeRecord``."""
+        if not 0 <= i < self.node_count:
+            raise IndexError(i)
+        id_i, type_i, ts, data_off, data_len = NODE.unpack_from(self._mm, self._nodes_off + NODE.size * i)
+        data_off += self._data_off
+        data = json.loads(self._mm[data_off:data_off + data_len]) if data_len else None
+        return NodeRecord(self._string(id_i), self._string(type_i), data, ts)
+
+    def edge(self, i):
+        """The ``i``-th edge in insertion order as an ``EdgeRecord``."""
+        if not 0 <= i < self.edge_count:
+            raise IndexError(i)
+        source, target, action, result, ts = EDGE.unpack_from(self._mm, self._edges_off + EDGE.size * i)
+        return EdgeRecord(self._string(source), self._string(target),
+                          self._string(action), self._string(result), ts)
+
+    def nodes(self, start=0, count=None):
+        stop = self.node_count if count is None else min(self.node_count, start + count)
+        return [self.node(i) for i in range(max(0, start), stop)]
+
+    def edges(self, start=0, count=None):
+        stop = self.edge_count if count is None else min(self.edge_count, start + count)
+        return [self.edge(i) for i in range(max(0, start), stop)]
+
+    def iter_nodes(self):
+        return (self.node(i) for i in range(self.node_count))
+
+    def iter_edges(self):
+        return (self.edge(i) for i in range(self.edge_count))
+
+    def get_node(self, node_id):
+        """Binary search of the id index; compares raw bytes, decodes one node."""
+        key = node_id.encode()
+        lo, hi = 0, self.node_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = POSITION.unpack_from(self._mm, self._index_off + POSITION.size * mid)[0]
+            id_i = NODE.unpack_from(self._mm, self._nodes_off + NODE.size * pos)[0]
+            raw = self._raw_string(id_i)
+            if raw == key:
+                return self.node(pos)
+            if raw < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def has_node(self, node_id):
+        return self.get_node(node_id) is not None
+
+    def counts(self):
+        return self.node_count, self.edge_count
+
+    def _load_meta(self):
+        if self._meta is None:
+            self._meta = json.loads(self._mm[self._meta_off:self._meta_off + self._meta_len])
+        return self._meta
+
+    @property
+    def memory(self):
+        return self._load_meta()["memory"]
@@ -1,10 +1,53 @@
 import re
 import ipaddress
+import threading
+from functools import lru_cache
+from config.settings import config
+from orchestrator.scope import IN_SCOPE, PARTIAL, ScopeEngine, load_cidrs
+from orchestrator.targets import extract_targets, is_address_like
+from core.event_loop import run_sync
+from core.resolver import ResolverError, get_resolver
+
+def _fold_case(pattern):
+    """Lower-case a regex's literals, leaving escapes like ``\\S`` or ``\\W`` intact.
+
+    Searching a lower-cased command with a folded pattern is equivalent to
+    ``re.IGNORECASE`` for shell commands, but keeps the regex engine's fast
+    prefix scan, which ``IGNORECASE`` disables.
+    """
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+        else:
+            out.append(pattern[i].lower())
+            i += 1
+    return "".join(out)
+
+def _is_hostname(target):
+    # Names end in a letter (the TLD); IPv4, CIDRs, hex addresses and anything with ":" do not
+    return ":" not in target and target.rstrip(".")[-1:].isalpha() and not is_address_like(target)
 
 class Guardrails:
-    """Safety layer: Deterministic filters for prohibited actions and targets."""
-    
-    def __init__(self):
+    """Safety layer: Deterministic filters for prohibited actions and targets.
+
+    The command patterns are compiled once into a single case-folded
+    alternation, so a safe command costs one regex scan; the per-pattern
+    regexes are only consulted to name the culprit once something matched.
+    Target checks go through a ``ScopeEngine`` built from ``allowed_ranges``
+    (the engagement scope; empty means everything) and ``prohibited_ips``.
+    Both are rebuilt automatically when entries are added to or removed
+    from the lists; call ``reload()`` after replacing entries in place.
+    Decisions are memoised in per-instance LRU caches, since fan-out runs
+    repeat the same commands and targets many times. With a ``resolver``,
+    hostnames are checked through the addresses they resolve to; those
+    lookups are cached by the resolver for their DNS TTL, not here.
+    """
+
+    DECISION_CACHE_SIZE = 4096
+
+    def __init__(self, allow_file=None, deny_file=None, resolver=None):
         # Prohibited command patterns (regex)
         self.blacklisted_commands = [
             r"rm\s+-rf\s+/",
@@ -25,33 +68,183 @@ class Guardrails:
             "127.0.0.0/8",   # Localhost (optional, depending on use case)
             "169.254.0.0/16" # Link-local
         ]
+        if deny_file:
+            self.prohibited_ips += load_cidrs(deny_file)
+
+        # Engagement scope from the rules of engagement; empty means unrestricted
+        self.allowed_ranges = load_cidrs(allow_file) if allow_file else []
+
+        self.resolver = resolver
+        self._rules = None
+        self._command_decision = lru_cache(maxsize=self.DECISION_CACHE_SIZE)(self._check_command)
+        self._target_decision = lru_cache(maxsize=self.DECISION_CACHE_SIZE)(self._check_target)
+        self._compile()
+
+    def _rules_key(self):
+        return (len(self.blacklisted_commands), len(self.prohibited_ips), len(self.allowed_ranges))
+
+    def _compile(self):
+        """Build the combined matcher and scope engine from the rule lists."""
+        self._rules = self._rules_key()
+        self._command_matcher = re.compile(
+            "|".join(f"(?:{_fold_case(pattern)})" for pattern in self.blacklisted_commands)
+        ) if self.blacklisted_commands else None
+        self._command_patterns = [(re.compile(pattern, re.IGNORECASE), pattern)
+                                  for pattern in self.blacklisted_commands]
+        self.scope = ScopeEngine(allow=self.allowed_ranges, deny=self.prohibited_ips)
+        self._command_decision.cache_clear()
+        self._target_decision.cache_clear()
+
+    def _refresh(self):
+        if self._rules != self._rules_key():
+            self._compile()
+
+    def reload(self):
+        """Recompile after rule lists were edited in place."""
+        self._compile()
+
+    def cache_info(self):
+        """LRU statistics of the command and target decision caches."""
+        return {"command": self._command_decision.cache_info(), "target": self._target_decision.cache_info()}
 
     def is_command_safe(self, command):
         """Check if a shell command matches any blacklisted patterns."""
-        for pattern in self.blacklisted_commands:
-            if re.search(pattern, command, re.IGNORECASE):
+        self._refresh()
+        return self._command_decision(command)
+
+    def _check_command(self, command):
+        if self._command_matcher is None or not self._command_matcher.search(command.lower()):
+            return True, "Safe"
+        for regex, pattern in self._command_patterns:
+            if regex.search(command):
                 return False, f"Command contains blacklisted pattern: {pattern}"
         return True, "Safe"
 
     def is_target_safe(self, target):
         """Check if the target IP/Domain is in a prohibited range."""
+        self._refresh()
+        if self.resolver is not None and _is_hostname(target):
+            return self._check_hostname(target)
+        return self._target_decision(target)
+
+    def _check_hostname(self, target):
+        """Every address the name resolves to must be safe."""
+        if target.lower() == "localhost":
+            return self._target_decision(target)
+        try:
+            addresses = self.resolver.addresses_sync(target)
+        except (ResolverError, ValueError) as e:
+            addresses, error = [], e
+        else:
+            error = None
+        if not addresses:
+            # Nothing to reach; only a restricted scope needs proof the name is inside it
+            if self.scope.allow_count:
+                detail = f" ({error})" if error else ""
+                return False, f"Target {target} could not be resolved to an in-scope address{detail}"
+            return True, "Safe"
+        for address in addresses:
+            safe, reason = self._target_decision(address)
+            if not safe:
+                return False, f"Target {target} resolves to {address}: {reason}"
+        return True, "Safe"
+
+    def _check_target(self, target):
         try:
             # Handle IP addresses
-            ip = ipaddress.ip_address(target)
-            for network in self.prohibited_ips:
-                if ip in ipaddress.ip_network(network):
-                    return False, f"Target {target} is in prohibited range {network}"
+            allowed, rule = self.scope.match(ipaddress.ip_address(target))
+            if not allowed:
+                if rule:
+                    return False, f"Target {target} is in prohibited range {rule}"
+                return False, f"Target {target} is outside the engagement scope"
         except ValueError:
+            if "/" in target:
+                return self._check_range(target)
+            if is_address_like(target):
+                # Hex/integer forms, malformed quads and bad ranges: no telling where they point
+                return False, f"Target {target} is not a valid address"
             # Handle Hostnames/Domains (Simple check for now, can be expanded with DNS)
             if target.lower() in ["localhost", "127.0.0.1"]:
                  return False, "Target is localhost."
         
         return True, "Safe"
 
+    def _check_range(self, target):
+        """Decide a whole CIDR at once: every address must be in scope."""
+        try:
+            decision = self.scope.classify(target)
+        except ValueError:
+            return False, f"Invalid target range: {target}"
+        if decision == IN_SCOPE:
+            return True, "Safe"
+        if decision == PARTIAL:
+            return False, f"Range {target} is only partially in scope"
+        return False, f"Range {target} is out of scope"
+
+    def check_targets(self, targets):
+        """Validate many targets in one pass; returns ``(safe, reason)`` for the batch."""
+        self._refresh()
+        targets = list(dict.fromkeys(targets))
+        self._prefetch(targets)
+        return self._combine(map(self.is_target_safe, targets))
+
+    def _prefetch(self, targets):
+        """Resolve all hostnames among ``targets`` concurrently into the resolver cache."""
+        if self.resolver is None:
+            return
+        names = [t for t in targets if _is_hostname(t) and t.lower() != "localhost"
+                 and self.resolver.cached_addresses(t) is None]
+        if len(names) > 1:
+            run_sync(self.resolver.addresses_many(names))
+
+    def _combine(self, decisions):
+        blocked = [reason for safe, reason in decisions if not safe]
+        if not blocked:
+            return True, "Safe"
+        more = f" (+{len(blocked) - 1} more)" if len(blocked) > 1 else ""
+        return False, blocked[0] + more
+
+    def validate_command(self, command):
+        """Blacklisted patterns, then every host/CIDR/URL the command names against scope."""
+        safe, reason = self.is_command_safe(command)
+        if not safe:
+            return safe, reason
+        return self.check_targets(extract_targets(command))
+
+    def validate_commands(self, commands):
+        """``validate_command`` for a batch; each distinct target is decided once."""
+        self._refresh()
+        commands = list(commands)
+        targets = {command: extract_targets(command) for command in commands}
+        self._prefetch(list(dict.fromkeys(t for command_targets in targets.values() for t in command_targets)))
+        verdicts = {target: self.is_target_safe(target)
+                    for command_targets in targets.values() for target in command_targets}
+        results = []
+        for command in commands:
+            safe, reason = self.is_command_safe(command)
+            if safe:
+                safe, reason = self._combine(verdicts[t] for t in targets[command])
+            results.append((safe, reason))
+        return results
+
     def filter_action(self, action_type, payload):
         """Higher-level filter for various action types."""
         if action_type == "terminal":
-            return self.is_command_safe(payload)
+            return self.validate_command(payload)
         if action_type in ["scan", "exploit", "target"]:
             return self.is_target_safe(payload)
         return True, "Safe"
+
+_guardrails = None
+_guardrails_lock = threading.Lock()
+
+def get_guardrails():
+    """The process-wide guardrails configured from settings (SCOPE_ALLOW_FILE, SCOPE_DENY_FILE,
+    DNS_RESOLVE_TARGETS): scope files are parsed once and decision caches are shared."""
+    global _guardrails
+    with _guardrails_lock:
+        if _guardrails is None:
+            _guardrails = Guardrails(allow_file=config.SCOPE_ALLOW_FILE or None,
+                                     deny_file=config.SCOPE_DENY_FILE or None,
+                                     resolver=get_resolver() if config.DNS_RESOLVE_TARGETS else None)
+        return _guardrails
@@ -0,0 +1,213 @@
+from urllib.parse import urlparse
+from tools_mcp.tool_wrappers import ToolWrappers
+from orchestrator.persistence import WriteBehindWorker
+from orchestrator.state_manager import service_id
+from core.executor import command_stages
+from core.streaming import OutputConsumer
+
+# Executable name -> canonical tool name understood by ToolWrappers
+TOOL_ALIASES = {"enum4linux-ng": "enum4linux", "enum4linux.pl": "enum4linux"}
+
+def detect_tool(cmd):
+    """Return ``(tool, argv)`` for the tool a shell command runs, or ``(None, [])``."""
+    stages = command_stages(cmd)
+    if not stages:
+        return None, []
+    # Only the first stage of a pipeline produces the output we are given
+    name, argv = stages[0]
+    return TOOL_ALIASES.get(name, name), argv
+
+def _positional(argv):
+    """Last argument that is not an option: the target for most tools."""
+    for arg in reversed(argv[1:]):
+        if not arg.startswith("-"):
+            return arg
+    return None
+
+def _option(argv, *names):
+    for i, arg in enumerate(argv[:-1]):
+        if arg in names:
+            return argv[i + 1]
+    return None
+
+def _nmap(parsed, argv):
+    nodes, edges = [], []
+    hosts = dict.fromkeys(h for h in parsed["hosts"] if h)
+    os_info = parsed.get("os_detection")
+    for host in hosts:
+        # nmap prints OS details for the single host it fingerprinted
+        data = {"os": os_info} if os_info and len(hosts) == 1 else {}
+        nodes.append((host, "host", data))
+    for entry in parsed["open_ports"]:
+        host = entry.get("host")
+        port, _, proto = entry["port"].partition("/")
+        if not host or not port.isdigit():
+            continue
+        service = service_id(host, port, proto or "tcp")
+        nodes.append((service, "service", {
+            "host": host, "port": int(port), "proto": proto or "tcp", "state": entry["state"],
+            "name": entry["service"], "version": entry["version"],
+        }))
+        edges.append((host, service, "nmap", entry["state"]))
+    return nodes, edges
+
+def _gobuster(parsed, argv):
+    # gobuster takes -u/--url; dirb takes the URL as its first argument
+    url = _option(argv, "-u", "--url") or next((arg for arg in argv[1:] if "://" in arg), None)
+    host = urlparse(url).hostname if url and "://" in url else None
+    if not host:
+        return [], []
+    base = url.rstrip("/")
+    nodes, edges = [(host, "host", {})], []
+    for entry in parsed["directories"] + parsed["files"]:
+        path_id = base + entry["path"]
+        nodes.append((path_id, "path", {"host": host, "url": path_id, "status": int(entry["status"])}))
+        edges.append((host, path_id, "dir_enum", "found"))
+    return nodes, edges
+
+def _enum4linux(parsed, argv):
+    host = _positional(argv)
+    if not host:
+        return [], []
+    data = {"domain": parsed["domain"]} if parsed.get("domain") else {}
+    nodes, edges = [(host, "host", data)], []
+    # The parser keeps whatever followed the leading slashes: "public" or "10.0.0.5\\public"
+    shares = {share.replace("\\", "/").rstrip("/").rsplit("/", 1)[-1] for share in parsed["shares"]}
+    for share in sorted(shares):
+        share_id = f"//{host}/{share}"
+        nodes.append((share_id, "share", {"host": host, "name": share}))
+        edges.append((host, share_id, "smb_enum", "found"))
+    for user in sorted(parsed["users"]):
+        user_id = f"{user}@{host}"
+        nodes.append((user_id, "user", {"host": host, "username": user}))
+        edges.append((host, user_id, "user_enum", "found"))
+    return nodes, edges
+
+def _hydra(parsed, argv):
+    nodes, edges = [], []
+    service = parsed.get("service") or "login"
+    for cred in parsed["credentials"]:
+        host = cred["host"]
+        # Distinct from the "user@host" user nodes that enum4linux produces
+        cred_id = f"{service}://{cred['username']}@{host}"
+        nodes.append((host, "host", {}))
+        nodes.append((cred_id, "credential", {
+            "host": host, "username": cred["username"], "password": cred["password"],
+            "service": service,
+        }))
+        edges.append((host, cred_id, "bruteforce", "success"))
+    return nodes, edges
+
+# Tool -> converter from ToolWrappers output to (nodes, edges) for StateManager.bulk_add
+INGESTERS = {
+    "nmap": _nmap,
+    "gobuster": _gobuster,
+    "dirb": _gobuster,
+    "enum4linux": _enum4linux,
+    "hydra": _hydra,
+}
+
+# How findings are delimited in a tool's live output, so they can be ingested
+# before the tool exits. "block": a line containing the marker starts a new
+# record (nmap host reports). "line": each line containing the marker is a
+# record, parsed together with the banner lines before the first record
+# (hydra's banner names the service). Other tools are ingested when they exit.
+STREAM_RECORDS = {
+    "nmap": ("block", "Nmap scan report for"),
+    "gobuster": ("line", "(Status:"),
+    "dirb": ("line", "(Status:"),
+    "hydra": ("line", "login:"),
+}
+MAX_BANNER_LINES = 50
+MAX_BLOCK_LINES = 5000
+
+def _apply_records(batch, fsync=False):
+    for ingester, lines in batch:
+        try:
+            ingester._apply(lines)
+        except Exception as e:
+            print(f"[State] Could not ingest {ingester.tool} output: {e}")
+
+# Parsing and state writes happen here, never on the executor's event loop thread
+_records = WriteBehindWorker(_apply_records, durability="none", interval=0.05, batch_size=64, name="stingbot-ingest")
+
+class StreamIngester(OutputConsumer):
+    """Ingests a command's findings record by record while it is still running.
+
+    Attach it as an executor output consumer for ``cmd``; each completed
+    record is parsed with the matching ToolWrappers parser and added to
+    ``state`` straight away, the rest when the command finishes. The hooks
+    only split records off the output: parsing and ``bulk_add`` (which
+    takes the state lock and may write to disk) run on a background
+    thread, so other commands' output is never held up. ``drain()`` waits
+    until everything queued so far is in the state.
+    """
+
+    def __init__(self, state, cmd):
+        self.state = state
+        self.tool, self.argv = detect_tool(cmd)
+        self.ingester = INGESTERS.get(self.tool)
+        self.mode, self.marker = STREAM_RECORDS.get(self.tool, (None, None))
+        self.banner, self.block = [], []
+        self.seen_record = False
+        self.added = self.edges = 0
+
+    def line(self, run_id, stream, text):
+        if stream != "stdout" or self.ingester is None:
+            return
+        if self.mode == "line":
+            if self.marker in text:
+                self.seen_record = True
+                self._ingest(self.banner + [text])
+            elif not self.seen_record and len(self.banner) < MAX_BANNER_LINES:
+                self.banner.append(text)
+            return
+        if self.mode == "block" and self.marker in text and self.seen_record:
+            self._ingest(self.block)
+            self.block = []
+        if self.mode == "block" and self.marker in text:
+            self.seen_record = True
+        self.block.append(text)
+        if len(self.block) >= MAX_BLOCK_LINES:
+            # Bound memory on huge outputs; a block keeps its header line for context
+            self._ingest(self.block)
+            self.block = self.block[:1] if self.mode == "block" and self.seen_record else []
+
+    def finish(self, run_id=None, result=None):
+        if self.block and self.ingester is not None:
+            self._ingest(self.block)
+            self.block = []
+
+    def _ingest(self, lines):
+        _records.submit((self, lines))
+
+    def drain(self):
+        """Block until every record queued so far has been added to the state."""
+        _records.flush()
+
+    def _apply(self, lines):
+        parsed = ToolWrappers.wrap(self.tool, "\n".join(lines))
+        if "error" in parsed:
+            print(f"[State] Could not parse {self.tool} output: {parsed['error']}")
+            return
+        nodes, edges = self.ingester(parsed, self.argv)
+        if nodes or edges:
+            self.added += self.state.bulk_add(nodes, edges)
+            self.edges += len(edges)
+
+def ingest_command(state, cmd, stdout):
+    """Parse ``stdout`` of ``cmd`` with the matching ToolWrappers parser and
+    add the findings to ``state``.
+
+    ``stdout`` may also be a spilled-output ``Artifact``, which is read
+    line by line. Returns ``(tool, new node count, edge count)``; ``tool``
+    is None when no parser applies, in which case nothing is written.
+    """
+    ingester = StreamIngester(state, cmd)
+    if ingester.ingester is None or not stdout:
+        return None, 0, 0
+    for text in stdout.lines() if hasattr(stdout, "lines") else stdout.split("\n"):
+        ingester.line(None, "stdout", text)
+    ingester.finish()
+    ingester.drain()
+    return ingester.tool, ingester.added, ingester.edges
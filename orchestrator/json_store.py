@@ -0,0 +1,327 @@
+import json
+import os
+from array import array
+from datetime import datetime
+from orchestrator.graph_records import EdgeRecord, NodeRecord, json_default
+from orchestrator.persistence import WriteBehindWorker
+
+class JsonGraphStore:
+    """In-memory indexed attack graph persisted as a JSON snapshot plus journal.
+
+    Persistence is split into a compacted snapshot (``attack_graph.json``) and an
+    append-only journal of mutations (``attack_graph.jsonl``). Every mutation costs
+    one queued record; a ``WriteBehindWorker`` appends queued records to disk in
+    batches, and the snapshot is only rewritten by ``checkpoint()``. With
+    durability ``none`` the journal is skipped and only checkpoints persist.
+    Suited to small and medium missions; see ``SQLiteGraphStore`` for large ones.
+
+    Nodes and edges are held as slotted ``NodeRecord``/``EdgeRecord`` objects
+    with adjacency positions in ``array('l')``; they only become dicts when
+    written out as JSON.
+    """
+
+    # Journal size after which the supervisor should compact into a new snapshot
+    CHECKPOINT_EVERY = 5000
+
+    def __init__(self, log_dir, resume=False, durability="batched"):
+        self.graph = {
+            "nodes": [], # NodeRecord: id "ip/domain/user", type "asset/vuln", data {}
+            "edges": [], # EdgeRecord: source, target, action "scan/exploit", result "success/fail"
+            "metadata": {
+                "start_time": datetime.now().isoformat(),
+                "status": "active"
+            }
+        }
+        self.memory = {} # Key-value for quick lookups (e.g., "target_ip": "10.0.0.1")
+
+        # Indexes over self.graph; the lists above stay the source of truth
+        self._nodes_by_id = {}      # node_id -> NodeRecord
+        self._nodes_by_type = {}    # node_type -> [node_id, ...]
+        self._out = {}              # node_id -> array of edge positions
+        self._in = {}               # node_id -> array of edge positions
+
+        self.log_path = os.path.join(log_dir, "attack_graph.json")
+        self.journal_path = os.path.join(log_dir, "attack_graph.jsonl")
+        self._journal = None
+        self._seq = 0            # Sequence number of the last journaled mutation
+        self._journal_len = 0    # Records appended since the last checkpoint
+        self._resumed = False
+        self.gaps = []           # (first, last) sequence numbers missing from the journal at recovery
+        self.durability = durability
+        self._writer = WriteBehindWorker(self._write_batch, durability, name="json-journal")
+        if resume:
+            self.recover()
+
+    def add_node(self, node_id, node_type, data=None):
+        if node_id in self._nodes_by_id:
+            return False
+        node = self._insert_node(node_id, node_type, data)
+        self._append({"op": "node", "node": node})
+        return True
+
+    def add_edge(self, source, target, action, result="unknown"):
+        edge = self._insert_edge(source, target, action, result)
+        self._append({"op": "edge", "edge": edge})
+
+    def bulk_add(self, nodes=(), edges=()):
+        """Insert many nodes/edges as one journal record.
+
+        ``nodes`` are ``(node_id, node_type, data)`` tuples and ``edges`` are
+        ``(source, target, action, result)`` tuples. Duplicate node ids are
+        skipped. Returns the ``(id, type, data)`` tuples actually added.
+        """
+        added_nodes = []
+        for node_id, node_type, data in nodes:
+            if node_id not in self._nodes_by_id:
+                added_nodes.append(self._insert_node(node_id, node_type, data))
+        added_edges = [self._insert_edge(*edge) for edge in edges]
+        if added_nodes or added_edges:
+            self._append({"op": "batch", "nodes": added_nodes, "edges": added_edges})
+        return [(n.id, n.type, n.data) for n in added_nodes]
+
+    def _insert_node(self, node_id, node_type, data=None):
+        node = NodeRecord(node_id, node_type, data)
+        self._index_node(node)
+        return node
+
+    def _index_node(self, node):
+        self.graph['nodes'].append(node)
+        self._nodes_by_id[node.id] = node
+        self._nodes_by_type.setdefault(node.type, []).append(node.id)
+
+    def _insert_edge(self, source, target, action, result="unknown"):
+        edge = EdgeRecord(source, target, action, result)
+        self._index_edge(edge)
+        return edge
+
+    def _index_edge(self, edge):
+        pos = len(self.graph['edges'])
+        self.graph['edges'].append(edge)
+        out = self._out.get(edge.source)
+        if out is None:
+            out = self._out[edge.source] = array("l")
+        out.append(pos)
+        incoming = self._in.get(edge.target)
+        if incoming is None:
+            incoming = self._in[edge.target] = array("l")
+        incoming.append(pos)
+
+    def _reindex(self):
+        """Rebuild records and indexes from freshly loaded snapshot dicts."""
+        nodes, edges = self.graph['nodes'], self.graph['edges']
+        self.graph['nodes'], self.graph['edges'] = [], []
+        self._nodes_by_id, self._nodes_by_type = {}, {}
+        self._out, self._in = {}, {}
+        for node in nodes:
+            if node['id'] not in self._nodes_by_id:
+                self._index_node(NodeRecord.from_dict(node))
+        for edge in edges:
+            self._index_edge(EdgeRecord.from_dict(edge))
+
+    # --- Lookups -----------------------------------------------------------
+
+    def has_node(self, node_id):
+        return node_id in self._nodes_by_id
+
+    def get_node(self, node_id):
+        return self._nodes_by_id.get(node_id)
+
+    def nodes_by_type(self, node_type):
+        return [self._nodes_by_id[i] for i in self._nodes_by_type.get(node_type, [])]
+
+    def edges_from(self, node_id):
+        edges = self.graph['edges']
+        return [edges[i] for i in self._out.get(node_id, [])]
+
+    def edges_to(self, node_id):
+        edges = self.graph['edges']
+        return [edges[i] for i in self._in.get(node_id, [])]
+
+    def neighbors(self, node_id):
+        """Distinct targets reachable over one outgoing edge, in first-seen order."""
+        return list(dict.fromkeys(e['target'] for e in self.edges_from(node_id)))
+
+    def find_nodes(self, node_type=None, **data):
+        """Nodes of ``node_type`` (any type if None) whose data matches ``data``."""
+        candidates = self.nodes_by_type(node_type) if node_type else self.graph['nodes']
+        return [n for n in candidates
+                if all(n['data'].get(k) == v for k, v in data.items())]
+
+    def find_edges(self, source=None, target=None, action=None, result=None):
+        if source is not None:
+            candidates = self.edges_from(source)
+        elif target is not None:
+            candidates = self.edges_to(target)
+        else:
+            candidates = self.graph['edges']
+        return [e for e in candidates
+                if (target is None or e['target'] == target)
+                and (action is None or e['action'] == action)
+                and (result is None or e['result'] == result)]
+
+    def iter_nodes(self):
+        return iter(self.graph['nodes'])
+
+    def iter_edges(self):
+        return iter(self.graph['edges'])
+
+    def counts(self):
+        return len(self.graph['nodes']), len(self.graph['edges'])
+
+    def set_memory(self, key, value):
+        self.memory[key] = value
+        self._append({"op": "memory", "key": key, "value": value})
+
+    def get_memory(self, key, default=None):
+        return self.memory.get(key, default)
+
+    def memory_snapshot(self):
+        return self.memory
+
+    # --- Persistence -------------------------------------------------------
+
+    def _append(self, record):
+        """Queue a single mutation for the journal. O(1), never blocks on I/O."""
+        self._seq += 1
+        if self.durability == "none":
+            return
+        record["seq"] = self._seq
+        # Serialised now: the writer thread must not read objects the caller may still change
+        line = json.dumps(record, default=json_default) + "\n"
+        if self._journal is None:
+            # A snapshot taken here already contains this record
+            self._open_journal()
+        self._writer.submit(line)
+        self._journal_len += 1
+
+    def _open_journal(self):
+        if self._resumed:
+            # Resumed mission: keep extending the existing journal
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            self._journal = open(self.journal_path, "a")
+        else:
+            # Fresh mission: replace whatever a previous run left behind
+            self.checkpoint()
+
+    def _write_batch(self, batch, fsync):
+        """Runs on the writer thread (or a caller draining it); ``batch`` holds journal lines."""
+        if self._journal is None:
+            return
+        if batch:
+            offset = os.fstat(self._journal.fileno()).st_size
+            try:
+                self._journal.write("".join(batch))
+                self._journal.flush()
+            except OSError:
+                # The worker retries the whole batch: do not leave part of it behind
+                self._rewind(offset)
+                raise
+        if fsync:
+            os.fsync(self._journal.fileno())
+
+    def _rewind(self, offset):
+        """Cut the journal back to ``offset`` bytes and reopen it for appending."""
+        try:
+            self._journal.close()
+        except OSError:
+            pass  # Its buffer is what is being discarded
+        try:
+            os.truncate(self.journal_path, offset)
+        finally:
+            self._journal = open(self.journal_path, "a")
+
+    def flush(self):
+        self._writer.flush()
+
+    def sync(self):
+        self._writer.sync()
+
+    def needs_checkpoint(self):
+        """True once the journal has grown enough to be worth compacting."""
+        return self._journal_len >= self.CHECKPOINT_EVERY
+
+    def checkpoint(self):
+        """Write a compacted snapshot atomically and truncate the journal."""
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        with self._writer.exclusive():
+            tmp_path = self.log_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "graph": self.graph,
+                    "memory": self.memory,
+                    "seq": self._seq
+                }, f, indent=4, default=json_default)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.log_path)
+
+            # Records up to self._seq are now in the snapshot; a crash before the
+            # truncate below is harmless because recovery skips them by sequence.
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "w")
+            self._journal_len = 0
+
+    def recover(self):
+        """Rebuild state from the last snapshot plus the journal tail."""
+        self._resumed = True
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r") as f:
+                snapshot = json.load(f)
+            self.graph = snapshot.get("graph", self.graph)
+            self.memory = snapshot.get("memory", {})
+            self._seq = snapshot.get("seq", 0)
+            self._reindex()
+
+        if not os.path.exists(self.journal_path):
+            return
+        good_offset = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash: everything after it is unreliable
+                    break
+                good_offset += len(line)
+                if record.get("seq", 0) <= self._seq:
+                    continue
+                if record["seq"] != self._seq + 1:
+                    # Records that never reached the journal (a write that failed for good)
+                    self.gaps.append((self._seq + 1, record["seq"] - 1))
+                    print(f"[State] Journal is missing records {self._seq + 1}-{record['seq'] - 1}; "
+                          f"state recovered from it may be incomplete")
+                self._apply(record)
+                self._seq = record["seq"]
+                self._journal_len += 1
+        if good_offset < os.path.getsize(self.journal_path):
+            # Drop the torn tail so appends after resume stay parseable
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_offset)
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == "node":
+            self._apply_node(record["node"])
+        elif op == "edge":
+            self._index_edge(EdgeRecord.from_dict(record["edge"]))
+        elif op == "batch":
+            for node in record.get("nodes", []):
+                self._apply_node(node)
+            for edge in record.get("edges", []):
+                self._index_edge(EdgeRecord.from_dict(edge))
+        elif op == "memory":
+            self.memory[record["key"]] = record["value"]
+
+    def _apply_node(self, node):
+        if node['id'] not in self._nodes_by_id:
+            self._index_node(NodeRecord.from_dict(node))
+
+    def close(self):
+        self._writer.close()
+        with self._writer.exclusive():
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
@@ -0,0 +1,133 @@
+import atexit
+import threading
+import weakref
+
+# none:    nothing is forced to disk (the store may skip persistence entirely)
+# batched: a background thread writes batches on a time or size trigger
+# fsync:   batched, plus every sync() (one per supervisor turn) is fsync'ed
+DURABILITY_LEVELS = ("none", "batched", "fsync")
+
+_live_workers = weakref.WeakSet()
+
+class WriteBehindWorker:
+    """Moves state persistence off the hot path.
+
+    ``submit()`` only appends to an in-memory queue. A daemon thread hands
+    queued items to ``flush_fn(batch, fsync)`` once ``batch_size`` items are
+    waiting or ``interval`` seconds have passed since the first one arrived.
+    ``flush()`` drains synchronously from the caller; ``exclusive()`` drains
+    and keeps the worker out while the caller rewrites files. Pending items
+    of every live worker are flushed at interpreter exit.
+
+    A batch whose ``flush_fn`` raises is put back at the head of the queue
+    and retried after ``interval``; until a retry succeeds, ``error`` holds
+    the exception, and ``flush()``/``sync()`` raise if they cannot write it
+    either, so a failing disk is never just a log line.
+    """
+
+    def __init__(self, flush_fn, durability="batched", interval=0.5, batch_size=512, name="state-writer"):
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability level '{durability}'. Choose from: {', '.join(DURABILITY_LEVELS)}")
+        self.durability = durability
+        self.interval = interval
+        self.batch_size = batch_size
+        self.name = name
+        self._flush_fn = flush_fn
+        self._pending = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.RLock()
+        self._thread = None
+        self._closed = False
+        self.batches_written = 0
+        self.items_written = 0
+        self.error = None  # Last flush failure, until a flush succeeds again
+        _live_workers.add(self)
+
+    def submit(self, item):
+        with self._cond:
+            self._pending.append(item)
+            pending = len(self._pending)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            if pending == 1 or pending >= self.batch_size:
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._closed and len(self._pending) < self.batch_size:
+                    # Give the batch a chance to fill before touching disk
+                    self._cond.wait(self.interval)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[State] Write-behind flush failed, will retry: {e}")
+                if closed:
+                    return
+                with self._cond:
+                    self._cond.wait(self.interval)  # Back off; the batch is still queued
+                continue
+            if closed:
+                return
+
+    def flush(self, fsync=False):
+        """Write everything queued so far from the calling thread."""
+        with self._io_lock:
+            with self._cond:
+                batch, self._pending = self._pending, []
+            if batch or fsync:
+                try:
+                    self._flush_fn(batch, fsync)
+                except BaseException as e:
+                    with self._cond:
+                        self._pending[:0] = batch  # Ahead of anything submitted meanwhile
+                    self.error = e
+                    raise
+                self.error = None
+                self.batches_written += 1
+                self.items_written += len(batch)
+
+    def sync(self):
+        """Turn boundary: drain the queue, fsync'ing if durability demands it."""
+        self.flush(fsync=(self.durability == "fsync"))
+
+    def exclusive(self):
+        """Context manager: drain, then hold off the worker until exit."""
+        worker = self
+
+        class _Exclusive:
+            def __enter__(self):
+                worker._io_lock.acquire()
+                worker.flush()
+                return worker
+
+            def __exit__(self, *exc):
+                worker._io_lock.release()
+
+        return _Exclusive()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """Flush-on-exit hook: drain the queue and stop the thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self.flush(fsync=(self.durability == "fsync"))
+
+@atexit.register
+def _flush_all_workers():
+    for worker in list(_live_workers):
+        try:
+            worker.close()
+        except Exception as e:
+            print(f"[State] Flush on exit failed for {worker.name}: {e}")
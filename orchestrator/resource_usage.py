@@ -0,0 +1,92 @@
+import heapq
+import json
+import os
+
+# Per-command usage fields that are summed into the totals
+SUMMED = ("wall", "cpu_user", "cpu_sys", "stdout_bytes", "stderr_bytes")
+
+class ResourceLedger:
+    """What the mission's commands cost, per tool and per agent.
+
+    ``record()`` takes the ``usage`` dict the executor attaches to each
+    result and adds it to the totals for its tool and for the agent that
+    ran it: run count, wall and CPU seconds, output bytes, and the largest
+    peak RSS seen. The ``keep`` longest-running commands are remembered
+    too, to spot runaways. Not thread-safe: the ``StateManager`` serialises
+    calls under its lock.
+    """
+
+    def __init__(self, path=None, resume=False, keep=10):
+        self.path = path
+        self.keep = keep
+        self.tools = {}
+        self.agents = {}
+        self._longest = []  # Min-heap of (wall, seq, command entry)
+        self._seq = 0
+        if resume and path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.tools, self.agents = saved["tools"], saved["agents"]
+            for entry in saved["longest"]:
+                self._remember(entry)
+
+    def record(self, agent, cmd, usage):
+        for table, name in ((self.tools, usage.get("tool") or "sh"), (self.agents, agent)):
+            totals = table.get(name)
+            if totals is None:
+                totals = table[name] = dict.fromkeys(SUMMED, 0)
+                totals.update(runs=0, max_rss_kb=0)
+            totals["runs"] += 1
+            for field in SUMMED:
+                totals[field] = round(totals[field] + usage.get(field, 0), 3)
+            totals["max_rss_kb"] = max(totals["max_rss_kb"], usage.get("max_rss_kb", 0))
+        self._remember(dict(usage, agent=agent, cmd=cmd))
+
+    def _remember(self, entry):
+        self._seq += 1
+        item = (entry.get("wall", 0), self._seq, entry)
+        if len(self._longest) < self.keep:
+            heapq.heappush(self._longest, item)
+        elif item[0] > self._longest[0][0]:
+            heapq.heapreplace(self._longest, item)
+
+    def longest(self):
+        """The longest-running commands recorded, longest first."""
+        return [entry for _, _, entry in sorted(self._longest, key=lambda item: -item[0])]
+
+    def snapshot(self):
+        return {
+            "tools": {name: dict(totals) for name, totals in self.tools.items()},
+            "agents": {name: dict(totals) for name, totals in self.agents.items()},
+            "longest": self.longest(),
+        }
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, self.path)
+
+def format_usage(snapshot, limit=5):
+    """Markdown tables of a ledger snapshot, for reports and the terminal."""
+    lines = []
+    for title, table in (("Tool", snapshot["tools"]), ("Agent", snapshot["agents"])):
+        if not table:
+            continue
+        lines.append(f"| {title} | Runs | Wall (s) | CPU user (s) | CPU sys (s) | Peak RSS (MB) | Output (KB) |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|")
+        for name, t in sorted(table.items(), key=lambda item: -item[1]["wall"]):
+            output = (t["stdout_bytes"] + t["stderr_bytes"]) / 1024
+            lines.append(f"| {name} | {t['runs']} | {t['wall']:.1f} | {t['cpu_user']:.1f} | {t['cpu_sys']:.1f} "
+                         f"| {t['max_rss_kb'] / 1024:.1f} | {output:.0f} |")
+        lines.append("")
+    longest = snapshot["longest"][:limit]
+    if longest:
+        lines.append("Longest-running commands:")
+        for entry in longest:
+            cpu = entry.get("cpu_user", 0) + entry.get("cpu_sys", 0)
+            lines.append(f"- {entry.get('wall', 0):.1f}s wall, {cpu:.1f}s CPU ({entry['agent']}): `{entry['cmd']}`")
+    return lines
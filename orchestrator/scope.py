@@ -0,0 +1,188 @@
+import ipaddress
+
+# Range decisions returned by ScopeEngine.classify()
+IN_SCOPE = "in"
+PARTIAL = "partial"
+OUT_OF_SCOPE = "out"
+
+ALLOW = "allow"
+DENY = "deny"
+
+class _Node:
+    __slots__ = ("bits", "length", "tag", "label", "children")
+
+    def __init__(self, bits, length):
+        self.bits = bits        # Prefix value, host bits zeroed
+        self.length = length    # Prefix length
+        self.tag = None         # ALLOW, DENY or None for pure branching nodes
+        self.label = None       # Rule as written, for reasons
+        self.children = [None, None]
+
+class PrefixTree:
+    """Path-compressed binary trie (PATRICIA) of tagged CIDR prefixes.
+
+    Edges skip runs of bits with no branching, so depth is bounded by the
+    number of distinct branch points, never more than the address width.
+    Lookups therefore cost O(prefix length) however many rules are loaded;
+    range queries add at most the rules nested inside the range, and stop as
+    soon as two different decisions have been seen.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.root = _Node(0, 0)
+        self.size = 0
+
+    def _bit(self, bits, position):
+        return (bits >> (self.width - 1 - position)) & 1
+
+    def _common(self, a, a_len, b, b_len):
+        limit = min(a_len, b_len)
+        diff = a ^ b
+        return limit if not diff else min(limit, self.width - diff.bit_length())
+
+    def insert(self, bits, length, tag, label):
+        node = self.root
+        while True:
+            if node.length == length:
+                # Deny wins when the same prefix is both allowed and denied
+                if node.tag != DENY:
+                    if node.tag is None:
+                        self.size += 1
+                    node.tag, node.label = tag, label
+                return
+            side = self._bit(bits, node.length)
+            child = node.children[side]
+            if child is None:
+                leaf = node.children[side] = _Node(bits, length)
+                leaf.tag, leaf.label = tag, label
+                self.size += 1
+                return
+            common = self._common(bits, length, child.bits, child.length)
+            if common == child.length:
+                node = child
+                continue
+            # Split the compressed edge at the first differing bit
+            mid = node.children[side] = _Node(bits & ~((1 << (self.width - common)) - 1), common)
+            mid.children[self._bit(child.bits, common)] = child
+            node = mid
+
+    def longest_match(self, bits):
+        """Deepest tagged node whose prefix contains the address ``bits``."""
+        node, best = self.root, None
+        width = self.width
+        while True:
+            if node.tag is not None:
+                best = node
+            if node.length == width:
+                return best
+            child = node.children[(bits >> (width - 1 - node.length)) & 1]
+            if child is None or (bits ^ child.bits) >> (width - child.length):
+                return best
+            node = child
+
+    def decisions_within(self, bits, length, decide):
+        """Set of ``decide(tag)`` values in effect across ``bits/length``.
+
+        ``tag`` is None where no rule applies. Stops early once the set
+        holds two decisions, since the range is then known to be mixed.
+        """
+        node, inherited = self.root, None
+        while node.length < length:
+            effective = node.tag or inherited
+            child = node.children[self._bit(bits, node.length)]
+            if child is None:
+                return {decide(effective)}
+            common = self._common(bits, length, child.bits, child.length)
+            if common == child.length:
+                # The child's prefix still contains the whole query range
+                node, inherited = child, effective
+            elif common == length:
+                # The child lies inside the query range; the rest keeps `effective`
+                found = {decide(effective)}
+                self._collect(child, effective, decide, found)
+                return found
+            else:
+                return {decide(effective)}
+        found = set()
+        self._collect(node, inherited, decide, found)
+        return found
+
+    def _collect(self, node, inherited, decide, found):
+        effective = node.tag or inherited
+        children = [c for c in node.children if c is not None]
+        tiled = len(children) == 2 and all(c.length == node.length + 1 for c in children)
+        if not tiled:
+            found.add(decide(effective))
+        for child in children:
+            if len(found) > 1:
+                return
+            self._collect(child, effective, decide, found)
+
+class ScopeEngine:
+    """Engagement scope as allow and deny CIDR lists in per-family prefix trees.
+
+    An address is in scope when the most specific matching rule is an allow
+    rule; with no allow rules at all, everything not denied is in scope.
+    ``classify()`` decides whole ranges from the rules alone, without
+    enumerating addresses.
+    """
+
+    def __init__(self, allow=(), deny=()):
+        self.trees = {4: PrefixTree(32), 6: PrefixTree(128)}
+        self.allow_count = 0
+        self.deny_count = 0
+        for cidr in allow:
+            self.add(cidr, ALLOW)
+        for cidr in deny:
+            self.add(cidr, DENY)
+
+    @classmethod
+    def from_files(cls, allow_file=None, deny_file=None):
+        return cls(load_cidrs(allow_file) if allow_file else (), load_cidrs(deny_file) if deny_file else ())
+
+    def add(self, cidr, tag):
+        network = ipaddress.ip_network(cidr, strict=False)
+        self.trees[network.version].insert(int(network.network_address), network.prefixlen, tag, str(cidr))
+        if tag == ALLOW:
+            self.allow_count += 1
+        else:
+            self.deny_count += 1
+
+    def _effective(self, tag):
+        if tag is None:
+            return OUT_OF_SCOPE if self.allow_count else IN_SCOPE
+        return IN_SCOPE if tag == ALLOW else OUT_OF_SCOPE
+
+    def match(self, address):
+        """``(in scope, deciding rule or None)`` for a single address."""
+        ip = address if isinstance(address, (ipaddress.IPv4Address, ipaddress.IPv6Address)) else ipaddress.ip_address(address)
+        node = self.trees[ip.version].longest_match(int(ip))
+        if node is None:
+            return self._effective(None) == IN_SCOPE, None
+        return node.tag == ALLOW, node.label
+
+    def is_allowed(self, address):
+        return self.match(address)[0]
+
+    def classify(self, network):
+        """``IN_SCOPE``, ``PARTIAL`` or ``OUT_OF_SCOPE`` for an address or CIDR."""
+        network = ipaddress.ip_network(network, strict=False)
+        decisions = self.trees[network.version].decisions_within(
+            int(network.network_address), network.prefixlen, self._effective)
+        if len(decisions) > 1:
+            return PARTIAL
+        return decisions.pop()
+
+def load_cidrs(path):
+    """Read addresses/CIDRs from a scope file: one or more per line, ``#`` comments."""
+    cidrs = []
+    with open(path, "r") as f:
+        for lineno, line in enumerate(f, 1):
+            for token in line.split("#", 1)[0].replace(",", " ").split():
+                try:
+                    ipaddress.ip_network(token, strict=False)
+                except ValueError:
+                    raise ValueError(f"{path}:{lineno}: not an IP address or CIDR: {token}")
+                cidrs.append(token)
+    return cidrs
@@ -0,0 +1,299 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from orchestrator.persistence import WriteBehindWorker
+
+_FIELD = re.compile(r"^\w+$")
+
+# Durability level -> PRAGMA synchronous
+SYNCHRONOUS = {"none": "OFF", "batched": "NORMAL", "fsync": "FULL"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}',
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes(type);
+CREATE INDEX IF NOT EXISTS idx_nodes_service_port
+    ON nodes(json_extract(data, '$.port')) WHERE type = 'service';
+
+CREATE TABLE IF NOT EXISTS edges (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    action TEXT NOT NULL,
+    result TEXT,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_edges_source ON edges(source, result);
+CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target);
+
+CREATE TABLE IF NOT EXISTS memory (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class SQLiteGraphStore:
+    """Attack graph kept in SQLite (WAL mode) instead of Python memory.
+
+    Nodes, edges and key/value memory live in indexed tables, so lookups and
+    queries touch only the rows they need and resident memory stays flat no
+    matter how large the engagement grows. ``graph`` still materialises the
+    classic dict view for compatibility, but that is O(graph) and meant for
+    small exports only.
+
+    Mutations go into an open transaction on the shared connection, so reads
+    see them immediately; a ``WriteBehindWorker`` commits that transaction on
+    a time or size trigger, and ``sync()`` commits at turn boundaries.
+    """
+
+    def __init__(self, log_dir, resume=False, durability="batched"):
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, "attack_graph.db")
+        self.durability = durability
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(self.log_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[durability]}")
+        self.conn.executescript(SCHEMA)
+        self._writer = WriteBehindWorker(self._commit, durability, name="sqlite-commit")
+        if not resume:
+            # Fresh mission: drop whatever a previous run left behind
+            with self.conn:
+                for table in ("nodes", "edges", "memory", "metadata"):
+                    self.conn.execute(f"DELETE FROM {table}")
+                self.conn.executemany(
+                    "INSERT INTO metadata (key, value) VALUES (?, ?)",
+                    [("start_time", datetime.now().isoformat()), ("status", "active")]
+                )
+
+    # --- Mutations ---------------------------------------------------------
+
+    def add_node(self, node_id, node_type, data=None):
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO nodes (id, type, data, timestamp) VALUES (?, ?, ?, ?)",
+                (node_id, node_type, json.dumps(data or {}, default=str), datetime.now().isoformat())
+            )
+        if cur.rowcount != 1:
+            return False
+        self._writer.submit(1)
+        return True
+
+    def add_edge(self, source, target, action, result="unknown"):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO edges (source, target, action, result, timestamp) VALUES (?, ?, ?, ?, ?)",
+                (source, target, action, result, datetime.now().isoformat())
+            )
+        self._writer.submit(1)
+
+    def bulk_add(self, nodes=(), edges=()):
+        """Insert many nodes/edges in a single transaction.
+
+        Returns the ``(id, type, data)`` tuples that were not already present.
+        """
+        now = datetime.now().isoformat()
+        pending = {}
+        for node_id, node_type, data in nodes:
+            pending.setdefault(node_id, (node_id, node_type, data))
+        ids = list(pending)
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for (existing,) in self.conn.execute(f"SELECT id FROM nodes WHERE id IN ({marks})", chunk):
+                    del pending[existing]
+            added = list(pending.values())
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO nodes (id, type, data, timestamp) VALUES (?, ?, ?, ?)",
+                ((node_id, node_type, json.dumps(data or {}, default=str), now)
+                 for node_id, node_type, data in added)
+            )
+            self.conn.executemany(
+                "INSERT INTO edges (source, target, action, result, timestamp) VALUES (?, ?, ?, ?, ?)",
+                ((source, target, action, result, now) for source, target, action, result in edges)
+            )
+        self._writer.submit(1)
+        return added
+
+    def set_memory(self, key, value):
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO memory (key, value) VALUES (?, ?)",
+                (key, json.dumps(value, default=str))
+            )
+        self._writer.submit(1)
+
+    def get_memory(self, key, default=None):
+        rows = self._query("SELECT value FROM memory WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def memory_snapshot(self):
+        return {k: json.loads(v) for k, v in self._query("SELECT key, value FROM memory")}
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _stream(self, sql, chunk=1000):
+        """Iterate a large result set without holding the lock between chunks."""
+        with self._lock:
+            cur = self.conn.cursor()
+            cur.execute(sql)
+            rows = cur.fetchmany(chunk)
+        while rows:
+            yield from rows
+            with self._lock:
+                rows = cur.fetchmany(chunk)
+
+    # --- Lookups -----------------------------------------------------------
+
+    @staticmethod
+    def _node(row):
+        return {"id": row[0], "type": row[1], "data": json.loads(row[2]), "timestamp": row[3]}
+
+    @staticmethod
+    def _edge(row):
+        return {"source": row[0], "target": row[1], "action": row[2], "result": row[3], "timestamp": row[4]}
+
+    def has_node(self, node_id):
+        return bool(self._query("SELECT 1 FROM nodes WHERE id = ?", (node_id,)))
+
+    def get_node(self, node_id):
+        rows = self._query("SELECT id, type, data, timestamp FROM nodes WHERE id = ?", (node_id,))
+        return self._node(rows[0]) if rows else None
+
+    def nodes_by_type(self, node_type):
+        return self.find_nodes(node_type)
+
+    def edges_from(self, node_id):
+        return self.find_edges(source=node_id)
+
+    def edges_to(self, node_id):
+        return self.find_edges(target=node_id)
+
+    def neighbors(self, node_id):
+        return [row[0] for row in self._query(
+            "SELECT target FROM edges WHERE source = ? GROUP BY target ORDER BY MIN(seq)", (node_id,)
+        )]
+
+    def find_nodes(self, node_type=None, **data):
+        """Nodes of ``node_type`` (any type if None) whose data matches ``data``.
+
+        Data filters compile to ``json_extract`` lookups; ``port`` on service
+        nodes is covered by an expression index.
+        """
+        clauses, params = [], []
+        if node_type is not None:
+            clauses.append("type = ?")
+            params.append(node_type)
+        for key, value in data.items():
+            if not _FIELD.match(key):
+                raise ValueError(f"Invalid data field name: {key}")
+            clauses.append(f"json_extract(data, '$.{key}') = ?")
+            params.append(value)
+        sql = "SELECT id, type, data, timestamp FROM nodes"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [self._node(row) for row in self._query(sql + " ORDER BY rowid", params)]
+
+    def find_edges(self, source=None, target=None, action=None, result=None):
+        clauses, params = [], []
+        for column, value in (("source", source), ("target", target), ("action", action), ("result", result)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        sql = "SELECT source, target, action, result, timestamp FROM edges"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return [self._edge(row) for row in self._query(sql + " ORDER BY seq", params)]
+
+    def iter_nodes(self):
+        for row in self._stream("SELECT id, type, data, timestamp FROM nodes ORDER BY rowid"):
+            yield self._node(row)
+
+    def iter_edges(self):
+        for row in self._stream("SELECT source, target, action, result, timestamp FROM edges ORDER BY seq"):
+            yield self._edge(row)
+
+    _NODE_STATS = """
+        SELECT n.id, n.type, n.data,
+            (SELECT COUNT(*) FROM edges WHERE source = n.id) + (SELECT COUNT(*) FROM edges WHERE target = n.id),
+            (SELECT COUNT(*) FROM edges WHERE source = n.id AND result = 'success')
+                + (SELECT COUNT(*) FROM edges WHERE target = n.id AND result = 'success')
+        FROM nodes n"""
+
+    def iter_node_stats(self):
+        """``(id, type, data, degree, successes)`` for every node, streamed (relevance scoring)."""
+        for row in self._stream(self._NODE_STATS + " ORDER BY n.rowid"):
+            yield row[0], row[1], json.loads(row[2]), row[3], row[4]
+
+    def node_stats(self, node_ids, chunk=500):
+        """``iter_node_stats`` rows for the existing nodes among ``node_ids``."""
+        for i in range(0, len(node_ids), chunk):
+            part = node_ids[i:i + chunk]
+            sql = self._NODE_STATS + f" WHERE n.id IN ({', '.join('?' * len(part))})"
+            for row in self._query(sql, part):
+                yield row[0], row[1], json.loads(row[2]), row[3], row[4]
+
+    def counts(self):
+        nodes = self._query("SELECT COUNT(*) FROM nodes")[0][0]
+        edges = self._query("SELECT COUNT(*) FROM edges")[0][0]
+        return nodes, edges
+
+    @property
+    def graph(self):
+        metadata = dict(self._query("SELECT key, value FROM metadata"))
+        return {
+            "nodes": list(self.iter_nodes()),
+            "edges": list(self.iter_edges()),
+            "metadata": metadata
+        }
+
+    @property
+    def memory(self):
+        return self.memory_snapshot()
+
+    # --- Persistence -------------------------------------------------------
+
+    def _commit(self, batch, fsync):
+        """Runs on the writer thread (or a caller draining it)."""
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+
+    def flush(self):
+        self._writer.flush()
+
+    def sync(self):
+        self._writer.sync()
+
+    def needs_checkpoint(self):
+        return False
+
+    def checkpoint(self):
+        """Commit and fold the WAL back into the main database file."""
+        with self._writer.exclusive():
+            with self._lock:
+                self.conn.commit()
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self._writer.close()
+        with self._lock:
+            if self.conn is not None:
+                self.conn.commit()
+                self.conn.close()
+                self.conn = None
@@ -1,67 +1,303 @@
-import json
 import os
-from datetime import datetime
+import re
+import threading
+import time
+from orchestrator.graph_analytics import IGNORED_SOURCES, AttackGraphAnalytics
+from orchestrator.graph_snapshot import GraphSnapshot, write_snapshot
+from orchestrator.json_store import JsonGraphStore
+from orchestrator.resource_usage import ResourceLedger
+from orchestrator.sqlite_store import SQLiteGraphStore
+from orchestrator.state_summary import SummaryEngine, format_edge, format_node
+
+STORES = {
+    "json": JsonGraphStore,     # In-memory graph, JSON snapshot + journal (small missions)
+    "sqlite": SQLiteGraphStore  # Indexed tables on disk (large engagements)
+}
+
+# Memory-mappable binary snapshot written next to the store's own files
+SNAPSHOT_NAME = "attack_graph.sgb"
+# Per-tool / per-agent command resource totals, saved at checkpoints
+USAGE_NAME = "resource_usage.json"
+
+def service_id(host, port, proto="tcp"):
+    """Canonical node id for a service: ``<host>:<port>/<proto>``."""
+    return f"{host}:{port}/{proto}"
+
+class ContentionLock:
+    """Re-entrant lock that counts acquisitions and how long callers waited."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            start = time.perf_counter()
+            self._lock.acquire()
+            waited = time.perf_counter() - start
+            # Counters are only touched while holding the lock
+            self.contended += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+        self.acquisitions += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+    def stats(self):
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": self.contended / self.acquisitions if self.acquisitions else 0.0,
+            "wait_seconds": self.wait_seconds,
+            "max_wait_seconds": self.max_wait,
+        }
 
 class StateManager:
-    """Manages the attack graph and short-term memory (volatile state)."""
-    
-    def __init__(self, workspace_path):
+    """Manages the attack graph and short-term memory (volatile state).
+
+    Storage is delegated to a pluggable store (see ``STORES``) that persists
+    through a write-behind worker, so mutations never wait on disk;
+    ``durability`` picks none, batched or fsync (fsync'ed every turn). Services are
+    recorded as ``service`` nodes keyed by ``service_id()`` whose data carries
+    ``host``, ``port``, ``proto`` and ``state``; the query helpers below rely
+    on that convention.
+
+    Safe to share between agent threads: mutations, checkpoints and exports
+    are serialised by ``lock`` (hold it to make a read-modify-write atomic),
+    while prompt reads - ``export_summary`` with a cached goal, ``memory``
+    and the query API - take no lock. ``memory`` is an immutable-by-convention
+    copy republished on every update. ``lock_stats()`` reports contention.
+    """
+
+    def __init__(self, workspace_path, resume=False, backend="json", durability="batched"):
         self.workspace = workspace_path
-        self.graph = {
-            "nodes": [], # {id: "ip/domain/user", type: "asset/vuln", data: {}}
-            "edges": [], # {from: id, to: id, action: "scan/exploit", result: "success/fail"}
-            "metadata": {
-                "start_time": datetime.now().isoformat(),
-                "status": "active"
-            }
-        }
-        self.memory = {} # Key-value for quick lookups (e.g., "target_ip": "10.0.0.1")
-        self.log_path = os.path.join(workspace_path, "logs", "attack_graph.json")
+        if backend not in STORES:
+            raise ValueError(f"Unknown state backend '{backend}'. Choose from: {', '.join(STORES)}")
+        self.backend = backend
+        self.store = STORES[backend](os.path.join(workspace_path, "logs"), resume=resume, durability=durability)
+        self.log_path = self.store.log_path
+        self.lock = ContentionLock()
+
+        # The JSON store already holds everything in memory, so the summary can
+        # too; with SQLite it keeps a window of recent turns and scores from the store.
+        in_memory = backend == "json"
+        self.summary = SummaryEngine(retain_full=in_memory, store=None if in_memory else self.store)
+        self._analytics = None
+        self._analytics_version = None
+        self._graph_version = 0  # Bumped only by mutations analytics reads (not supervisor bookkeeping)
+        self._facts, self._facts_key = [], None
+        if resume and in_memory:
+            for node in self.store.iter_nodes():
+                self.summary.on_node(node['id'], node['type'], node['data'])
+            for edge in self.store.iter_edges():
+                self.summary.on_edge(edge['source'], edge['target'], edge['action'], edge['result'])
+        elif resume:
+            # Nothing from before the resume is recent; relevance comes from the store
+            self.summary.node_count, self.summary.edge_count = self.store.counts()
+        self._memory_view = dict(self.store.memory)
+        self.usage = ResourceLedger(os.path.join(workspace_path, "logs", USAGE_NAME), resume=resume)
+
+    @property
+    def graph(self):
+        return self.store.graph
+
+    @property
+    def memory(self):
+        """Snapshot of the memory dict; replaced, never mutated, by updates."""
+        return self._memory_view
 
     def add_node(self, node_id, node_type, data=None):
-        if not any(n['id'] == node_id for n in self.graph['nodes']):
-            self.graph['nodes'].append({
-                "id": node_id,
-                "type": node_type,
-                "data": data or {},
-                "timestamp": datetime.now().isoformat()
-            })
-            self._save()
+        with self.lock:
+            if not self.store.add_node(node_id, node_type, data):
+                return False
+            self.summary.on_node(node_id, node_type, data)
+            self._graph_version += 1
             return True
-        return False
 
     def add_edge(self, source, target, action, result="unknown"):
-        self.graph['edges'].append({
-            "source": source,
-            "target": target,
-            "action": action,
-            "result": result,
-            "timestamp": datetime.now().isoformat()
-        })
-        self._save()
+        with self.lock:
+            self.store.add_edge(source, target, action, result)
+            self.summary.on_edge(source, target, action, result)
+            if source not in IGNORED_SOURCES:
+                self._graph_version += 1
+
+    def bulk_add(self, nodes=(), edges=()):
+        """Insert ``(id, type, data)`` nodes and ``(source, target, action, result)`` edges in one batch.
+
+        Returns the number of nodes that were new.
+        """
+        edges = list(edges)
+        with self.lock:
+            added = self.store.bulk_add(nodes, edges)
+            for node in added:
+                self.summary.on_node(*node)
+            for edge in edges:
+                self.summary.on_edge(*edge)
+            if added or any(edge[0] not in IGNORED_SOURCES for edge in edges):
+                self._graph_version += 1
+        return len(added)
+
+    def begin_turn(self, turn):
+        """Stamp subsequent mutations with ``turn`` for delta summaries.
+
+        Also the durability point for ``fsync`` mode: everything recorded in
+        earlier turns is on disk once this returns.
+        """
+        self.store.sync()
+        with self.lock:
+            self.summary.begin_turn(turn)
 
     def update_memory(self, key, value):
-        self.memory[key] = value
-        self._save()
+        with self.lock:
+            self.store.set_memory(key, value)
+            memory = dict(self._memory_view)
+            memory[key] = value
+            self._memory_view = memory
 
     def get_memory(self, key, default=None):
-        return self.memory.get(key, default)
-
-    def _save(self):
-        """Persist state to disk for recovery/review."""
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
-        with open(self.log_path, "w") as f:
-            json.dump({
-                "graph": self.graph,
-                "memory": self.memory
-            }, f, indent=4)
-
-    def export_summary(self):
-        """Clean summary for context inclusion."""
-        nodes = [f"{n['id']} ({n['type']})" for n in self.graph['nodes']]
-        edges = [f"{e['source']} -> {e['target']} via {e['action']} ({e['result']})" for e in self.graph['edges']]
-        return {
-            "discovered_assets": nodes,
-            "actions_taken": edges,
-            "active_variables": self.memory
-        }
+        return self._memory_view.get(key, default)
+
+    def record_usage(self, agent, cmd, usage):
+        """Add one command's ``usage`` (from the executor result) to the mission totals."""
+        with self.lock:
+            self.usage.record(agent, cmd, usage)
+
+    def resource_usage(self):
+        """Per-tool and per-agent resource totals plus the longest-running commands."""
+        with self.lock:
+            return self.usage.snapshot()
+
+    def lock_stats(self):
+        """Contention metrics of the state lock since this manager was created."""
+        return self.lock.stats()
+
+    # --- Query API ---------------------------------------------------------
+
+    def has_node(self, node_id):
+        return self.store.has_node(node_id)
+
+    def get_node(self, node_id):
+        return self.store.get_node(node_id)
+
+    def nodes_by_type(self, node_type):
+        return self.store.nodes_by_type(node_type)
+
+    def edges_from(self, node_id):
+        return self.store.edges_from(node_id)
+
+    def edges_to(self, node_id):
+        return self.store.edges_to(node_id)
+
+    def neighbors(self, node_id):
+        return self.store.neighbors(node_id)
+
+    def find_nodes(self, node_type=None, **data):
+        """e.g. ``find_nodes("service", port=445, state="open")``."""
+        return self.store.find_nodes(node_type, **data)
+
+    def find_edges(self, source=None, target=None, action=None, result=None):
+        """e.g. ``find_edges(source="10.0.0.5", result="success")``."""
+        return self.store.find_edges(source=source, target=target, action=action, result=result)
+
+    def hosts_with_open_port(self, port, proto="tcp"):
+        """Hosts with an open service on ``port``, in discovery order."""
+        services = self.store.find_nodes("service", port=int(port), proto=proto, state="open")
+        return list(dict.fromkeys(n['data'].get("host") for n in services))
+
+    def counts(self):
+        """(node count, edge count) without materialising the graph."""
+        return self.store.counts()
+
+    # --- Analytics ---------------------------------------------------------
+
+    def analytics(self):
+        """Graph analytics for the current graph, rebuilt only after mutations."""
+        version = self._graph_version
+        if self._analytics is None or self._analytics_version != version:
+            self._analytics = AttackGraphAnalytics.from_state(self)
+            self._analytics_version = version
+        return self._analytics
+
+    def attack_path_facts(self, goal=None, k=3):
+        """Attack-path findings as sentences, from the ``foothold`` memory key
+        towards node ids named in ``goal`` (or high-value nodes otherwise)."""
+        analytics = self.analytics()
+        foothold = self.get_memory("foothold")
+        key = (self._analytics_version, goal, foothold, k)
+        if self._facts_key != key:
+            targets = [t for t in re.findall(r"[^\s,;()]+", goal or "") if t in analytics.index] or None
+            self._facts = analytics.facts(foothold=foothold, targets=targets, k=k)
+            self._facts_key = key
+        return list(self._facts)
+
+    # --- Persistence -------------------------------------------------------
+
+    def needs_checkpoint(self):
+        return self.store.needs_checkpoint()
+
+    def checkpoint(self):
+        with self.lock:
+            self.store.checkpoint()
+            self.usage.save()
+
+    def export_snapshot(self, path=None):
+        """Write the graph as a binary snapshot that ``open_snapshot`` maps lazily."""
+        path = path or os.path.join(os.path.dirname(self.log_path), SNAPSHOT_NAME)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            write_snapshot(path, self.store.iter_nodes(), self.store.iter_edges(), memory=self.memory)
+        return path
+
+    @staticmethod
+    def open_snapshot(path):
+        """Read-only ``GraphSnapshot`` of a previous engagement; nothing is decoded up front."""
+        return GraphSnapshot(path)
+
+    def flush(self):
+        """Write out everything queued by the write-behind worker."""
+        self.store.flush()
+
+    def close(self):
+        """Flush pending writes and release files; also runs at interpreter exit."""
+        with self.lock:
+            self.store.close()
+            self.usage.save()
+
+    def export_summary(self, since_turn=None, goal=None, top_k=10):
+        """Clean summary for context inclusion.
+
+        Without arguments this is the full view. With ``since_turn`` and/or
+        ``goal`` it returns a compact prompt view: what changed after
+        ``since_turn``, the ``top_k`` assets most relevant to ``goal`` and
+        graph totals. Both are served from the incrementally maintained
+        summary, so cost tracks changes rather than graph size.
+        """
+        if since_turn is None and goal is None:
+            if self.summary.retain_full:
+                nodes, edges = self.summary.assets(), self.summary.actions()
+            else:
+                nodes = [format_node(n['id'], n['type']) for n in self.store.iter_nodes()]
+                edges = [format_edge(e['source'], e['target'], e['action'], e['result']) for e in self.store.iter_edges()]
+            return {
+                "discovered_assets": nodes,
+                "actions_taken": edges,
+                "active_variables": self.memory
+            }
+
+        view = {"totals": {"assets": self.summary.node_count, "actions": self.summary.edge_count}}
+        if goal is not None:
+            if self.summary.is_cached(goal, top_k):
+                view["key_assets"] = self.summary.top_k(goal, top_k)
+            else:
+                # A new goal rescores every node: not a lock-free read
+                with self.lock:
+                    view["key_assets"] = self.summary.top_k(goal, top_k)
+        if since_turn is not None:
+            view.update(self.summary.delta(since_turn))
+        view["active_variables"] = self.memory
+        return view
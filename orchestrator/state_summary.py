@@ -0,0 +1,211 @@
+import heapq
+import math
+import re
+from bisect import bisect_right
+from collections import deque
+
+# Relative importance of node types when ranking assets for a goal
+TYPE_WEIGHTS = {
+    "credential": 3.0,
+    "vulnerability": 3.0,
+    "vuln": 3.0,
+    "share": 1.5,
+    "user": 1.5,
+    "host": 1.5,
+    "service": 1.0,
+    "path": 0.5,
+}
+
+_TOKEN = re.compile(r"[\w.:/-]{3,}")
+
+def format_node(node_id, node_type):
+    return f"{node_id} ({node_type})"
+
+def format_edge(source, target, action, result):
+    return f"{source} -> {target} via {action} ({result})"
+
+def _entry(node_id, node_type, data=None, degree=0, successes=0):
+    """[text for goal matching, type weight, degree, successes] for scoring one node."""
+    text = " ".join([str(node_id), str(node_type)] + [str(v) for v in (data or {}).values()]).lower()
+    return [text, TYPE_WEIGHTS.get(node_type, 1.0), degree, successes]
+
+class SummaryEngine:
+    """Materialised, incrementally maintained view of the attack graph for prompts.
+
+    Every mutation is formatted exactly once and stamped with the turn it
+    happened in, so ``delta()`` costs O(log n + changes) and ``top_k()`` only
+    rescores the nodes a mutation touched. Scores never decrease (degree and
+    successful edges only grow), which keeps the cached leaderboard exact.
+
+    With ``retain_full=False`` only the last ``window`` turns of formatted
+    entries are kept; full exports are then streamed from the store instead.
+    Given a ``store`` (one with ``iter_node_stats``/``node_stats``, like
+    ``SQLiteGraphStore``), nothing is kept per node either: relevance is
+    scored from the store, and between reads only the ids of up to
+    ``HOT_NODES`` touched nodes are remembered. Past that, the next read
+    rescans the store.
+
+    Mutations must be serialised by the caller. ``delta()`` and a cached
+    ``top_k()`` are safe to call concurrently with them: entries are only
+    appended and the leaderboard is replaced, never edited in place.
+    """
+
+    TOP_CACHE = 64
+    HOT_NODES = 4096
+
+    def __init__(self, retain_full=True, window=10, store=None):
+        self.retain_full = retain_full
+        self.window = window
+        self.store = store
+        self.turn = 0
+        self.node_count = 0
+        self.edge_count = 0
+
+        self._assets, self._asset_turns = [], []
+        self._actions, self._action_turns = [], []
+        self._recent = deque()      # (turn, "asset"|"action", text) when not retaining everything
+
+        self._nodes = {}            # node_id -> _entry(); only without a store
+        self._touched = {}          # node_id -> None, touched since the last read; only with a store
+        self._stale = False         # More than HOT_NODES touched: rescan the store
+        self._goal = None
+        self._goal_terms = frozenset()
+        self._scores = {}
+        self._top = []              # [(score, node_id)], best first, at most TOP_CACHE
+
+    # --- Mutation hooks ----------------------------------------------------
+
+    def begin_turn(self, turn):
+        self.turn = turn
+        while self._recent and self._recent[0][0] <= turn - self.window:
+            self._recent.popleft()
+
+    def on_node(self, node_id, node_type, data=None):
+        self.node_count += 1
+        self._record("asset", format_node(node_id, node_type))
+        if self.store is not None:
+            self._touch(node_id)
+            return
+        self._nodes[node_id] = _entry(node_id, node_type, data)
+        self._rescore(node_id)
+
+    def on_edge(self, source, target, action, result):
+        self.edge_count += 1
+        if self.store is not None:
+            self._touch(source)
+            self._touch(target)
+            self._record("action", format_edge(source, target, action, result))
+            return
+        for node_id in (source, target):
+            entry = self._nodes.get(node_id)
+            if entry is None:
+                continue
+            entry[2] += 1
+            if result == "success":
+                entry[3] += 1
+            self._rescore(node_id)
+        self._record("action", format_edge(source, target, action, result))
+
+    def _record(self, kind, text):
+        if self.retain_full:
+            if kind == "asset":
+                self._assets.append(text)
+                self._asset_turns.append(self.turn)
+            else:
+                self._actions.append(text)
+                self._action_turns.append(self.turn)
+        else:
+            self._recent.append((self.turn, kind, text))
+
+    # --- Views -------------------------------------------------------------
+
+    def assets(self):
+        return list(self._assets)
+
+    def actions(self):
+        return list(self._actions)
+
+    def delta(self, since_turn):
+        """Assets and actions recorded after ``since_turn``."""
+        if self.retain_full:
+            return {
+                "new_assets": self._assets[bisect_right(self._asset_turns, since_turn):],
+                "new_actions": self._actions[bisect_right(self._action_turns, since_turn):],
+            }
+        recent = tuple(self._recent)
+        new_assets = [text for turn, kind, text in recent if turn > since_turn and kind == "asset"]
+        new_actions = [text for turn, kind, text in recent if turn > since_turn and kind == "action"]
+        return {"new_assets": new_assets, "new_actions": new_actions}
+
+    def is_cached(self, goal, k=10):
+        """True if ``top_k(goal, k)`` is a read of the cached leaderboard."""
+        return goal == self._goal and k <= self.TOP_CACHE and not (self._touched or self._stale)
+
+    def top_k(self, goal, k=10):
+        """The ``k`` nodes most relevant to ``goal``, formatted for prompts."""
+        if goal != self._goal or self._stale:
+            self._set_goal(goal)
+        elif self._touched:
+            self._refresh()
+        if k <= self.TOP_CACHE:
+            ranked = self._top[:k]
+        elif self.store is not None:
+            ranked = heapq.nlargest(k, self._scan())
+        else:
+            ranked = heapq.nlargest(k, ((s, n) for n, s in self._scores.items()))
+        return [f"{node_id} [relevance {score:.1f}]" for score, node_id in ranked]
+
+    # --- Scoring -----------------------------------------------------------
+
+    def _set_goal(self, goal):
+        self._goal = goal
+        self._goal_terms = frozenset(_TOKEN.findall((goal or "").lower()))
+        if self.store is not None:
+            self._touched, self._stale = {}, False
+            self._top = heapq.nlargest(self.TOP_CACHE, self._scan())
+            return
+        self._scores = {node_id: self._score(entry) for node_id, entry in self._nodes.items()}
+        self._top = heapq.nlargest(self.TOP_CACHE, ((s, n) for n, s in self._scores.items()))
+
+    def _scan(self, node_ids=None):
+        """(score, node_id) for every node in the store, or for ``node_ids``."""
+        rows = self.store.iter_node_stats() if node_ids is None else self.store.node_stats(node_ids)
+        for node_id, node_type, data, degree, successes in rows:
+            yield self._score(_entry(node_id, node_type, data, degree, successes)), node_id
+
+    def _touch(self, node_id):
+        if self._goal is None or self._stale:
+            return  # The next goal rescans the store anyway
+        self._touched[node_id] = None
+        if len(self._touched) > self.HOT_NODES:
+            self._touched, self._stale = {}, True
+
+    def _refresh(self):
+        """Rescore the nodes touched since the last read from the store.
+
+        Scores never decrease, so a node outside the leaderboard that was not
+        touched cannot have overtaken one inside it: merging is exact.
+        """
+        touched, self._touched = self._touched, {}
+        top = [item for item in self._top if item[1] not in touched]
+        top.extend(self._scan(list(touched)))
+        self._top = heapq.nlargest(self.TOP_CACHE, top)
+
+    def _score(self, entry):
+        text, weight, degree, successes = entry
+        matches = sum(1 for term in self._goal_terms if term in text)
+        return 2.0 * matches + weight + 0.5 * math.log1p(degree) + 1.0 * successes
+
+    def _rescore(self, node_id):
+        if self._goal is None:
+            return
+        score = self._score(self._nodes[node_id])
+        self._scores[node_id] = score
+        top = self._top
+        if len(top) >= self.TOP_CACHE and score <= top[-1][0] and all(n != node_id for _, n in top):
+            return
+        # Build a new list and swap it in so lock-free readers never see a half-sorted one
+        top = [item for item in top if item[1] != node_id]
+        top.append((score, node_id))
+        top.sort(reverse=True)
+        self._top = top[:self.TOP_CACHE]
@@ -1,8 +1,12 @@
 from core.llm import LLMAdapter
+from config.settings import config
 from orchestrator.state_manager import StateManager
-from orchestrator.guardrails import Guardrails
+from orchestrator.guardrails import get_guardrails
+from core.executor import get_executor
+from core.tool_inventory import get_inventory
 import sys
 import os
+import threading
 
 # Try to import autonomous components
 try:
@@ -25,11 +29,18 @@ except ImportError:
 class Supervisor:
     """The Brain: Decomposes goals, routes to agents, manages mission lifecycle with learning."""
 
+    SUMMARY_WINDOW = 3   # Turns of recent changes included in each decision prompt
+    SUMMARY_TOP_K = 15   # Most goal-relevant assets included in each decision prompt
+
     def __init__(self, workspace_path):
         self.llm = LLMAdapter()
-        self.state = StateManager(workspace_path)
-        self.guard = Guardrails()
+        self.state = StateManager(workspace_path, backend=config.STATE_BACKEND, durability=config.STATE_DURABILITY)
+        self.guard = get_guardrails()  # The same instance every agent and the terminal server use
         self.agents = {} # Registered agents: {'web': WebAgent, ...}
+        self.tools = get_inventory()  # Installed tools and versions, resolved once at startup
+        self.stop_requested = threading.Event()  # Set by request_stop() from another thread
+        # Large tool outputs spill into this mission's workspace
+        get_executor().artifact_dir = os.path.join(workspace_path, "artifacts")
         
         # Initialize autonomous components if available
         if AUTONOMOUS_MODE:
@@ -58,9 +69,17 @@ class Supervisor:
 
     def register_agent(self, name, agent_instance):
         self.agents[name] = agent_instance
+        if hasattr(agent_instance, "bind_state"):
+            agent_instance.bind_state(self.state)
+
+    def request_stop(self):
+        """Ask a running mission to end after its current turn, and kill the commands it is running."""
+        self.stop_requested.set()
+        return get_executor().jobs.kill_all()
 
     def run_mission(self, high_level_goal):
         """Main execution loop for a mission."""
+        self.stop_requested.clear()
         self.state.update_memory("mission_goal", high_level_goal)
         
         # 1. INITIAL ANALYSIS & DECOMPOSITION
@@ -71,8 +90,15 @@ class Supervisor:
         max_turns = 15
         for turn in range(1, max_turns + 1):
             print(f"[*] Turn {turn}/{max_turns}: Reasoning...")
-            current_state = self.state.export_summary()
+            self.state.begin_turn(turn)
+            # Compact view: recent changes plus the assets that matter for the goal
+            current_state = self.state.export_summary(
+                since_turn=max(0, turn - self.SUMMARY_WINDOW), goal=high_level_goal, top_k=self.SUMMARY_TOP_K
+            )
             
+            if isinstance(current_state, dict):
+                current_state["attack_paths"] = self.state.attack_path_facts(high_level_goal)
+
             # Autonomous Proactive Suggestion
             if self.controller:
                  suggestion = self.controller.suggest_next_action(current_state, high_level_goal)
@@ -88,6 +114,7 @@ class Supervisor:
             Mission Goal: {high_level_goal}
             Current State: {current_state}
             Available Agents: {list(self.agents.keys())}
+            Installed Tools: {self.tools.describe()}
             
             Task: What is the next step? Choose an agent and a task for it.
             Alternatively, if the goal is met, output [COMPLETE].
@@ -133,10 +160,23 @@ class Supervisor:
                     result = self.agents[matched_agent].execute(task)
                     self.state.add_edge("supervisor", matched_agent, f"delegate (fuzzy): {task[:50]}", result.get("summary", "Done"))
                 else:
-                    # Log the failure and continue
-                    self.state.update_memory("errors", self.state.memory.get("errors", []) + [
-                        f"Turn {turn}: Unknown agent '{agent_name}' requested for task: {task[:100]}"
-                    ])
+                    # Log the failure and continue (read-modify-write, so hold the state lock)
+                    with self.state.lock:
+                        self.state.update_memory("errors", self.state.memory.get("errors", []) + [
+                            f"Turn {turn}: Unknown agent '{agent_name}' requested for task: {task[:100]}"
+                        ])
+
+            # Compact the state journal once it grows large
+            if self.state.needs_checkpoint():
+                self.state.checkpoint()
+
+            if self.stop_requested.is_set():
+                print(f"[!] Mission stopped by operator after turn {turn}")
+                break
+
+        self.state.checkpoint()
+        # Binary snapshot for fast, lazy review of the engagement later
+        self.state.export_snapshot()
 
         # Post-mission reflection and learning
         if self.reflection and self.learning:
@@ -159,6 +199,8 @@ class Supervisor:
             learnings = self.learning.analyze_mission(mission_data)
             print(f"[Learning] Extracted {len(learnings.get('techniques_used', []))} techniques")
         
+        if self.stop_requested.is_set():
+            return "[MISSION STOPPED] Partial results saved in logs."
         return "[MISSION COMPLETE] Report generated in logs."
 
     def _decompose_goal(self, goal):
@@ -0,0 +1,250 @@
+import ipaddress
+import os
+import re
+from functools import lru_cache
+from itertools import product
+
+from core.timeout_model import OCTET_RANGE
+
+# Token shapes, matched against whole whitespace-separated tokens
+_IPV4 = re.compile(r"(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})(?:/(\d{1,2}))?")
+_IPV4_RANGE = re.compile(r"((?:\d{1,3}\.){3}\d{1,3})-((?:(?:\d{1,3}\.){3})?\d{1,3})")
+_IPV4_WILDCARD = re.compile(r"(?:\d{1,3}\.){1,3}\*(?:\.\*)*")
+_IPV6 = re.compile(r"[0-9A-Fa-f:]*:[0-9A-Fa-f:.]*(?:/\d{1,3})?")
+_URL = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*://(?:[^@/]*@)?(\[[0-9A-Fa-f:.]+\]|[^/:?#]+)")
+_HOSTNAME = re.compile(r"(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}")
+_UNC = re.compile(r"[/\\]{2,}([^/\\]+)")  # //host/share, \\host\share
+_ADDRESS_LIKE = re.compile(r"0[xX][0-9A-Fa-f]+(?:\.[0-9A-Fa-fxX]+)*|[0-9][0-9.,*/-]*")
+
+# Quoting and punctuation shells and LLMs wrap around arguments
+_STRIP = "'\"`,;()<>|&"
+
+# Options whose value names hosts to stay away from, not targets
+EXCLUDE_OPTIONS = frozenset({"--exclude", "--excludefile", "--exclude-hosts"})
+
+# Octet lists/ranges expanding to more leading blocks than this are checked as their enclosing range
+MAX_OCTET_BLOCKS = 4096
+
+# Single-label names that still name a host
+LOCAL_NAMES = frozenset({"localhost"})
+
+# Options whose value is a host, whatever it looks like
+HOST_OPTIONS = frozenset({
+    "--target", "--targets", "--host", "--hosts", "--hostname", "--server", "--domain", "--dc-ip",
+    "-dc-ip", "-target-ip",  # impacket
+})
+
+# Top-level domains a dotted name needs to count as a host outside a host context (URL,
+# user@host, //host/share, HOST_OPTIONS). Country codes that double as file extensions
+# (.sh, .py, .pl, .md, .rs, .so, .ai, .in, .cc, .mk, .am, .ac, .ps, .tf, .pm, .zip, .mov)
+# are left out, so "cat notes.md" or "node app.js" never send a file name to DNS.
+KNOWN_TLDS = frozenset({
+    "com", "net", "org", "edu", "gov", "mil", "int", "info", "biz", "name", "pro", "mobi", "asia",
+    "io", "co", "app", "dev", "cloud", "online", "site", "tech", "xyz", "top", "club", "shop",
+    "store", "blog", "live", "news", "page", "network", "systems", "email", "security", "bank",
+    "us", "uk", "ca", "au", "nz", "de", "fr", "nl", "be", "ch", "at", "es", "it", "pt", "ie",
+    "se", "no", "dk", "fi", "is", "cz", "sk", "hu", "ro", "bg", "gr", "si", "hr", "lt", "lv",
+    "ee", "lu", "li", "ru", "ua", "by", "kz", "cn", "jp", "kr", "tw", "hk", "sg", "my", "id",
+    "th", "vn", "ph", "za", "br", "ar", "cl", "mx", "tr", "il", "ir", "eg", "ng", "ke", "ma",
+    "ae", "sa", "qa", "eu", "me", "tv", "su",
+    # Internal and lab zones
+    "local", "localdomain", "lan", "home", "corp", "internal", "intranet", "private", "lab",
+    "test", "example", "invalid", "arpa", "htb", "thm",
+})
+
+def is_address_like(token):
+    """Whether ``token`` is something inet_aton-style parsers would take as an IPv4 target.
+
+    Covers dotted quads (including malformed ones such as ``10.0.0.256`` or
+    octal ``010.0.0.5``), nmap octet lists and ranges, hex forms
+    (``0x0a000005``) and integers of 2**24 and up (``167772165``). Short
+    dotted numbers (``2.4.49``) are left out: they are version numbers far
+    more often than addresses.
+    """
+    if not _ADDRESS_LIKE.fullmatch(token):
+        return False
+    if token[:2] in ("0x", "0X"):
+        return True
+    if token.isdigit():
+        return int(token) >= 1 << 24
+    return token.count(".") >= 3
+
+def _ipv4(match):
+    """Canonical text of a matched IPv4 address/CIDR, or None if it is not one."""
+    octets = match.group(1, 2, 3, 4)
+    if any(int(o) > 255 or (len(o) > 1 and o[0] == "0") for o in octets):
+        return None
+    prefix = match.group(5)
+    if prefix is None:
+        return ".".join(octets)
+    if int(prefix) > 32:
+        return None
+    return str(ipaddress.IPv4Network(f"{'.'.join(octets)}/{prefix}", strict=False))
+
+def _expand_range(start, end):
+    """``10.0.0.5-20`` or ``10.0.0.5-10.0.1.9`` as the CIDRs covering it."""
+    if "." not in end:
+        end = start.rsplit(".", 1)[0] + "." + end
+    first, last = ipaddress.IPv4Address(start), ipaddress.IPv4Address(end)
+    if last < first:
+        raise ValueError(f"{start}-{end}")
+    return [str(net) for net in ipaddress.summarize_address_range(first, last)]
+
+def _octet_intervals(spans):
+    """(first, last) address intervals covered by per-octet lists of (low, high) spans."""
+    # Trailing octets that span 0-255 turn each leading combination into one interval
+    k = 4
+    while k > 1 and spans[k - 1] == [(0, 255)]:
+        k -= 1
+    unit = 256 ** (4 - k)
+    leading = [[value for low, high in octet for value in range(low, high + 1)] for octet in spans[:k - 1]]
+    blocks = 1
+    for values in leading:
+        blocks *= len(values)
+    if blocks > MAX_OCTET_BLOCKS:
+        # Too many to list: the enclosing range, which is never narrower than the real set
+        first = sum(min(low for low, _ in octet) << (8 * (3 - i)) for i, octet in enumerate(spans))
+        last = sum(max(high for _, high in octet) << (8 * (3 - i)) for i, octet in enumerate(spans))
+        yield first, last
+        return
+    for lead in product(*leading):
+        base = sum(value << (8 * (3 - i)) for i, value in enumerate(lead))
+        for low, high in spans[k - 1]:
+            yield base + low * unit, base + (high + 1) * unit - 1
+
+def _expand_octets(text):
+    """nmap octet lists and ranges (``10.0.0.5,6``, ``10.0-2.0.1``) as the CIDRs covering them,
+    or None if ``text`` is not in that form."""
+    octets = text.split(".")
+    if len(octets) != 4 or not all(OCTET_RANGE.match(octet) for octet in octets):
+        return None
+    spans = []
+    for octet in octets:
+        if octet == "*":
+            spans.append([(0, 255)])
+            continue
+        pieces = []
+        for piece in octet.split(","):
+            low, _, high = piece.partition("-")
+            low, high = int(low), int(high or low)
+            if low > high or high > 255:
+                raise ValueError(text)
+            pieces.append((low, high))
+        spans.append(sorted(pieces))
+    networks = []
+    for first, last in _octet_intervals(spans):
+        networks.extend(ipaddress.summarize_address_range(ipaddress.IPv4Address(first),
+                                                          ipaddress.IPv4Address(last)))
+    return [str(net.network_address) if net.prefixlen == 32 else str(net)
+            for net in ipaddress.collapse_addresses(networks)]
+
+def _expand_wildcard(text):
+    """nmap-style ``10.0.*`` / ``10.0.0.*`` as a CIDR."""
+    fixed = [part for part in text.split(".") if part != "*"]
+    return str(ipaddress.IPv4Network(".".join(fixed + ["0"] * (4 - len(fixed))) + f"/{8 * len(fixed)}"))
+
+def _classify(token, found, files, host=False):
+    """Append the target(s) ``token`` names.
+
+    ``host`` marks a host context, where any name is a host. Elsewhere a
+    dotted name needs a known TLD and is also recorded in ``files`` (name
+    -> token), since a local file of that name means it is not a host;
+    names seen in a host context are recorded there as None.
+    """
+    if "://" in token:
+        match = _URL.match(token)
+        if match:
+            _classify(match.group(1).strip("[]"), found, files, host=True)
+        return
+    if "@" in token:
+        # user@host (ssh, smbclient, impacket): whatever follows is a host
+        _classify(token.rsplit("@", 1)[1], found, files, host=True)
+        return
+    name, sep, port = token.rpartition(":")
+    if sep and port.isdigit() and ":" not in name:
+        token = name  # host:port
+    if token.lower() in LOCAL_NAMES or (host and token and ":" not in token and not token[0].isdigit()):
+        found.append(token.lower())
+        files[token.lower()] = None
+        return
+    if token[:1].isdigit():
+        match = _IPV4.fullmatch(token)
+        if match:
+            # Malformed quads (10.0.0.256, octal 010.0.0.5) stay as they are and fail the scope check
+            found.append(_ipv4(match) or token)
+            return
+        match = _IPV4_RANGE.fullmatch(token)
+        if match:
+            found.extend(_expand_range(*match.groups()))
+            return
+        if _IPV4_WILDCARD.fullmatch(token):
+            found.append(_expand_wildcard(token))
+            return
+        networks = _expand_octets(token)
+        if networks:
+            found.extend(networks)
+            return
+        if is_address_like(token):
+            found.append(token)  # Integer/hex forms and the like: never assumed to be in scope
+            return
+    if ":" in token and _IPV6.fullmatch(token):
+        if "/" in token:
+            found.append(str(ipaddress.IPv6Network(token, strict=False)))
+        else:
+            found.append(str(ipaddress.IPv6Address(token)))
+        return
+    if "." in token and _HOSTNAME.fullmatch(token) and token.rsplit(".", 1)[1].lower() in KNOWN_TLDS:
+        found.append(token.lower())
+        files.setdefault(token.lower(), token)
+
+def extract_targets(command):
+    """Hosts, addresses, CIDRs and address ranges named in a command line.
+
+    Returns a tuple of strings accepted by ``Guardrails.is_target_safe``:
+    IPs, CIDRs (ranges and wildcards are converted), URL hosts and domain
+    names. The command is split on whitespace and each token is tested
+    against anchored patterns picked by its first characters; the parse is
+    cached per command string, while the check that drops bare names which
+    are local files runs on every call. Address-like tokens that do not parse (hex
+    or integer IPv4 forms, bad ranges) are returned unchanged, and
+    ``Guardrails`` rejects them.
+    """
+    targets, files = _candidates(command)
+    local = {name for name, token in files if os.path.exists(token)}
+    return tuple(t for t in targets if t not in local) if local else targets
+
+@lru_cache(maxsize=8192)
+def _candidates(command):
+    """Targets named in ``command``, plus (name, token) for names that are not hosts if a file."""
+    found, files = [], {}
+    skip_next = host_next = False
+    for token in command.split():
+        if skip_next:
+            skip_next = False
+            continue
+        host, host_next = host_next, False
+        if token[0] == "-":
+            option, _, token = token.partition("=")
+            if option in EXCLUDE_OPTIONS:
+                skip_next = not token
+                continue
+            if option in HOST_OPTIONS:
+                host, host_next = True, not token
+            # --target=10.0.0.1 carries a value; -sV, -p- do not
+        token = token.strip(_STRIP)
+        unc = _UNC.match(token)
+        if unc:
+            _classify(unc.group(1), found, files, host=True)  # //host/share (smbclient, mount)
+            continue
+        if "/" in token and "://" not in token and not token[:1].isdigit() and ":" not in token:
+            continue  # A path (./firmware.img, /tmp/a.out), not a host; CIDRs and IPv6 keep their "/"
+        if not token or (not host and "." not in token and ":" not in token and "@" not in token
+                         and token.lower() not in LOCAL_NAMES and not is_address_like(token)):
+            continue
+        try:
+            _classify(token, found, files, host=host)
+        except ValueError:
+            # Looked like an address but is not one (e.g. 10.0.0.9-3): left for the scope check to reject
+            if is_address_like(token):
+                found.append(token)
+    return tuple(dict.fromkeys(found)), tuple((name, token) for name, token in files.items() if token)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Guardrail micro-benchmark.
+
+Compares the original per-pattern loop (re.search per pattern, ip_network
+parsed per call) with the compiled Guardrails matcher and scope tree, both
+cold (every command unique) and warm (fan-out: the same commands against
+many hosts, repeated), plus a target check against a large exclusion list
+and full command validation (patterns plus extracted targets).
+Reports microseconds per check.
+
+Usage: python3 scripts/bench_guardrails.py [checks]
+"""
+
+import ipaddress
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents", "python-brain"))
+
+from orchestrator.guardrails import Guardrails
+from orchestrator import targets
+
+TEMPLATES = (
+    "nmap -sV -p- {host}",
+    "gobuster dir -u http://{host}/ -w /usr/share/wordlists/dirb/common.txt",
+    "enum4linux -a {host}",
+    "hydra -l admin -P rockyou.txt ssh://{host}",
+    "curl -s http://{host}/index.php | grep -i password",
+)
+
+def legacy_command(guard, command):
+    for pattern in guard.blacklisted_commands:
+        if re.search(pattern, command, re.IGNORECASE):
+            return False, f"Command contains blacklisted pattern: {pattern}"
+    return True, "Safe"
+
+def legacy_target(guard, target):
+    try:
+        ip = ipaddress.ip_address(target)
+        for network in guard.prohibited_ips:
+            if ip in ipaddress.ip_network(network):
+                return False, f"Target {target} is in prohibited range {network}"
+    except ValueError:
+        if target.lower() in ["localhost", "127.0.0.1"]:
+            return False, "Target is localhost."
+    return True, "Safe"
+
+def timed(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+def main():
+    checks = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    hosts = [f"10.{(i >> 8) & 255}.{i & 255}.{i % 200 + 1}" for i in range(checks)]
+    unique = [TEMPLATES[i % len(TEMPLATES)].format(host=host) for i, host in enumerate(hosts)]
+    # Fan-out: 500 hosts x the same templates, replayed until we have `checks` commands
+    repeated = [TEMPLATES[i % len(TEMPLATES)].format(host=hosts[i % 500]) for i in range(checks)]
+
+    guard = Guardrails()
+    print(f"{checks} checks per row, microseconds per check")
+    print(f"{'':28}{'legacy':>10}{'compiled':>10}{'speedup':>10}")
+    rows = (
+        ("command, unique", lambda c: legacy_command(guard, c), guard.is_command_safe, unique),
+        ("command, fan-out (cached)", lambda c: legacy_command(guard, c), guard.is_command_safe, repeated),
+        ("target, unique", lambda t: legacy_target(guard, t), guard.is_target_safe, hosts),
+        ("target, fan-out (cached)", lambda t: legacy_target(guard, t), guard.is_target_safe,
+         [hosts[i % 500] for i in range(checks)]),
+    )
+    for label, legacy, compiled, items in rows:
+        guard._command_decision.cache_clear()
+        guard._target_decision.cache_clear()
+        old, new = timed(legacy, items), timed(compiled, items)
+        print(f"{label:28}{old:10.2f}{new:10.2f}{old / new:9.1f}x")
+
+    # Engagement-sized exclusion list: 2000 ranges, legacy scans all of them
+    big = Guardrails()
+    big.prohibited_ips += [f"172.{16 + i // 256}.{i % 256}.0/24" for i in range(2000)]
+    big.reload()
+    sample = hosts[:max(1, checks // 100)]
+    old, new = timed(lambda t: legacy_target(big, t), sample), timed(big.is_target_safe, sample)
+    print(f"{'target, 2000 ranges':28}{old:10.2f}{new:10.2f}{old / new:9.1f}x")
+
+    # Full agent-side validation: patterns plus every target the command names
+    targets._candidates.cache_clear()
+    guard._command_decision.cache_clear()
+    guard._target_decision.cache_clear()
+    cold, warm = timed(guard.validate_command, unique), timed(guard.validate_command, repeated)
+    print(f"{'validate_command, unique':28}{'':>10}{cold:10.2f}")
+    print(f"{'validate_command, fan-out':28}{'':>10}{warm:10.2f}")
+
+if __name__ == "__main__":
+    main()
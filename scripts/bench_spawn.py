@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Spawn-latency benchmark.
+
+Runs tiny commands (the `which`/`dig +short` kind that agents issue by the
+hundred) through the legacy `subprocess.run(shell=True)` call, the executor
+with every command going through /bin/sh, and the executor's direct
+posix_spawn path for commands without shell syntax. Each is measured one
+at a time (pure latency) and as a concurrent batch (throughput).
+Reports milliseconds per command.
+
+Usage: python3 scripts/bench_spawn.py [commands]
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents", "python-brain"))
+
+from core.executor import CommandExecutor, simple_argv
+
+COMMANDS = ("true", "which sh", "uname -r", "echo probe 10.0.0.1")
+
+def legacy(cmd):
+    subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=300)
+
+def timed_sequential(run, cmds):
+    start = time.perf_counter()
+    for cmd in cmds:
+        run(cmd)
+    return (time.perf_counter() - start) / len(cmds) * 1e3
+
+def timed_batch(executor, cmds):
+    start = time.perf_counter()
+    executor.run_many_sync(cmds)
+    return (time.perf_counter() - start) / len(cmds) * 1e3
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    cmds = [COMMANDS[i % len(COMMANDS)] for i in range(count)]
+    assert all(simple_argv(cmd) for cmd in COMMANDS)
+    shell = CommandExecutor(max_concurrency=16, direct_exec=False)
+    direct = CommandExecutor(max_concurrency=16, direct_exec=True)
+    direct.run_sync("true")  # Start the shared event loop outside the timings
+
+    print(f"{count} commands per row, milliseconds per command")
+    print(f"{'':24}{'legacy':>10}{'via sh':>10}{'direct':>10}{'speedup':>10}")
+    old = timed_sequential(legacy, cmds)
+    via_sh = timed_sequential(shell.run_sync, cmds)
+    new = timed_sequential(direct.run_sync, cmds)
+    print(f"{'one at a time':24}{old:10.3f}{via_sh:10.3f}{new:10.3f}{via_sh / new:9.1f}x")
+    via_sh, new = timed_batch(shell, cmds), timed_batch(direct, cmds)
+    print(f"{'batch of ' + str(count):24}{'':>10}{via_sh:10.3f}{new:10.3f}{via_sh / new:9.1f}x")
+
+if __name__ == "__main__":
+    main()
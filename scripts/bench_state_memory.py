@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Attack-graph memory benchmark.
+
+Builds the same synthetic sweep (hosts, services, edges) twice - once with the
+original dict-per-element layout and once with the compact slotted records
+used by JsonGraphStore - and reports the traced allocation per element.
+
+Usage: python3 scripts/bench_state_memory.py [edges]
+"""
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.graph_records import EdgeRecord, NodeRecord
+
+PORTS = (21, 22, 25, 53, 80, 110, 139, 443, 445, 3389)
+
+def synthetic_sweep(edge_count):
+    """Yield (kind, host, port) tuples like an nmap sweep, one per parsed line.
+
+    Strings are formatted fresh for every element, the way parsers produce
+    them, so repeated identifiers only share memory if the layout interns them.
+    """
+    hosts = max(1, edge_count // len(PORTS))
+    for h in range(hosts):
+        yield "host", h, None
+        for port in PORTS:
+            yield "service", h, port
+
+def host_ip(h):
+    return f"10.{(h >> 16) & 255}.{(h >> 8) & 255}.{h & 255}"
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    graph = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, graph
+
+def main():
+    edge_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    sweep = list(synthetic_sweep(edge_count))
+
+    def as_dicts():
+        now = datetime.now
+        nodes, edges = [], []
+        for kind, h, port in sweep:
+            if kind == "host":
+                nodes.append({"id": host_ip(h), "type": "host", "data": {}, "timestamp": now().isoformat()})
+            else:
+                service = f"{host_ip(h)}:{port}/tcp"
+                nodes.append({"id": service, "type": "service", "data": {}, "timestamp": now().isoformat()})
+                edges.append({"source": host_ip(h), "target": f"{host_ip(h)}:{port}/tcp",
+                              "action": "exposes", "result": "open", "timestamp": now().isoformat()})
+        return nodes, edges
+
+    def as_records():
+        nodes, edges = [], []
+        for kind, h, port in sweep:
+            if kind == "host":
+                nodes.append(NodeRecord(host_ip(h), "host"))
+            else:
+                nodes.append(NodeRecord(f"{host_ip(h)}:{port}/tcp", "service"))
+                edges.append(EdgeRecord(host_ip(h), f"{host_ip(h)}:{port}/tcp", "exposes", "open"))
+        return nodes, edges
+
+    dict_bytes, (nodes, edges) = measure(as_dicts)
+    elements = len(nodes) + len(edges)
+    del nodes, edges
+    record_bytes, _ = measure(as_records)
+
+    print(f"Elements: {elements} ({edge_count} edges)")
+    print(f"dict layout:   {dict_bytes / 2**20:8.1f} MiB  ({dict_bytes / elements:6.0f} B/element)")
+    print(f"record layout: {record_bytes / 2**20:8.1f} MiB  ({record_bytes / elements:6.0f} B/element)")
+    print(f"reduction:     {dict_bytes / max(record_bytes, 1):8.1f}x")
+
+if __name__ == "__main__":
+    main()
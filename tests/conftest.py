@@ -8,3 +8,13 @@ python_brain_path = os.path.join(parent_dir, "agents", "python-brain")
 
 sys.path.insert(0, parent_dir)
 sys.path.insert(0, python_brain_path)
+
+import pytest
+
+@pytest.fixture(autouse=True, scope="session")
+def _log_dir(tmp_path_factory):
+    """Keep the runtime model, tool inventory and reports the tests create out of the source tree."""
+    from config.settings import config
+    previous, config.LOG_DIR = config.LOG_DIR, str(tmp_path_factory.mktemp("logs"))
+    yield config.LOG_DIR
+    config.LOG_DIR = previous
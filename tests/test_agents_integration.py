@@ -17,7 +17,7 @@ class TestAgentsIntegration(unittest.TestCase):
         os.makedirs(self.test_dir, exist_ok=True)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_supervisor_initialization(self, mock_state, mock_guard, mock_llm):
         """Test that Supervisor initializes correctly."""
@@ -30,7 +30,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertEqual(len(supervisor.agents), 0)  # No agents registered yet
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_agent_registration(self, mock_state, mock_guard, mock_llm):
         """Test agent registration."""
@@ -49,7 +49,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertIn("net", supervisor.agents)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_all_agents_registration(self, mock_state, mock_guard, mock_llm):
         """Test that all agents can be registered."""
@@ -116,7 +116,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertTrue(hasattr(agent, 'execute'))
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_fuzzy_agent_matching(self, mock_state, mock_guard, mock_llm):
         """Test fuzzy agent name matching."""
@@ -139,7 +139,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertIsNone(supervisor._fuzzy_match_agent("unknown_agent"))
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_mission_decomposition(self, mock_state, mock_guard, mock_llm):
         """Test mission goal decomposition."""
@@ -159,7 +159,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertIn("Scan", plan)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_decision_parsing(self, mock_state, mock_guard, mock_llm):
         """Test parsing of LLM decisions."""
@@ -182,7 +182,7 @@ class TestAgentsIntegration(unittest.TestCase):
         self.assertEqual(task2, "enumerate ports")
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_mission_execution_with_completion(self, mock_state, mock_guard, mock_llm):
         """Test mission execution that completes successfully."""
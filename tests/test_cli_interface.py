@@ -34,7 +34,7 @@ class TestCLIInterface(unittest.TestCase):
             self.fail(f"Failed to import MAS Terminal: {e}")
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_mas_terminal_initialization(self, mock_state, mock_guard, mock_llm):
         """Test that MAS Terminal initializes correctly."""
@@ -47,7 +47,7 @@ class TestCLIInterface(unittest.TestCase):
         self.assertEqual(terminal.workspace, self.test_dir)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_agent_registration(self, mock_state, mock_guard, mock_llm):
         """Test that agents are registered in MAS Terminal."""
@@ -92,7 +92,7 @@ class TestCLIInterface(unittest.TestCase):
             self.skipTest("CLI module not available")
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     def test_help_command(self, mock_state, mock_guard, mock_llm):
         """Test that help command is available."""
@@ -104,6 +104,28 @@ class TestCLIInterface(unittest.TestCase):
         self.assertTrue(hasattr(terminal, '_show_help'))
         self.assertTrue(callable(terminal._show_help))
 
+    @patch('orchestrator.supervisor.LLMAdapter')
+    @patch('orchestrator.supervisor.get_guardrails')
+    @patch('orchestrator.supervisor.StateManager')
+    def test_graph_pages_follow_live_mission(self, mock_state, mock_guard, mock_llm):
+        """'graph nodes' re-exports a grown mission and prints node ids verbatim."""
+        from interfaces import mas_terminal
+        from orchestrator.state_manager import StateManager
+
+        terminal = mas_terminal.MASTerminal(self.test_dir)
+        terminal.supervisor.state = StateManager(os.path.join(self.test_dir, "graph"))
+        terminal.supervisor.state.add_node("[bold]10.0.0.1", "host")
+        with patch.object(mas_terminal.console, "print") as printed:
+            terminal._handle_graph("nodes")
+            terminal.supervisor.state.add_node("10.0.0.2", "host")
+            terminal._handle_graph("nodes")
+        output = " ".join(str(call.args[0]) for call in printed.call_args_list)
+        self.assertIn("\\[bold]10.0.0.1", output)
+        self.assertIn("10.0.0.2", output)
+        self.assertEqual(terminal.snapshot.counts(), (2, 0))
+        terminal.snapshot.close()
+        terminal.supervisor.state.close()
+
     def test_main_entry_point(self):
         """Test that main entry point exists."""
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -17,7 +17,7 @@ class TestDemoMissions(unittest.TestCase):
         os.makedirs(self.test_dir, exist_ok=True)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_web_audit_demo(self, mock_state, mock_guard, mock_llm):
@@ -53,7 +53,7 @@ class TestDemoMissions(unittest.TestCase):
         self.assertIn("[MISSION COMPLETE]", result)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_network_recon_demo(self, mock_state, mock_guard, mock_llm):
@@ -88,7 +88,7 @@ class TestDemoMissions(unittest.TestCase):
         self.assertIn("[MISSION COMPLETE]", result)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_binary_analysis_demo(self, mock_state, mock_guard, mock_llm):
@@ -123,7 +123,7 @@ class TestDemoMissions(unittest.TestCase):
         self.assertIn("[MISSION COMPLETE]", result)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_multi_stage_attack_demo(self, mock_state, mock_guard, mock_llm):
@@ -163,7 +163,7 @@ class TestDemoMissions(unittest.TestCase):
         self.assertIn("[MISSION COMPLETE]", result)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_report_generation_demo(self, mock_state, mock_guard, mock_llm):
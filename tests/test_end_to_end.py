@@ -23,7 +23,7 @@ class TestEndToEnd(unittest.TestCase):
             shutil.rmtree(self.test_dir)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_complete_mission_workflow(self, mock_state, mock_guard, mock_llm):
@@ -74,7 +74,7 @@ class TestEndToEnd(unittest.TestCase):
         self.assertTrue(mock_state_instance.update_memory.called)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_multi_agent_coordination(self, mock_state, mock_guard, mock_llm):
@@ -117,7 +117,7 @@ class TestEndToEnd(unittest.TestCase):
         self.assertGreater(call_count, 0)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_error_recovery(self, mock_state, mock_guard, mock_llm):
@@ -151,7 +151,7 @@ class TestEndToEnd(unittest.TestCase):
         self.assertIn("[MISSION COMPLETE]", result)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_state_persistence(self, mock_state, mock_guard, mock_llm):
@@ -184,7 +184,7 @@ class TestEndToEnd(unittest.TestCase):
         self.assertTrue(mock_state_instance.export_summary.called)
 
     @patch('orchestrator.supervisor.LLMAdapter')
-    @patch('orchestrator.supervisor.Guardrails')
+    @patch('orchestrator.supervisor.get_guardrails')
     @patch('orchestrator.supervisor.StateManager')
     @patch('orchestrator.supervisor.AUTONOMOUS_MODE', False)
     def test_max_turns_limit(self, mock_state, mock_guard, mock_llm):
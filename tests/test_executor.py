@@ -0,0 +1,378 @@
+import asyncio
+import unittest
+import os
+import tempfile
+import time
+import tracemalloc
+import io
+import json
+from config.settings import config
+from core.executor import CommandExecutor, simple_argv, tool_name
+from core.result_cache import ResultCache
+from core.streaming import EVENT_PREFIX, EventStream, LineSplitter, OutputConsumer
+from core.system_agent import SystemAgent
+from core.timeout_model import TimeoutModel, signature
+
+class TestCommandExecutor(unittest.TestCase):
+    def test_tool_name(self):
+        self.assertEqual(tool_name("sudo -E nmap -sV 10.0.0.1"), "nmap")
+        self.assertEqual(tool_name("timeout 60 amass enum -d corp.test | head"), "amass")
+        self.assertEqual(tool_name("echo | openssl s_client -connect host:443"), "openssl")
+        self.assertEqual(tool_name("LANG=C /usr/bin/dig +short corp.test"), "dig")
+        self.assertEqual(tool_name("cd /tmp;nikto -h corp.test>out.txt"), "nikto")
+        self.assertEqual(tool_name("which subfinder && subfinder -d corp.test"), "which")
+
+    def test_results_and_fan_out(self):
+        executor = CommandExecutor(max_concurrency=8)
+        result = executor.run_sync("echo out; echo err >&2; exit 3")
+        usage = result.pop("usage")
+        self.assertEqual(result, {"stdout": "out\n", "stderr": "err\n", "code": 3})
+        self.assertEqual((usage["stdout_bytes"], usage["stderr_bytes"]), (4, 4))
+        start = time.monotonic()
+        results = executor.run_many_sync([f"sleep 0.3; echo {i}" for i in range(8)])
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertEqual([r["stdout"] for r in results], [f"{i}\n" for i in range(8)])
+
+    def _peak(self, executor, count):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, "log")
+            # Each command logs start/end; the log shows how many overlapped
+            executor.run_many_sync([f"sh -c 'echo + >> {log}; sleep 0.1; echo - >> {log}'"] * count)
+            peak = depth = 0
+            for line in open(log):
+                depth += 1 if line.startswith("+") else -1
+                peak = max(peak, depth)
+            return peak
+
+    def test_global_and_tool_limits(self):
+        executor = CommandExecutor(max_concurrency=3)
+        self.assertEqual(self._peak(executor, 6), 3)
+        executor = CommandExecutor(max_concurrency=8, tool_limits={"sh": 2})
+        self.assertEqual(self._peak(executor, 6), 2)
+        self.assertEqual(executor.running, 0)
+
+    def test_timeout_and_cancel(self):
+        executor = CommandExecutor()
+        start = time.monotonic()
+        result = executor.run_sync("sleep 5", timeout=0.2)
+        self.assertEqual(result["code"], -1)
+        self.assertTrue(result["timed_out"])
+        self.assertIn("timed out", result["stderr"])
+        future = executor.submit("sleep 5")
+        time.sleep(0.1)
+        future.cancel()
+        self.assertTrue(future.cancelled())
+        time.sleep(0.1)
+        self.assertEqual(executor.running, 0)
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_timeout_keeps_partial_output(self):
+        class Finish(OutputConsumer):
+            def finish(self, run_id, result):
+                self.result = result
+
+        executor = CommandExecutor()
+        finish = Finish()
+        start = time.monotonic()
+        # The background sleep is a grandchild: it has to die with the group for the pipes to close
+        result = executor.run_sync("echo 'Nmap scan report for 10.0.0.1'; echo warn >&2; sleep 30 & printf tail; wait",
+                                   timeout=0.3, consumers=[finish])
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(result["stdout"], "Nmap scan report for 10.0.0.1\ntail")
+        self.assertTrue(result["stderr"].startswith("warn\nCommand"))
+        self.assertTrue(result["timed_out"])
+        self.assertIs(finish.result, result)
+        self.assertNotIn("timed_out", executor.run_sync("true"))
+
+    def _until(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.02)
+
+    def test_job_kill_and_tail(self):
+        executor = CommandExecutor()
+        start = time.monotonic()
+        scan = executor.start("echo 'Nmap scan report for 10.0.0.1'; sleep 30; echo never")
+        other = executor.start("sleep 0.3; echo done")
+        self._until(lambda: scan.tail())
+        self.assertEqual(scan.status, "running")
+        self.assertEqual(scan.tool, "sleep")
+        self.assertEqual(scan.tail(), [("stdout", "Nmap scan report for 10.0.0.1")])
+        self.assertEqual([job.id for job in executor.jobs.list(active_only=True)], [scan.id, other.id])
+        self.assertTrue(executor.jobs.get(str(scan.id)).kill())
+        result = scan.wait(5)
+        self.assertLess(time.monotonic() - start, 2)
+        # The partial output comes back as a normal result; the other command is untouched
+        self.assertEqual(result["stdout"], "Nmap scan report for 10.0.0.1\n")
+        self.assertTrue(result["killed"] and result["stderr"].endswith("Killed by operator"))
+        self.assertEqual(scan.status, "killed")
+        self.assertFalse(scan.kill())
+        self.assertEqual(other.wait(5)["stdout"], "done\n")
+        self.assertEqual(other.status, "done")
+        self.assertGreaterEqual(other.elapsed, 0.3)
+
+    def test_job_pause_and_queued_kill(self):
+        executor = CommandExecutor(max_concurrency=1)
+        with tempfile.TemporaryDirectory() as tmp:
+            log = os.path.join(tmp, "log")
+            counter = executor.start(f"for i in 1 2 3 4 5 6 7 8 9 10; do echo $i >> {log}; sleep 0.05; done")
+            queued = executor.start("echo never")
+            self._until(lambda: os.path.exists(log))
+            self.assertTrue(counter.pause())
+            self.assertEqual(counter.status, "paused")
+            time.sleep(0.1)
+            size = os.path.getsize(log)
+            time.sleep(0.3)
+            self.assertEqual(os.path.getsize(log), size)
+            # Waiting for a slot: killed before it ever starts
+            self.assertEqual(queued.status, "queued")
+            queued.kill()
+            self.assertTrue(counter.resume())
+            self.assertEqual(counter.wait(5)["code"], 0)
+            self.assertEqual(open(log).read().split(), [str(i) for i in range(1, 11)])
+        result = queued.wait(5)
+        self.assertTrue(result["killed"])
+        self.assertNotIn("usage", result)
+        self.assertEqual(queued.status, "killed")
+
+    def test_long_lines_bounded(self):
+        splitter = LineSplitter(limit=10)
+        self.assertEqual(splitter.feed("short\r\nabc"), ["short"])
+        for _ in range(1000):
+            self.assertEqual(splitter.feed("x" * 1000), [])
+        self.assertLessEqual(splitter.size, 10)
+        self.assertEqual(splitter.feed("y\nz"), ["abc" + "x" * 7 + " [... 999994 characters not shown]"])
+        self.assertEqual(splitter.flush(), ["z"])
+        self.assertEqual(splitter.flush(), [])
+
+    def test_streaming_consumers(self):
+        class Recorder(OutputConsumer):
+            def __init__(self):
+                self.lines = []
+            def line(self, run_id, stream, text):
+                self.lines.append((stream, text, time.monotonic()))
+        class Broken(OutputConsumer):
+            def line(self, run_id, stream, text):
+                raise RuntimeError("boom")
+
+        executor = CommandExecutor()
+        events = io.StringIO()
+        executor.add_consumer(EventStream(events))
+        recorder = Recorder()
+        result = executor.run_sync("echo first; echo oops >&2; sleep 0.4; printf last",
+                                   consumers=[Broken(), recorder])
+        finished = time.monotonic()
+        self.assertEqual(result["stdout"], "first\nlast")
+        lines = [(s, t) for s, t, _ in recorder.lines]
+        # stdout and stderr are separate pipes: only the order within each is defined
+        self.assertEqual(sorted(lines[:2]), [("stderr", "oops"), ("stdout", "first")])
+        self.assertEqual(lines[2], ("stdout", "last"))
+        # The first line arrived while the command was still running
+        self.assertGreater(finished - recorder.lines[0][2], 0.3)
+        types = [json.loads(line[len(EVENT_PREFIX):])["type"] for line in events.getvalue().splitlines()]
+        self.assertEqual(types, ["start", "output", "output", "output", "exit"])
+
+    def test_consumer_backpressure(self):
+        # The pipe is not read again until a slow consumer has drained
+        class Slow(OutputConsumer):
+            def __init__(self):
+                self.lines = []
+            def line(self, run_id, stream, text):
+                self.lines.append(text)
+            async def drain(self):
+                self.drained = len(self.lines)
+                await asyncio.sleep(0.3)
+
+        slow = Slow()
+        started = time.monotonic()
+        result = CommandExecutor().run_sync("echo a", consumers=[slow])
+        self.assertEqual(result["stdout"], "a\n")
+        self.assertEqual(slow.drained, 1)
+        self.assertGreater(time.monotonic() - started, 0.3)
+
+    def test_stream_sync(self):
+        items = list(CommandExecutor().stream_sync("echo a; echo b"))
+        self.assertEqual(items[:2], [("stdout", "a"), ("stdout", "b")])
+        self.assertEqual(items[2][0], "result")
+        self.assertEqual(items[2][1]["stdout"], "a\nb\n")
+
+    def test_output_spooling(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = CommandExecutor(artifact_dir=tmp, output_limit=64 * 1024)
+            small = executor.run_sync("echo small")
+            self.assertEqual(small["stdout"], "small\n")
+            self.assertNotIn("stdout_artifact", small)
+
+            tracemalloc.start()
+            try:
+                result = executor.run_sync("seq 1 2000000")
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            artifact = result["stdout_artifact"]
+            self.assertLess(peak, 4 * 1024 * 1024)  # ~14 MB of output
+            self.assertTrue(result["stdout"].startswith("1\n2\n"))
+            self.assertTrue(result["stdout"].endswith("1999999\n2000000\n"))
+            self.assertIn("characters not shown", result["stdout"])
+            self.assertLessEqual(len(result["stdout"]), 64 * 1024 + 200)
+            self.assertEqual(artifact.size, os.path.getsize(artifact.path))
+            self.assertEqual(sum(1 for _ in artifact.lines()), 2000000)
+            mapped = artifact.mmap()
+            self.assertEqual(mapped[-8:], b"2000000\n")
+            mapped.close()
+
+    def test_resource_usage(self):
+        executor = CommandExecutor()
+        script = "bytearray(64 * 1024 * 1024); sum(range(3000000)); print('x' * 999)"
+        usage = executor.run_sync(f'python3 -c "{script}"')["usage"]
+        self.assertEqual(usage["tool"], "python3")
+        self.assertEqual(usage["stdout_bytes"], 1000)
+        self.assertGreater(usage["cpu_user"] + usage["cpu_sys"], 0.01)
+        self.assertGreater(usage["max_rss_kb"], 64 * 1024)
+        # Killed commands are still accounted for
+        usage = executor.run_sync("sleep 5", timeout=0.2)["usage"]
+        self.assertGreaterEqual(usage["wall"], 0.2)
+        self.assertIn("cpu_user", usage)
+
+    def test_simple_argv(self):
+        self.assertEqual(simple_argv("nmap -sn '10.0.0.0/24'"), ["nmap", "-sn", "10.0.0.0/24"])
+        self.assertEqual(simple_argv("grep 'a|b' f"), ["grep", "a|b", "f"])
+        for cmd in ["ip addr | grep inet", "dig x 2>/dev/null", "ls *.txt", 'echo "$HOME"',
+                    "cd /tmp", "LANG=C which nmap", "echo $(id)", "echo 'open"]:
+            self.assertIsNone(simple_argv(cmd), cmd)
+
+    def test_direct_exec(self):
+        executor = CommandExecutor()
+        # Spawned without /bin/sh in between: the executor's process is the parent
+        result = executor.run_sync("python3 -c 'import os; print(os.getppid())'")
+        self.assertEqual(result["stdout"], f"{os.getpid()}\n")
+        missing = executor.run_sync("no-such-tool-xyz --version")
+        self.assertEqual(missing["code"], 127)
+        self.assertIn("no-such-tool-xyz", missing["stderr"])
+        # Shell syntax still gets a shell, with the same exit codes
+        self.assertEqual(executor.run_sync("echo $((1 + 1))")["stdout"], "2\n")
+        self.assertEqual(executor.run_sync("no-such-tool-xyz 2>/dev/null")["code"], 127)
+        shell = CommandExecutor(direct_exec=False)
+        self.assertEqual(shell.run_sync("echo 'a  b'")["stdout"], "a  b\n")
+
+    def test_result_cache(self):
+        now = [0.0]
+        cache = ResultCache({"echo": 60, "echo -n": 5}, clock=lambda: now[0])
+        self.assertEqual(cache.ttl(["echo", "-n", "x"]), 5)
+        self.assertEqual(cache.ttl(["/bin/echo", "x"]), 60)
+        self.assertIsNone(cache.ttl(["date"]))
+        # Subcommands must lead, "$" allows nothing more, output files are never cached
+        policies = ResultCache({"ip addr show": 60, "ifconfig $": 60, "nmap -sn": 300})
+        self.assertEqual(policies.ttl(["ip", "-4", "addr", "show", "dev", "eth0"]), 60)
+        self.assertIsNone(policies.ttl(["ip", "link", "set", "dev", "eth0", "down"]))
+        self.assertIsNone(policies.ttl(["ip", "addr", "add", "10.0.0.5/24", "dev", "eth0"]))
+        self.assertEqual(policies.ttl(["ifconfig"]), 60)
+        self.assertIsNone(policies.ttl(["ifconfig", "eth0", "10.0.0.5", "up"]))
+        self.assertEqual(policies.ttl(["nmap", "-T4", "-sn", "10.0.0.0/24"]), 300)
+        self.assertIsNone(policies.ttl(["nmap", "-sn", "-oX", "out.xml", "10.0.0.0/24"]))
+        cache.put(["echo", "x"], {"stdout": "x\n"}, 60)
+        self.assertEqual(cache.get(["echo", "x"]), {"stdout": "x\n"})
+        now[0] = 61
+        self.assertIsNone(cache.get(["echo", "x"]))
+        self.assertEqual(cache.stats["echo"], {"hits": 1, "misses": 1})
+        cache.put(["echo", "y"], {"stdout": "y\n"}, 60)
+        self.assertEqual(cache.invalidate("echo"), 1)
+        self.assertIsNone(cache.get(["echo", "y"]))
+
+    def test_executor_cache(self):
+        class Recorder(OutputConsumer):
+            def __init__(self):
+                self.events = []
+            def start(self, run_id, cmd):
+                self.events.append("start")
+            def line(self, run_id, stream, text):
+                self.events.append(text)
+            def finish(self, run_id, result):
+                self.events.append("finish")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = CommandExecutor(cache_ttls={"date": 60, "cat": 60})
+            first = executor.run_sync("date +%N")
+            recorder = Recorder()
+            second = executor.run_sync("date +%N", consumers=[recorder])
+            self.assertTrue(second["cached"])
+            self.assertEqual(second["stdout"], first["stdout"])
+            self.assertEqual(recorder.events, ["start", first["stdout"].strip(), "finish"])
+            self.assertNotIn("cached", executor.run_sync("date +%N", cache=False))
+            # Pipelines, redirects and commands without a policy always run
+            self.assertNotIn("cached", executor.run_sync("date +%N | cat"))
+            self.assertNotIn("cached", executor.run_sync("date +%N | cat"))
+            path = os.path.join(tmp, "f")
+            self.assertEqual(executor.run_sync(f"cat {path}")["code"], 1)
+            self.assertEqual(executor.cache.stats["date"], {"hits": 1, "misses": 1})
+            self.assertEqual(executor.invalidate_cache(), 2)
+            self.assertEqual(executor.run_sync("date +%N")["code"], 0)
+            self.assertEqual(executor.cache.stats["date"]["misses"], 2)
+            # Through the SystemAgent: bypass and invalidate
+            agent = SystemAgent()
+            agent.executor = executor
+            self.assertNotIn("cached", agent.execute("date +%N", cache=False))
+            self.assertTrue(agent.execute("date +%N")["cached"])
+            self.assertEqual(agent.invalidate_cache("date"), 1)
+            self.assertNotIn("cached", agent.execute("date +%N"))
+        # Live recon is never cached unless configured to be
+        defaults = ResultCache(config.EXEC_CACHE_TTLS)
+        for argv in (["nmap", "-sn", "10.0.0.0/24"], ["dig", "corp.local"], ["ip", "addr"]):
+            self.assertIsNone(defaults.ttl(argv))
+
+    def test_timeout_model(self):
+        self.assertEqual(signature("nmap", "sudo nmap -sV -p- 10.0.0.1"), signature("nmap", "nmap -p- -sV 10.0.0.9"))
+        self.assertNotEqual(signature("nmap", "nmap -sn 10.0.0.0/24"), signature("nmap", "nmap -p- 10.0.0.1"))
+        # Target width is part of the class: a /24 is not a single host
+        self.assertEqual(signature("nmap", "nmap -p- 10.0.0.0/24"), "nmap -p- x256")
+        self.assertEqual(signature("nmap", "nmap -p- 10.0.0.1-50 10.0.1.9"), "nmap -p- x64")
+        self.assertEqual(signature("nmap", "nmap -p- 10.0.0.7"), "nmap -p-")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "runtimes.json")
+            model = TimeoutModel(path, default=300, minimum=10, maximum=3600, margin=3.0, slack=5.0)
+            self.assertEqual(model.deadline("nmap", "nmap -p- 10.0.0.1"), 300)
+            for seconds in (100, 120, 110, 130, 125):
+                model.record("nmap", "nmap -p- 10.0.0.1", seconds)
+            self.assertEqual(model.deadline("nmap", "nmap -p- 10.0.0.2"), 130 * 3 + 5)
+            # Unseen flags or target widths get the default, never a shorter deadline
+            self.assertEqual(model.deadline("nmap", "nmap -sV -p- 10.0.0.2"), 300)
+            self.assertEqual(model.deadline("nmap", "nmap -p- 10.0.0.0/24"), 300)
+            for _ in range(5):
+                model.record("nmap", "nmap -sn 10.0.0.1", 0.8)
+            self.assertEqual(model.deadline("nmap", "nmap -sn 10.0.0.9"), 10)
+            self.assertEqual(model.deadline("nmap", "nmap -p- -sV -T4 10.0.0.0/24"), 300)
+            for _ in range(5):
+                model.record("which", "which nmap", 0.01)
+            self.assertEqual(model.deadline("which", "which hydra"), 10)
+            # A scan cut short gets twice as long next time, capped at the maximum
+            model.record("nmap", "nmap -p- 10.0.0.3", 395, timed_out=True)
+            self.assertEqual(model.deadline("nmap", "nmap -p- 10.0.0.2"), 790)
+            model.record("nmap", "nmap -p- 10.0.0.3", 700)
+            self.assertLess(model.deadline("nmap", "nmap -p- 10.0.0.2"), 3600)
+            model.save()
+            reloaded = TimeoutModel(path, default=300, minimum=10, maximum=3600, margin=3.0, slack=5.0)
+            self.assertEqual(reloaded.deadline("nmap", "nmap -p- 10.0.0.2"), model.deadline("nmap", "nmap -p- 10.0.0.2"))
+
+    def test_adaptive_deadlines(self):
+        model = TimeoutModel(default=300, minimum=0.3, maximum=10, margin=2.0, slack=0.0)
+        executor = CommandExecutor(timeouts=model)
+        executor.run_many_sync(["sleep 0.01"] * 5)
+        start = time.monotonic()
+        # Hung compared with its history: killed at the minimum instead of after 300 s
+        self.assertTrue(executor.run_sync("sleep 30")["timed_out"])
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(model.deadline("sleep", "sleep 30"), 0.6)
+        # An explicit timeout wins, and hitting it does not count against the learned deadline
+        self.assertTrue(executor.run_sync("sleep 30", timeout=0.1)["timed_out"])
+        self.assertEqual(model.deadline("sleep", "sleep 30"), 0.6)
+        self.assertNotIn("timed_out", executor.run_sync("sleep 0.7", timeout=5))
+
+    def test_system_agent_execute_many(self):
+        agent = SystemAgent()
+        results = agent.execute_many(["echo a", "rm -rf /tmp/nothing", "echo b"])
+        self.assertEqual([r["stdout"] for r in results], ["a\n", "", "b\n"])
+        self.assertIn("Safety Protocol", results[1]["stderr"])
+
+if __name__ == '__main__':
+    unittest.main()
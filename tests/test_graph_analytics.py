@@ -0,0 +1,81 @@
+import unittest
+import os
+import shutil
+from orchestrator.graph_analytics import AttackGraphAnalytics
+from orchestrator.state_manager import StateManager
+
+class TestGraphAnalytics(unittest.TestCase):
+    def setUp(self):
+        # foothold -> web -> db -> dc, plus a noisy failed shortcut and an island
+        nodes = ["foothold", "web", "db", "dc", "island_a", "island_b"]
+        types = {"foothold": "host", "web": "host", "db": "host", "dc": "credential",
+                 "island_a": "host", "island_b": "host"}
+        edges = [
+            ("foothold", "web", "exploit", "success"),
+            ("web", "db", "pivot", "success"),
+            ("db", "dc", "dump", "success"),
+            ("foothold", "dc", "bruteforce", "failed"),
+            ("island_a", "island_b", "scan", "open"),
+            ("supervisor", "net", "delegate: scan", "Done"),
+        ]
+        self.analytics = AttackGraphAnalytics(nodes, types, edges)
+
+    def test_paths(self):
+        self.assertEqual(self.analytics.shortest_path("foothold", "dc"), ["foothold", "dc"])
+        cost, path = self.analytics.cheapest_path("foothold", "dc")
+        self.assertEqual(path, ["foothold", "web", "db", "dc"])
+        self.assertEqual(cost, 3.0)
+        self.assertIsNone(self.analytics.shortest_path("dc", "foothold"))
+        paths = sorted(self.analytics.cheapest_paths("foothold", ["dc", "db", "island_a", "nowhere"]))
+        self.assertEqual(paths, [(2.0, ["foothold", "web", "db"]), (3.0, ["foothold", "web", "db", "dc"])])
+
+    def test_reachability_and_components(self):
+        self.assertEqual(self.analytics.reachable("foothold"), {"foothold", "web", "db", "dc"})
+        groups = self.analytics.components()
+        self.assertEqual(sorted(groups[0]), ["db", "dc", "foothold", "web"])
+        # Delegation bookkeeping is excluded from the graph
+        self.assertNotIn("supervisor", self.analytics.index)
+
+    def test_choke_points(self):
+        top = self.analytics.choke_points(k=2)
+        self.assertEqual({node for node, _ in top}, {"web", "db"})
+
+    def test_facts(self):
+        facts = self.analytics.facts(foothold="foothold")
+        self.assertTrue(any("Cheapest path to dc" in f and "foothold -> web -> db -> dc" in f for f in facts))
+        self.assertTrue(any("disconnected clusters" in f for f in facts))
+
+class TestStateAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "/tmp/stingbot_test_analytics"
+        self.state = StateManager(self.test_dir)
+
+    def tearDown(self):
+        self.state.close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_facts_follow_mutations(self):
+        self.state.update_memory("foothold", "10.0.0.1")
+        self.state.add_node("10.0.0.1", "host")
+        self.state.add_node("10.0.0.2", "host")
+        self.state.add_edge("10.0.0.1", "10.0.0.2", "pivot", "success")
+        facts = self.state.attack_path_facts("Reach 10.0.0.2")
+        self.assertTrue(any("10.0.0.1 -> 10.0.0.2" in f for f in facts))
+
+        self.state.add_node("10.0.0.3", "host")
+        self.state.add_edge("10.0.0.2", "10.0.0.3", "pivot", "success")
+        facts = self.state.attack_path_facts("Reach 10.0.0.3")
+        self.assertTrue(any("10.0.0.1 -> 10.0.0.2 -> 10.0.0.3" in f for f in facts))
+
+    def test_supervisor_edges_keep_analytics(self):
+        self.state.add_node("10.0.0.1", "host")
+        analytics = self.state.analytics()
+        # Per-turn delegation bookkeeping is not part of the analysed graph
+        self.state.add_edge("supervisor", "net", "delegate: scan", "Done")
+        self.assertIs(self.state.analytics(), analytics)
+        self.state.add_edge("10.0.0.1", "10.0.0.2", "pivot", "success")
+        self.assertIsNot(self.state.analytics(), analytics)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+import shutil
+from unittest.mock import patch
+from orchestrator import graph_snapshot
+from orchestrator.graph_snapshot import GraphSnapshot, write_snapshot
+from orchestrator.state_manager import StateManager, service_id
+
+class TestGraphSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "/tmp/stingbot_test_snapshot"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.state = StateManager(self.test_dir)
+        self.state.add_node("10.0.0.1", "host", {"os": "Linux"})
+        for port in (22, 80, 443):
+            self.state.add_node(service_id("10.0.0.1", port), "service", {"port": port})
+            self.state.add_edge("10.0.0.1", service_id("10.0.0.1", port), "nmap_scan", "open")
+        self.state.update_memory("foothold", "10.0.0.1")
+
+    def tearDown(self):
+        self.state.close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_round_trip(self):
+        path = self.state.export_snapshot()
+        with StateManager.open_snapshot(path) as snapshot:
+            self.assertEqual(snapshot.counts(), (4, 3))
+            self.assertEqual(snapshot.node(0).to_dict(), self.state.graph["nodes"][0].to_dict())
+            self.assertEqual([e.to_dict() for e in snapshot.iter_edges()],
+                             [e.to_dict() for e in self.state.graph["edges"]])
+            self.assertEqual(snapshot.memory, {"foothold": "10.0.0.1"})
+
+    def test_paging_and_lookup(self):
+        with StateManager.open_snapshot(self.state.export_snapshot()) as snapshot:
+            self.assertEqual([n["id"] for n in snapshot.nodes(1, 2)],
+                             [service_id("10.0.0.1", 22), service_id("10.0.0.1", 80)])
+            self.assertEqual(snapshot.edges(2, 10)[0]["target"], service_id("10.0.0.1", 443))
+            self.assertEqual(snapshot.nodes(10, 5), [])
+            self.assertEqual(snapshot.get_node(service_id("10.0.0.1", 80))["data"], {"port": 80})
+            self.assertIsNone(snapshot.get_node("10.0.0.9"))
+
+    def test_chunked_write(self):
+        # Sections are packed a few records at a time; ids sort by UTF-8 bytes
+        ids = ["b", "\u00e9", "a", "\U0001f600", "z", "\uffff", "c"]
+        path = os.path.join(self.test_dir, "chunked.sgb")
+        with patch.object(graph_snapshot, "CHUNK", 3):
+            write_snapshot(path, ({"id": i, "type": "host", "data": {"n": n}} for n, i in enumerate(ids)),
+                           ({"source": i, "target": "a", "action": "scan", "result": "ok"} for i in ids),
+                           memory={"k": "v"})
+        with GraphSnapshot(path) as snapshot:
+            self.assertEqual(snapshot.counts(), (7, 7))
+            self.assertEqual([n["id"] for n in snapshot.iter_nodes()], ids)
+            for n, i in enumerate(ids):
+                self.assertEqual(snapshot.get_node(i)["data"], {"n": n})
+            self.assertEqual(snapshot.edge(6)["source"], "c")
+            self.assertEqual(snapshot.memory, {"k": "v"})
+        self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_empty_graph_and_bad_file(self):
+        path = os.path.join(self.test_dir, "empty.sgb")
+        write_snapshot(path, [], [])
+        with GraphSnapshot(path) as snapshot:
+            self.assertEqual(snapshot.counts(), (0, 0))
+            self.assertIsNone(snapshot.get_node("x"))
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot, just some bytes that are long enough to cover a header....")
+        with self.assertRaises(ValueError):
+            GraphSnapshot(path)
+
+if __name__ == '__main__':
+    unittest.main()
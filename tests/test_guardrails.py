@@ -1,5 +1,5 @@
 import unittest
-from orchestrator.guardrails import Guardrails
+from orchestrator.guardrails import Guardrails, get_guardrails
 
 class TestGuardrails(unittest.TestCase):
     def setUp(self):
@@ -56,5 +56,29 @@ class TestGuardrails(unittest.TestCase):
             safe, reason = self.guard.is_command_safe(cmd)
             self.assertTrue(safe, f"Should have allowed: {cmd}")
 
+    def test_decision_cache_and_rule_edits(self):
+        safe, reason = self.guard.is_command_safe("CHMOD -r 777 /")
+        self.assertFalse(safe)
+        self.assertIn(r"chmod\s+-R\s+777\s+/", reason)
+
+        for _ in range(3):
+            self.guard.is_command_safe("nmap -sV 10.0.0.5")
+        self.assertEqual(self.guard.cache_info()["command"].hits, 2)
+
+        # Edited rule lists take effect without re-instantiating
+        self.guard.blacklisted_commands.append(r"shutdown")
+        self.assertFalse(self.guard.is_command_safe("sudo SHUTDOWN -h now")[0])
+        self.guard.prohibited_ips.append("10.0.0.0/8")
+        self.assertFalse(self.guard.is_target_safe("10.0.0.5")[0])
+        self.assertEqual(self.guard.cache_info()["command"].currsize, 0)
+
+    def test_one_instance_for_agents(self):
+        from agents.critic import CriticAgent
+        from tools_mcp.terminal_server import TerminalServer
+        shared = get_guardrails()
+        self.assertIs(CriticAgent().guard, shared)
+        self.assertIs(TerminalServer().guard, shared)
+        self.assertIs(TerminalServer(guard=self.guard).guard, self.guard)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import os
+import shutil
+import threading
+from orchestrator.ingest import StreamIngester, detect_tool, ingest_command
+from orchestrator.state_manager import StateManager, service_id
+
+NMAP_OUTPUT = """
+Starting Nmap 7.94 ( https://nmap.org )
+Nmap scan report for 10.0.0.5
+Host is up (0.0010s latency).
+PORT    STATE    SERVICE VERSION
+22/tcp  open     ssh     OpenSSH 8.9p1
+80/tcp  open     http    Apache httpd 2.4.52
+445/tcp filtered microsoft-ds
+OS details: Linux 5.4
+"""
+
+GOBUSTER_OUTPUT = """
+/admin                (Status: 301) [Size: 312]
+/index.php            (Status: 200) [Size: 1024]
+"""
+
+ENUM4LINUX_OUTPUT = r"""
+Domain: WORKGROUP
+        \\10.0.0.5\public
+        \\10.0.0.5\IPC$
+user:[alice] rid:[0x3e8]
+user:[bob] rid:[0x3e9]
+"""
+
+HYDRA_OUTPUT = """
+Hydra v9.4 (c) 2022 starting at 2024-01-01 (ssh)
+[22][ssh] host: 10.0.0.5   login: alice   password: Winter2024
+"""
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = "/tmp/stingbot_test_ingest"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.state = StateManager(self.test_dir)
+
+    def tearDown(self):
+        self.state.close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_detect_tool(self):
+        self.assertEqual(detect_tool("nmap -sV 10.0.0.5")[0], "nmap")
+        self.assertEqual(detect_tool("sudo /usr/bin/nmap -sS 10.0.0.5 | tee out.txt")[0], "nmap")
+        self.assertEqual(detect_tool("timeout 60 gobuster dir -u http://x -w list")[0], "gobuster")
+        self.assertEqual(detect_tool("enum4linux-ng -A 10.0.0.5")[0], "enum4linux")
+        self.assertEqual(detect_tool("ls -la")[0], "ls")
+
+    def test_nmap(self):
+        tool, added, edges = ingest_command(self.state, "nmap -sV 10.0.0.5", NMAP_OUTPUT)
+        self.assertEqual((tool, added, edges), ("nmap", 4, 3))
+        ssh = self.state.get_node(service_id("10.0.0.5", 22))
+        self.assertEqual(ssh["data"]["name"], "ssh")
+        self.assertEqual(self.state.hosts_with_open_port(80), ["10.0.0.5"])
+        self.assertEqual(self.state.hosts_with_open_port(445), [])
+        self.assertEqual(self.state.get_node("10.0.0.5")["data"]["os"], "Linux 5.4")
+
+    def test_web_smb_and_credentials(self):
+        ingest_command(self.state, "gobuster dir -u http://10.0.0.5/ -w common.txt", GOBUSTER_OUTPUT)
+        ingest_command(self.state, "enum4linux -a 10.0.0.5", ENUM4LINUX_OUTPUT)
+        ingest_command(self.state, "hydra -l alice -P rockyou.txt ssh://10.0.0.5", HYDRA_OUTPUT)
+        self.assertEqual(self.state.get_node("http://10.0.0.5/admin")["data"]["status"], 301)
+        self.assertEqual(sorted(n["id"] for n in self.state.nodes_by_type("share")),
+                         ["//10.0.0.5/IPC$", "//10.0.0.5/public"])
+        self.assertEqual(len(self.state.nodes_by_type("user")), 2)
+        cred = self.state.get_node("ssh://alice@10.0.0.5")
+        self.assertEqual(cred["type"], "credential")
+        self.assertEqual(cred["data"]["password"], "Winter2024")
+        # All findings hang off the one host node
+        self.assertEqual(len(self.state.nodes_by_type("host")), 1)
+
+    def test_unknown_tool_writes_nothing(self):
+        self.assertEqual(ingest_command(self.state, "curl http://10.0.0.5", "<html>"), (None, 0, 0))
+        self.assertEqual(self.state.counts(), (0, 0))
+
+    def test_streaming_ingest_before_exit(self):
+        ingester = StreamIngester(self.state, "nmap -sV 10.0.0.0/24")
+        writers = []
+        bulk_add = self.state.bulk_add
+        self.state.bulk_add = lambda *args: writers.append(threading.current_thread().name) or bulk_add(*args)
+        for text in NMAP_OUTPUT.split("\n") + ["Nmap scan report for 10.0.0.6"]:
+            ingester.line(1, "stdout", text)
+        # The output hook only queues the record: the event loop thread never writes state
+        self.assertNotIn(threading.current_thread().name, writers)
+        ingester.drain()
+        # First host block is in the graph while the scan is still going
+        self.assertEqual(len(writers), 1)
+        self.assertEqual(self.state.hosts_with_open_port(22), ["10.0.0.5"])
+        self.assertIsNone(self.state.get_node("10.0.0.6"))
+        ingester.line(1, "stdout", "22/tcp open ssh OpenSSH 9.0")
+        ingester.finish(1, {})
+        ingester.drain()
+        self.assertEqual(sorted(self.state.hosts_with_open_port(22)), ["10.0.0.5", "10.0.0.6"])
+        self.assertEqual(self.state.get_node("10.0.0.5")["data"].get("os"), "Linux 5.4")
+
+        hydra = StreamIngester(self.state, "hydra -l alice -P words.txt ssh://10.0.0.5")
+        for text in HYDRA_OUTPUT.split("\n"):
+            hydra.line(2, "stdout", text)
+        hydra.drain()
+        self.assertIsNotNone(self.state.get_node("ssh://alice@10.0.0.5"))
+
+if __name__ == '__main__':
+    unittest.main()
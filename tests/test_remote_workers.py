@@ -0,0 +1,221 @@
+import unittest
+import json
+import os
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+from core import remote
+from core.event_loop import run_sync
+from core.executor import CommandExecutor
+from core.remote import WorkerPool, open_address, receive, send, sign
+from core.streaming import OutputConsumer
+
+BRAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agents", "python-brain")
+SECRET = "test-secret"
+
+def start_worker(address, name, tools):
+    """A local worker process standing in for a scanner node."""
+    proc = subprocess.Popen([sys.executable, "-m", "core.worker", "--listen", address, "--name", name, "--tools", tools],
+                            cwd=BRAIN, env=dict(os.environ, STINGBOT_WORKER_SECRET=SECRET, STINGBOT_WORKERS=""),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in proc.stdout:
+        if "listening on" in line:
+            return proc
+    raise RuntimeError(f"worker {name} did not start")
+
+class FakeWorker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Authenticates like a worker, then answers each "run" with ``reply(message)`` raw lines."""
+    daemon_threads = True
+
+    def __init__(self, path, tools, reply):
+        self.tools, self.reply = tools, reply
+        super().__init__(path, FakeWorkerHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+class FakeWorkerHandler(socketserver.StreamRequestHandler):
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode() + b"\n")
+
+    def handle(self):
+        self._send({"type": "hello", "name": "fake", "nonce": "n", "tools": self.server.tools, "slots": 4})
+        auth = json.loads(self.rfile.readline())
+        self._send({"type": "ready", "mac": sign(SECRET, "worker", auth["nonce"])})
+        for line in self.rfile:
+            message = json.loads(line)
+            if message["type"] == "signal":
+                return  # The client gave up on the run: hang up
+            if message["type"] != "run":
+                continue
+            lines = self.server.reply(message)
+            if lines is None:
+                return  # Drop the connection
+            for raw in lines:
+                self.wfile.write(raw + b"\n")
+
+class Recorder(OutputConsumer):
+    def __init__(self):
+        self.lines = []
+
+    def line(self, run_id, stream, text):
+        self.lines.append((text, time.monotonic()))
+
+class TestRemoteWorkers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.addresses = [f"unix://{cls.tmp.name}/node{i}.sock" for i in range(2)]
+        cls.procs = [start_worker(cls.addresses[0], "node0", "seq,sleep"),
+                     start_worker(cls.addresses[1], "node1", "seq,sleep,uname")]
+
+    @classmethod
+    def tearDownClass(cls):
+        for proc in cls.procs:
+            proc.kill()
+            proc.wait()
+        cls.tmp.cleanup()
+
+    def _executor(self, addresses=None, secret=SECRET):
+        return CommandExecutor(workers=WorkerPool(addresses or self.addresses, secret))
+
+    def test_placement_by_tool(self):
+        executor = self._executor()
+        result = executor.run_sync("uname -s")
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(result["usage"]["node"], "node1")
+        self.assertEqual(executor.run_sync("seq 3")["stdout"], "1\n2\n3\n")
+        # No worker offers `id`: it runs on this box
+        local = executor.run_sync("id -u")
+        self.assertEqual(local["stdout"], f"{os.getuid()}\n")
+        self.assertNotIn("node", local["usage"])
+
+    def test_load_spreads_across_workers(self):
+        executor = self._executor()
+        start = time.monotonic()
+        results = executor.run_many_sync(["sleep 0.3"] * 6)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual({r["usage"]["node"] for r in results}, {"node0", "node1"})
+
+    def test_streaming_and_timeout(self):
+        recorder = Recorder()
+        executor = self._executor()
+        result = executor.run_sync("seq 2 && sleep 0.5", consumers=[recorder])
+        self.assertEqual(result["stdout"], "1\n2\n")
+        self.assertEqual([text for text, _ in recorder.lines], ["1", "2"])
+        self.assertGreater(time.monotonic() - recorder.lines[0][1], 0.3)
+        timed_out = executor.run_sync("sleep 30", timeout=0.3)
+        self.assertTrue(timed_out["timed_out"])
+        self.assertIn("node", timed_out["usage"])
+
+    def test_kill_on_worker(self):
+        executor = self._executor()
+        job = executor.start("seq 2 && sleep 30")
+        deadline = time.monotonic() + 5
+        while len(job.tail()) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertIn(job.node, ("node0", "node1"))
+        self.assertTrue(job.kill())
+        result = job.wait(5)
+        self.assertEqual(result["stdout"], "1\n2\n")
+        self.assertTrue(result["killed"])
+        self.assertEqual(result["usage"]["node"], job.node)
+        self.assertEqual(job.status, "killed")
+
+    def test_authentication(self):
+        # A client with the wrong secret is refused, and the command runs locally
+        executor = self._executor(secret="wrong")
+        result = executor.run_sync("seq 1")
+        self.assertEqual(result["stdout"], "1\n")
+        self.assertNotIn("node", result["usage"])
+
+        async def impostor():
+            reader, writer = await open_address(self.addresses[0])
+            await receive(reader)
+            await send(writer, {"type": "auth", "mac": "0" * 64, "nonce": "x"})
+            reply = await receive(reader)
+            writer.close()
+            return reply
+
+        self.assertIsNone(run_sync(impostor()))
+
+    def test_malformed_client_messages(self):
+        # The worker drops a client that breaks the protocol and keeps serving others
+        async def client(auth_mac, message):
+            reader, writer = await open_address(self.addresses[0])
+            hello = await receive(reader)
+            await send(writer, {"type": "auth", "mac": auth_mac(hello["nonce"]), "nonce": "x"})
+            ready = await receive(reader)
+            if ready is not None:
+                await send(writer, message)
+                ready = await receive(reader)
+            writer.close()
+            return ready
+
+        good = lambda nonce: sign(SECRET, "client", nonce)
+        self.assertIsNone(run_sync(client(lambda nonce: 7, {})))
+        self.assertIsNone(run_sync(client(lambda nonce: "\u00e9" * 64, {})))
+        for message in ({"type": "run", "id": [1], "cmd": "seq 1"}, {"type": "run", "id": 1, "cmd": 5},
+                        {"type": "run", "id": 1, "cmd": "seq 1", "timeout": "soon"},
+                        {"type": "signal", "id": 1, "action": "explode"}, {"type": "cancel"}, {"type": "hello", "id": 1}):
+            self.assertIsNone(run_sync(client(good, message)), message)
+        self.assertEqual(run_sync(client(good, {"type": "run", "id": 1, "cmd": "seq 1"})),
+                         {"type": "line", "id": 1, "stream": "stdout", "text": "1"})
+        self.assertEqual(self._executor().run_sync("seq 1")["stdout"], "1\n")
+
+    def _fake(self, name, reply):
+        fake = FakeWorker(os.path.join(self.tmp.name, name), ["seq"], reply)
+        self.addCleanup(fake.server_close)
+        self.addCleanup(fake.shutdown)
+        return f"unix://{self.tmp.name}/{name}"
+
+    def test_malformed_messages_fall_back(self):
+        # Garbage, or an exit message without a proper result, drops the worker instead of hanging
+        for name, raw in (("garbage.sock", b"not json"), ("badexit.sock", b'{"type": "exit", "id": 1, "result": 3}')):
+            executor = self._executor([self._fake(name, lambda message, raw=raw: [raw])])
+            start = time.monotonic()
+            result = executor.run_sync("seq 2", timeout=5)
+            self.assertLess(time.monotonic() - start, 3)
+            self.assertEqual(result["stdout"], "1\n2\n")
+            self.assertNotIn("node", result["usage"])
+
+    def test_silent_worker_times_out(self):
+        executor = self._executor([self._fake("silent.sock", lambda message: [])])
+        with patch.object(remote, "RESULT_GRACE", 0.2):
+            start = time.monotonic()
+            result = executor.run_sync("seq 1", timeout=0.3)
+        self.assertLess(time.monotonic() - start, 3)
+        self.assertEqual(result["stdout"], "1\n")
+
+    def test_retry_does_not_replay_output(self):
+        def half(message):
+            return [json.dumps({"type": "line", "id": message["id"], "stream": "stdout", "text": text}).encode()
+                    for text in ("1", "2")] + [b"not json"]
+
+        recorder = Recorder()
+        executor = self._executor([self._fake("half.sock", half), self.addresses[0]])
+        result = executor.run_sync("seq 3", consumers=[recorder])
+        self.assertEqual(result["usage"]["node"], "node0")
+        self.assertEqual([text for text, _ in recorder.lines], ["1", "2", "3"])
+
+    def test_retry_when_worker_lost(self):
+        address = f"unix://{self.tmp.name}/doomed.sock"
+        doomed = start_worker(address, "doomed", "sleep")
+        try:
+            executor = self._executor([address, self.addresses[0]])
+            future = executor.submit("sleep 1")
+            time.sleep(0.4)
+            doomed.kill()
+            result = future.result(timeout=5)
+            self.assertEqual(result["code"], 0)
+            self.assertEqual(result["usage"]["node"], "node0")
+            # The lost worker is skipped until it is due for a reconnect
+            self.assertEqual(executor.run_sync("sleep 0")["usage"]["node"], "node0")
+        finally:
+            doomed.kill()
+            doomed.wait()
+
+if __name__ == '__main__':
+    unittest.main()
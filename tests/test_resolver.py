@@ -0,0 +1,166 @@
+import unittest
+import os
+import tempfile
+import socket
+import struct
+import threading
+from core.event_loop import run_sync
+from core.resolver import Resolver, ResolverError, _encode_name
+from orchestrator.guardrails import Guardrails
+
+class StubDNSServer:
+    """Authoritative-only UDP DNS server on 127.0.0.1 answering from a small zone."""
+
+    SOA = ("ns1.corp.test", "admin.corp.test", 1, 3600, 600, 86400, 30)
+
+    def __init__(self, records, cnames=None, drop=False):
+        self.records = records      # (name, type) -> (ttl, [values])
+        self.cnames = cnames or {}  # name -> (ttl, target)
+        self.drop = drop
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(512)
+            except OSError:
+                return
+            qid = struct.unpack_from("!H", data)[0]
+            labels, offset = [], 12
+            while data[offset]:
+                labels.append(data[offset + 1:offset + 1 + data[offset]].decode())
+                offset += 1 + data[offset]
+            name, qtype = ".".join(labels).lower(), struct.unpack_from("!H", data, offset + 1)[0]
+            self.queries.append((name, qtype))
+            if not self.drop:
+                self.sock.sendto(self._reply(qid, data[12:offset + 5], name, qtype), client)
+
+    def _rr(self, name, rtype, ttl, rdata):
+        return _encode_name(name) + struct.pack("!HHIH", rtype, 1, ttl, len(rdata)) + rdata
+
+    def _rdata(self, rtype, value):
+        if rtype == 1:
+            return socket.inet_aton(value)
+        if rtype == 28:
+            return socket.inet_pton(socket.AF_INET6, value)
+        if rtype == 16:
+            return bytes([len(value)]) + value.encode()
+        return _encode_name(value)
+
+    def _reply(self, qid, question, name, qtype):
+        answers, owner = [], name
+        while owner in self.cnames and qtype != 5:
+            ttl, target = self.cnames[owner]
+            answers.append(self._rr(owner, 5, ttl, _encode_name(target)))
+            owner = target
+        ttl, values = self.records.get((owner, qtype), (0, []))
+        answers += [self._rr(owner, qtype, ttl, self._rdata(qtype, v)) for v in values]
+        known = any(key[0] == owner for key in self.records) or owner in self.cnames
+        authority = []
+        if not answers or not values:
+            mname, rname, *numbers = self.SOA
+            soa = _encode_name(mname) + _encode_name(rname) + struct.pack("!IIIII", *numbers)
+            authority.append(self._rr("corp.test", 6, 300, soa))
+        rcode = 0 if known else 3
+        header = struct.pack("!HHHHHH", qid, 0x8180 | rcode, 1, len(answers), len(authority), 0)
+        return header + question + b"".join(answers + authority)
+
+class TestResolver(unittest.TestCase):
+    def setUp(self):
+        self.server = StubDNSServer(
+            records={
+                ("www.corp.test", 1): (120, ["10.0.0.10"]),
+                ("www.corp.test", 28): (120, []),
+                ("db.corp.test", 1): (60, ["127.0.0.5"]),
+                ("edge.cdn.test", 1): (300, ["10.0.0.20", "10.0.0.21"]),
+                ("corp.test", 16): (60, ["v=spf1 -all"]),
+            },
+            cnames={"portal.corp.test": (50, "edge.cdn.test")},
+        )
+        self.now = 1000.0
+        self.resolver = Resolver(nameservers=[self.server.address], timeout=0.5, attempts=1,
+                                 clock=lambda: self.now)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_ttl_cache(self):
+        self.assertEqual(self.resolver.resolve_sync("www.corp.test"), ["10.0.0.10"])
+        self.assertEqual(self.resolver.resolve_sync("WWW.corp.test."), ["10.0.0.10"])
+        self.assertEqual(len(self.server.queries), 1)
+        self.now += 121
+        self.resolver.resolve_sync("www.corp.test")
+        self.assertEqual(len(self.server.queries), 2)
+        self.assertEqual(run_sync(self.resolver.resolve("corp.test", "TXT")), ["v=spf1 -all"])
+
+    def test_cname_chain_uses_lowest_ttl(self):
+        self.assertEqual(self.resolver.resolve_sync("portal.corp.test"), ["10.0.0.20", "10.0.0.21"])
+        self.now += 51
+        self.assertIsNone(self.resolver.cached("portal.corp.test"))
+
+    def test_negative_caching(self):
+        self.assertEqual(self.resolver.resolve_sync("nope.corp.test"), [])
+        self.assertEqual(self.resolver.resolve_sync("nope.corp.test"), [])
+        # NXDOMAIN cached for min(SOA TTL, SOA minimum) = 30s
+        self.assertEqual(len(self.server.queries), 1)
+        self.now += 31
+        self.resolver.resolve_sync("nope.corp.test")
+        self.assertEqual(len(self.server.queries), 2)
+
+    def test_concurrent_lookups_share_one_query(self):
+        names = ["www.corp.test"] * 20 + ["db.corp.test", "nope.corp.test"]
+        found = run_sync(self.resolver.resolve_many(names))
+        self.assertEqual(found, {"www.corp.test": ["10.0.0.10"], "db.corp.test": ["127.0.0.5"], "nope.corp.test": []})
+        self.assertEqual(len(self.server.queries), 3)
+
+    def test_unreachable_nameserver(self):
+        silent = StubDNSServer({}, drop=True)
+        try:
+            resolver = Resolver(nameservers=[f"127.0.0.1:{silent.address[1]}"], timeout=0.1, attempts=2)
+            with self.assertRaises(ResolverError):
+                resolver.resolve_sync("www.corp.test")
+            self.assertEqual(len(silent.queries), 2)
+            # Failure cached: no second wait
+            with self.assertRaises(ResolverError):
+                resolver.resolve_sync("www.corp.test")
+            self.assertEqual(len(silent.queries), 2)
+        finally:
+            silent.close()
+
+    def test_guardrails_check_resolved_addresses(self):
+        guard = Guardrails(resolver=self.resolver)
+        self.assertEqual(guard.is_target_safe("www.corp.test"), (True, "Safe"))
+        safe, reason = guard.is_target_safe("db.corp.test")
+        self.assertFalse(safe)
+        self.assertIn("resolves to 127.0.0.5", reason)
+        self.assertTrue(guard.is_target_safe("nope.corp.test")[0])
+        guard.allowed_ranges.append("10.0.0.0/24")
+        safe, reason = guard.validate_command("nmap www.corp.test portal.corp.test nope.corp.test")
+        self.assertEqual((safe, reason), (False, "Target nope.corp.test could not be resolved to an in-scope address"))
+
+    def test_hosts_file_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            hosts = os.path.join(tmp, "hosts")
+            with open(hosts, "w") as f:
+                f.write("127.0.0.1 localhost\n10.0.0.50 box.htb www.box.htb # lab\n")
+            resolver = Resolver(nameservers=[self.server.address], timeout=0.5, attempts=1, hosts_file=hosts)
+            guard = Guardrails(resolver=resolver)
+            guard.allowed_ranges.append("10.0.0.0/24")
+            # Mapped only in the hosts file, as lab machines usually are: in scope, no DNS query
+            self.assertEqual(guard.validate_command("nmap -sV box.htb WWW.box.htb"), (True, "Safe"))
+            self.assertEqual(self.server.queries, [])
+            with open(hosts, "w") as f:
+                f.write("10.9.9.9 box.htb\n")
+            os.utime(hosts, (1, 1))
+            self.assertEqual(resolver.addresses_sync("box.htb"), ["10.9.9.9"])
+
+if __name__ == '__main__':
+    unittest.main()
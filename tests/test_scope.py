@@ -0,0 +1,63 @@
+import unittest
+import os
+import tempfile
+from orchestrator.guardrails import Guardrails
+from orchestrator.scope import IN_SCOPE, OUT_OF_SCOPE, PARTIAL, ScopeEngine, load_cidrs
+
+class TestScopeEngine(unittest.TestCase):
+    def setUp(self):
+        self.scope = ScopeEngine(
+            allow=["10.0.0.0/16", "192.168.5.10", "2001:db8::/32"],
+            deny=["10.0.9.0/24", "10.0.9.128/25", "2001:db8:dead::/48"],
+        )
+
+    def test_membership(self):
+        self.assertTrue(self.scope.is_allowed("10.0.1.1"))
+        self.assertEqual(self.scope.match("10.0.9.200"), (False, "10.0.9.128/25"))
+        self.assertTrue(self.scope.is_allowed("192.168.5.10"))
+        self.assertEqual(self.scope.match("192.168.5.11"), (False, None))
+        self.assertTrue(self.scope.is_allowed("2001:db8::1"))
+        self.assertFalse(self.scope.is_allowed("2001:db8:dead::1"))
+
+    def test_range_classification(self):
+        self.assertEqual(self.scope.classify("10.0.0.0/16"), PARTIAL)
+        self.assertEqual(self.scope.classify("10.0.0.0/21"), IN_SCOPE)
+        self.assertEqual(self.scope.classify("10.0.9.0/24"), OUT_OF_SCOPE)
+        self.assertEqual(self.scope.classify("10.0.0.0/8"), PARTIAL)
+        self.assertEqual(self.scope.classify("172.16.0.0/12"), OUT_OF_SCOPE)
+        self.assertEqual(self.scope.classify("2001:db8:beef::/48"), IN_SCOPE)
+
+    def test_deny_only_and_more_specific_allow(self):
+        scope = ScopeEngine(allow=["10.0.9.5"], deny=["10.0.9.0/24"])
+        self.assertTrue(scope.is_allowed("10.0.9.5"))
+        self.assertEqual(scope.classify("10.0.9.0/24"), PARTIAL)
+        scope = ScopeEngine(deny=["127.0.0.0/8"])
+        self.assertTrue(scope.is_allowed("8.8.8.8"))
+        self.assertEqual(scope.classify("0.0.0.0/0"), PARTIAL)
+
+    def test_load_scope_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            allow_path = os.path.join(tmp, "scope.txt")
+            deny_path = os.path.join(tmp, "exclude.txt")
+            with open(allow_path, "w") as f:
+                f.write("# in scope\n10.10.0.0/16, 10.20.0.0/16\n\n192.168.1.7  # jump box\n")
+            with open(deny_path, "w") as f:
+                f.write("10.10.99.0/24\n")
+            self.assertEqual(load_cidrs(allow_path), ["10.10.0.0/16", "10.20.0.0/16", "192.168.1.7"])
+
+            guard = Guardrails(allow_file=allow_path, deny_file=deny_path)
+            self.assertTrue(guard.filter_action("scan", "10.20.3.4")[0])
+            safe, reason = guard.filter_action("scan", "10.30.0.1")
+            self.assertFalse(safe)
+            self.assertIn("outside the engagement scope", reason)
+            self.assertIn("10.10.99.0/24", guard.filter_action("scan", "10.10.99.1")[1])
+            self.assertTrue(guard.filter_action("scan", "10.10.1.0/24")[0])
+            self.assertIn("partially", guard.filter_action("scan", "10.10.0.0/16")[1])
+
+            with open(deny_path, "w") as f:
+                f.write("10.10.99.0/33\n")
+            with self.assertRaises(ValueError):
+                load_cidrs(deny_path)
+
+if __name__ == '__main__':
+    unittest.main()
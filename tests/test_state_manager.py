@@ -1,7 +1,10 @@
 import unittest
 import os
 import shutil
-from orchestrator.state_manager import StateManager
+import sys
+import threading
+import time
+from orchestrator.state_manager import StateManager, service_id
 
 class TestStateManager(unittest.TestCase):
     def setUp(self):
@@ -10,6 +13,7 @@ class TestStateManager(unittest.TestCase):
         self.state = StateManager(self.test_dir)
 
     def tearDown(self):
+        self.state.close()
         if os.path.exists(self.test_dir):
             shutil.rmtree(self.test_dir)
 
@@ -55,5 +59,349 @@ class TestStateManager(unittest.TestCase):
         
         self.assertEqual(len(self.state.graph["edges"]), 2)
 
+    def test_journal_recovery(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.checkpoint()
+        self.state.add_node("10.0.0.2", "host")
+        self.state.add_edge("10.0.0.1", "10.0.0.2", "pivot", "success")
+        self.state.update_memory("foothold", "10.0.0.1")
+        self.state.close()
+
+        restored = StateManager(self.test_dir, resume=True)
+        self.assertEqual([n["id"] for n in restored.graph["nodes"]], ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(len(restored.graph["edges"]), 1)
+        self.assertEqual(restored.get_memory("foothold"), "10.0.0.1")
+        restored.close()
+
+    def test_torn_journal_tail_is_discarded(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.add_node("10.0.0.2", "host")
+        self.state.close()
+        with open(self.state.store.journal_path, "a") as f:
+            f.write('{"op": "node", "node": {"id": "10.0')
+
+        restored = StateManager(self.test_dir, resume=True)
+        self.assertEqual(len(restored.graph["nodes"]), 2)
+        restored.add_node("10.0.0.3", "host")
+        restored.close()
+
+        again = StateManager(self.test_dir, resume=True)
+        self.assertEqual(len(again.graph["nodes"]), 3)
+        again.close()
+
+    def test_mutations_append_without_rewriting_snapshot(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.flush()
+        snapshot_mtime = os.path.getmtime(self.state.log_path)
+        journal_size = os.path.getsize(self.state.store.journal_path)
+        self.state.add_edge("10.0.0.1", "10.0.0.1", "scan", "success")
+        self.state.flush()
+
+        self.assertEqual(os.path.getmtime(self.state.log_path), snapshot_mtime)
+        self.assertGreater(os.path.getsize(self.state.store.journal_path), journal_size)
+
+        self.state.checkpoint()
+        self.assertEqual(os.path.getsize(self.state.store.journal_path), 0)
+
+    def test_indexes_and_adjacency(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.add_node("10.0.0.1:445/tcp", "service", {"port": 445})
+        self.state.add_node("10.0.0.2", "host")
+        self.state.add_edge("10.0.0.1", "10.0.0.1:445/tcp", "exposes", "open")
+        self.state.add_edge("10.0.0.1", "10.0.0.2", "pivot", "success")
+
+        self.assertTrue(self.state.has_node("10.0.0.2"))
+        self.assertEqual(self.state.get_node("10.0.0.1:445/tcp")["data"]["port"], 445)
+        self.assertEqual([n["id"] for n in self.state.nodes_by_type("host")], ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(self.state.neighbors("10.0.0.1"), ["10.0.0.1:445/tcp", "10.0.0.2"])
+        self.assertEqual(self.state.edges_to("10.0.0.2")[0]["action"], "pivot")
+
+    def test_bulk_add(self):
+        services = [(f"10.0.0.1:{p}/tcp", "service", {"port": p}) for p in range(1, 2001)]
+        added = self.state.bulk_add(
+            nodes=[("10.0.0.1", "host", {})] + services + [("10.0.0.1", "host", {})],
+            edges=[("10.0.0.1", sid, "exposes", "open") for sid, _, _ in services]
+        )
+        self.assertEqual(added, 2001)
+        self.assertEqual(len(self.state.edges_from("10.0.0.1")), 2000)
+        self.state.close()
+
+        restored = StateManager(self.test_dir, resume=True)
+        self.assertEqual(len(restored.nodes_by_type("service")), 2000)
+        self.assertEqual(len(restored.edges_from("10.0.0.1")), 2000)
+        restored.close()
+
+    def test_delta_summary(self):
+        self.state.begin_turn(1)
+        self.state.add_node("10.0.0.1", "host")
+        self.state.begin_turn(2)
+        self.state.add_node("10.0.0.2", "host")
+        self.state.add_edge("10.0.0.1", "10.0.0.2", "pivot", "success")
+
+        view = self.state.export_summary(since_turn=1)
+        self.assertEqual(view["new_assets"], ["10.0.0.2 (host)"])
+        self.assertEqual(view["new_actions"], ["10.0.0.1 -> 10.0.0.2 via pivot (success)"])
+        self.assertEqual(view["totals"], {"assets": 2, "actions": 1})
+
+        full = self.state.export_summary()
+        self.assertEqual(full["discovered_assets"], ["10.0.0.1 (host)", "10.0.0.2 (host)"])
+
+    def test_top_k_tracks_goal_and_new_findings(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.add_node("10.0.0.9", "host")
+        self.state.add_node("/backup", "path")
+        goal = "Get domain admin via 10.0.0.9"
+        top = self.state.export_summary(goal=goal, top_k=1)["key_assets"]
+        self.assertTrue(top[0].startswith("10.0.0.9"))
+
+        # A new high-value finding must surface without a full rebuild
+        self.state.add_node("CVE-2020-1472", "vulnerability", {"host": "10.0.0.9", "name": "zerologon"})
+        self.state.add_edge("10.0.0.9", "CVE-2020-1472", "exploit", "success")
+        top = self.state.export_summary(goal=goal, top_k=2)["key_assets"]
+        self.assertTrue(top[0].startswith("CVE-2020-1472"))
+
+    def test_write_behind_does_not_block_mutations(self):
+        state = StateManager(self.test_dir + "_wb", durability="batched")
+        state.store._writer.interval = 60  # Only the size trigger or an explicit flush writes
+        state.add_node("10.0.0.1", "host")
+        for i in range(100):
+            state.add_edge("10.0.0.1", f"10.0.0.{i}", "ping", "success")
+        self.assertGreater(state.store._writer.pending(), 0)
+
+        state.begin_turn(2)  # Turn boundary drains the queue
+        self.assertEqual(state.store._writer.pending(), 0)
+        with open(state.store.journal_path) as f:
+            self.assertEqual(len(f.readlines()), 101)
+        state.close()
+        shutil.rmtree(self.test_dir + "_wb")
+
+    def test_failed_journal_write_is_retried(self):
+        state = StateManager(self.test_dir + "_retry", durability="batched")
+        state.store._writer.interval = 60
+        data = {"os": "Linux"}
+        state.add_node("10.0.0.1", "host", data)
+        data["os"] = "changed after submit"  # The journal keeps what was submitted
+        write = state.store._write_batch
+        def full_disk(batch, fsync):
+            raise OSError(28, "No space left on device")
+        state.store._writer._flush_fn = full_disk
+        with self.assertRaises(OSError):
+            state.flush()
+        self.assertIsInstance(state.store._writer.error, OSError)
+        self.assertEqual(state.store._writer.pending(), 1)  # Requeued, not dropped
+        state.store._writer._flush_fn = write
+        state.add_node("10.0.0.2", "host")
+        state.flush()
+        self.assertIsNone(state.store._writer.error)
+        state.add_node("10.0.0.3", "host")
+        state.close()
+
+        restored = StateManager(self.test_dir + "_retry", resume=True)
+        self.assertEqual([n["id"] for n in restored.graph["nodes"]], ["10.0.0.1", "10.0.0.2", "10.0.0.3"])
+        self.assertEqual(restored.get_node("10.0.0.1")["data"], {"os": "Linux"})
+        self.assertEqual(restored.store.gaps, [])
+        restored.close()
+        # A record that never made it is reported on recovery
+        with open(restored.store.journal_path) as f:
+            lines = f.readlines()
+        with open(restored.store.journal_path, "w") as f:
+            f.writelines(lines[:1] + lines[2:])
+        restored = StateManager(self.test_dir + "_retry", resume=True)
+        self.assertEqual(restored.store.gaps, [(2, 2)])
+        restored.close()
+        shutil.rmtree(self.test_dir + "_retry")
+
+    def test_durability_none_skips_journal(self):
+        state = StateManager(self.test_dir + "_none", durability="none")
+        state.add_node("10.0.0.1", "host")
+        state.flush()
+        self.assertFalse(os.path.exists(state.store.journal_path))
+        state.checkpoint()
+        self.assertTrue(os.path.exists(state.log_path))
+        state.close()
+        shutil.rmtree(self.test_dir + "_none")
+
+    def test_compact_records_round_trip(self):
+        self.state.add_node("10.0.0.1", "host")
+        self.state.add_node(service_id("10.0.0.1", 22), "service", {"port": 22})
+        self.state.add_edge("10.0.0.1", service_id("10.0.0.1", 22), "nmap_scan", "open")
+        edge = self.state.graph["edges"][0]
+        node = self.state.get_node("10.0.0.1")
+        self.assertIs(edge["source"], node["id"])
+        self.assertEqual(node["data"], {})
+        self.assertIsInstance(edge["timestamp"], str)
+        self.state.checkpoint()
+        self.state.close()
+
+        restored = StateManager(self.test_dir, resume=True)
+        self.assertEqual(restored.get_node(service_id("10.0.0.1", 22))["data"], {"port": 22})
+        self.assertEqual(restored.graph["edges"][0]["timestamp"], edge["timestamp"])
+        restored.close()
+
+    def test_concurrent_writers_and_readers(self):
+        errors = []
+
+        def writer(worker):
+            try:
+                for i in range(200):
+                    host = f"10.0.{i}.1"  # Every writer races to add the same hosts
+                    self.state.add_node(host, "host", {"scanned_by": worker})
+                    self.state.add_edge(f"agent_{worker}", host, "scan", "open")
+                    self.state.update_memory(f"last_{worker}", host)
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                for i in range(100):
+                    self.state.export_summary(since_turn=0, goal="10.0.5.1")
+                    self.state.export_summary()
+                    if i % 25 == 0:
+                        self.state.checkpoint()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)] + [threading.Thread(target=reader)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Force frequent thread switches
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.state.counts(), (200, 800))
+        self.assertEqual(self.state.summary.node_count, 200)
+        self.assertEqual(self.state.get_memory("last_3"), "10.0.199.1")
+        self.state.close()
+        restored = StateManager(self.test_dir, resume=True)
+        self.assertEqual(restored.counts(), (200, 800))
+        restored.close()
+
+    def test_lock_contention_metrics(self):
+        holder_ready = threading.Event()
+
+        def holder():
+            with self.state.lock:
+                holder_ready.set()
+                time.sleep(0.05)
+
+        t = threading.Thread(target=holder)
+        t.start()
+        holder_ready.wait()
+        self.state.add_node("10.0.0.1", "host")  # Has to wait for the holder
+        t.join()
+        stats = self.state.lock_stats()
+        self.assertEqual(stats["contended"], 1)
+        self.assertGreater(stats["max_wait_seconds"], 0.01)
+        self.assertEqual(stats["acquisitions"], 2)
+
+    def test_resource_usage_totals(self):
+        usage = {"tool": "nmap", "wall": 2.0, "cpu_user": 1.5, "cpu_sys": 0.25, "max_rss_kb": 4096,
+                 "stdout_bytes": 100, "stderr_bytes": 0}
+        self.state.record_usage("NetPentester", "nmap -sV 10.0.0.1", usage)
+        self.state.record_usage("NetPentester", "nmap -p- 10.0.0.2", dict(usage, wall=9.0, max_rss_kb=8192))
+        self.state.record_usage("WebPentester", "curl -I http://10.0.0.1", dict(usage, tool="curl", wall=0.5))
+        totals = self.state.resource_usage()
+        self.assertEqual(totals["tools"]["nmap"]["runs"], 2)
+        self.assertEqual(totals["tools"]["nmap"]["wall"], 11.0)
+        self.assertEqual(totals["tools"]["nmap"]["max_rss_kb"], 8192)
+        self.assertEqual(totals["agents"]["NetPentester"]["cpu_user"], 3.0)
+        self.assertEqual(totals["agents"]["WebPentester"]["stdout_bytes"], 100)
+        self.assertEqual(totals["longest"][0]["cmd"], "nmap -p- 10.0.0.2")
+
+        # Totals survive a restart of the mission
+        self.state.close()
+        self.state = StateManager(self.test_dir, resume=True)
+        self.assertEqual(self.state.resource_usage(), totals)
+
+class TestSQLiteStateManager(unittest.TestCase):
+    backend = "sqlite"
+
+    def setUp(self):
+        self.test_dir = f"/tmp/stingbot_test_state_{self.backend}"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.state = StateManager(self.test_dir, backend=self.backend)
+
+    def tearDown(self):
+        self.state.close()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def _populate(self):
+        self.state.bulk_add(
+            nodes=[
+                ("10.0.0.1", "host", {}),
+                ("10.0.0.2", "host", {}),
+                (service_id("10.0.0.1", 445), "service", {"host": "10.0.0.1", "port": 445, "proto": "tcp", "state": "open"}),
+                (service_id("10.0.0.2", 445), "service", {"host": "10.0.0.2", "port": 445, "proto": "tcp", "state": "filtered"}),
+                (service_id("10.0.0.2", 80), "service", {"host": "10.0.0.2", "port": 80, "proto": "tcp", "state": "open"}),
+            ],
+            edges=[
+                ("10.0.0.1", service_id("10.0.0.1", 445), "exposes", "open"),
+                ("10.0.0.1", "10.0.0.2", "smb_relay", "success"),
+                ("10.0.0.1", "10.0.0.2", "psexec", "failed"),
+            ]
+        )
+
+    def test_basic_operations(self):
+        self.assertTrue(self.state.add_node("192.168.1.1", "asset", {"os": "Linux"}))
+        self.assertFalse(self.state.add_node("192.168.1.1", "asset"))
+        self.state.add_edge("192.168.1.1", "192.168.1.1", "scan", "success")
+        self.state.update_memory("current_target", {"ip": "192.168.1.1"})
+
+        self.assertEqual(self.state.get_node("192.168.1.1")["data"], {"os": "Linux"})
+        self.assertEqual(self.state.get_memory("current_target"), {"ip": "192.168.1.1"})
+        self.assertEqual(self.state.counts(), (1, 1))
+        self.assertEqual(len(self.state.graph["edges"]), 1)
+
+    def test_query_api(self):
+        self._populate()
+        self.assertEqual(self.state.hosts_with_open_port(445), ["10.0.0.1"])
+        self.assertEqual(self.state.hosts_with_open_port(80), ["10.0.0.2"])
+
+        successes = self.state.find_edges(source="10.0.0.1", result="success")
+        self.assertEqual([e["action"] for e in successes], ["smb_relay"])
+        self.assertEqual(self.state.neighbors("10.0.0.1"), [service_id("10.0.0.1", 445), "10.0.0.2"])
+        self.assertEqual(len(self.state.find_nodes("service", state="open")), 2)
+
+    def test_resume(self):
+        self._populate()
+        self.state.update_memory("foothold", "10.0.0.1")
+        self.state.close()
+
+        self.state = StateManager(self.test_dir, resume=True, backend=self.backend)
+        self.assertEqual(self.state.counts(), (5, 3))
+        self.assertEqual(self.state.get_memory("foothold"), "10.0.0.1")
+
+    def test_relevance_ranking(self):
+        self._populate()
+        goal = "relay to 10.0.0.2"
+        self.assertEqual(self.state.export_summary(goal=goal, top_k=1)["key_assets"][0].split()[0], "10.0.0.2")
+        # Touched nodes are rescored on the next read
+        self.state.add_node("CVE-2020-1472", "vulnerability", {"host": "10.0.0.1", "name": "zerologon"})
+        for _ in range(3):
+            self.state.add_edge("10.0.0.1", "CVE-2020-1472", "exploit", "success")
+        top = self.state.export_summary(goal=goal, top_k=2)["key_assets"]
+        self.assertEqual([line.split()[0] for line in top], ["CVE-2020-1472", "10.0.0.1"])
+        self.assertTrue(self.state.summary.is_cached(goal, 2))
+        if self.backend == "sqlite":
+            # Nothing kept per node: scores come from the store
+            self.assertEqual(self.state.summary._nodes, {})
+            self.state.summary.HOT_NODES = 2
+            self.state.bulk_add(nodes=[(f"10.0.1.{i}", "host", {}) for i in range(3)])
+            self.assertEqual(self.state.summary._touched, {})
+            self.assertEqual(len(self.state.export_summary(goal=goal, top_k=100)["key_assets"]), 9)
+        self.state.close()
+        self.state = StateManager(self.test_dir, resume=True, backend=self.backend)
+        top = self.state.export_summary(goal=goal, top_k=2)["key_assets"]
+        self.assertEqual([line.split()[0] for line in top], ["CVE-2020-1472", "10.0.0.1"])
+
+class TestJsonStateManagerQueries(TestSQLiteStateManager):
+    backend = "json"
+
 if __name__ == '__main__':
     unittest.main()
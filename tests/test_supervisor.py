@@ -7,7 +7,7 @@ class TestSupervisor(unittest.TestCase):
         self.test_dir = "/tmp/stingbot_test_supervisor"
         # Properly mock dependencies to avoid side effects
         with patch('orchestrator.supervisor.LLMAdapter'), \
-             patch('orchestrator.supervisor.Guardrails'), \
+             patch('orchestrator.supervisor.get_guardrails'), \
              patch('orchestrator.supervisor.StateManager'):
             self.sup = Supervisor(self.test_dir)
 
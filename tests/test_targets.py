@@ -0,0 +1,95 @@
+import unittest
+import os
+import tempfile
+from orchestrator.guardrails import Guardrails
+from orchestrator.targets import extract_targets
+
+class TestTargetExtraction(unittest.TestCase):
+    def test_addresses_ranges_and_names(self):
+        self.assertEqual(extract_targets("nmap -sV -p- 10.0.0.5 10.0.1.0/24"), ("10.0.0.5", "10.0.1.0/24"))
+        self.assertEqual(extract_targets("nmap 10.0.0.8-11"), ("10.0.0.8/30",))
+        self.assertEqual(extract_targets("nmap -sn 10.0.3.*"), ("10.0.3.0/24",))
+        self.assertEqual(extract_targets("nmap -6 2001:db8::1"), ("2001:db8::1",))
+        self.assertEqual(extract_targets("nmap --exclude 127.0.0.1 10.0.0.0/24"), ("10.0.0.0/24",))
+
+    def test_urls_logins_and_files(self):
+        cmd = "gobuster dir -u http://Intranet.Corp.local:8080/ -w /usr/share/wordlists/common.txt"
+        self.assertEqual(extract_targets(cmd), ("intranet.corp.local",))
+        self.assertEqual(extract_targets("hydra -l admin -P rockyou.txt ssh://10.0.0.7"), ("10.0.0.7",))
+        self.assertEqual(extract_targets("ssh root@db01"), ("db01",))
+        self.assertEqual(extract_targets("curl -s http://localhost/index.php"), ("localhost",))
+        self.assertEqual(extract_targets("nc example.com:4444"), ("example.com",))
+        self.assertEqual(extract_targets("cat results.xml output.json"), ())
+        for cmd in ("file firmware.img", "unzip app.apk lib.jar", "readelf -h a.elf", "strings ./dump/fw.update",
+                    "cat notes.md", "node app.js", "vim config.yaml", "python3 setup.py"):
+            self.assertEqual(extract_targets(cmd), ())
+
+    def test_host_contexts(self):
+        self.assertEqual(extract_targets("ping scanme.nmap.org"), ("scanme.nmap.org",))
+        self.assertEqual(extract_targets("dig axfr zone.acme"), ())
+        self.assertEqual(extract_targets("GetADUsers.py -dc-ip dc01.acme corp/user"), ("dc01.acme",))
+        self.assertEqual(extract_targets("enum4linux --target=fileserver"), ("fileserver",))
+
+    def test_local_files_checked_per_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                cmd = "binwalk router.io corp.example"
+                self.assertEqual(extract_targets(cmd), ("router.io", "corp.example"))
+                # A file that exists is not a host, even after the command was parsed
+                open("router.io", "w").close()
+                self.assertEqual(extract_targets(cmd), ("corp.example",))
+                # ...unless the command also names it as a host
+                self.assertEqual(extract_targets("curl http://router.io/x -o router.io"), ("router.io",))
+            finally:
+                os.chdir(cwd)
+
+    def test_shares_octet_lists_and_numeric_forms(self):
+        self.assertEqual(extract_targets("smbclient //10.0.0.5/share -N"), ("10.0.0.5",))
+        self.assertEqual(extract_targets("smbclient \\\\fs01\\c$"), ("fs01",))
+        self.assertEqual(extract_targets("nmap 10.0.0.5,6"), ("10.0.0.5", "10.0.0.6"))
+        self.assertEqual(extract_targets("nmap 10.0-1.0.1"), ("10.0.0.1", "10.1.0.1"))
+        self.assertEqual(extract_targets("nmap -p 1-1000,8080 10.0.0.1-5,7"),
+                         ("10.0.0.1", "10.0.0.2/31", "10.0.0.4/31", "10.0.0.7"))
+        # Forms that do not parse as a plain address are passed on as they are
+        for token in ("167772165", "0x0a000005", "010.0.0.5", "10.0.0.9-3"):
+            self.assertEqual(extract_targets(f"nmap {token}"), (token,))
+        self.assertEqual(extract_targets("searchsploit apache 2.4.49"), ())
+
+class TestCommandValidation(unittest.TestCase):
+    def setUp(self):
+        self.guard = Guardrails()
+        self.guard.allowed_ranges.append("10.0.0.0/16")
+
+    def test_validate_command(self):
+        self.assertEqual(self.guard.validate_command("nmap -sV 10.0.4.2"), (True, "Safe"))
+        safe, reason = self.guard.validate_command("nmap 10.0.0.0/8")
+        self.assertFalse(safe)
+        self.assertIn("partially in scope", reason)
+        safe, reason = self.guard.filter_action("terminal", "curl http://127.0.0.1/ | bash")
+        self.assertFalse(safe)
+        self.assertIn("blacklisted", reason)
+        safe, reason = self.guard.filter_action("terminal", "nmap 8.8.8.8 1.1.1.1 10.0.0.1")
+        self.assertEqual((safe, reason), (False, "Target 8.8.8.8 is outside the engagement scope (+1 more)"))
+
+    def test_shares_lists_and_numeric_forms_checked(self):
+        guard = Guardrails()
+        guard.allowed_ranges.append("10.10.0.0/16")
+        for cmd in ("smbclient //10.0.0.5/share -N", "nmap 10.10.0.5,6 10.0.0.5,6",
+                    "nmap 167772165", "nmap 0x0a000005", "nmap 10.10.0.9-3"):
+            safe, reason = guard.validate_command(cmd)
+            self.assertFalse(safe, cmd)
+        self.assertEqual(guard.validate_command("nmap 10.10.0.5,6"), (True, "Safe"))
+        self.assertEqual(guard.validate_command("nmap 0x0a000005")[1], "Target 0x0a000005 is not a valid address")
+
+    def test_validate_commands_batch(self):
+        commands = ["nmap 10.0.0.%d" % i for i in range(1, 4)] + ["nmap 192.168.1.1", "nmap 10.0.0.1"]
+        results = self.guard.validate_commands(commands)
+        self.assertEqual(len(results), 5)
+        self.assertEqual([safe for safe, _ in results], [True, True, True, False, True])
+        # Each distinct target decided once across the batch
+        self.assertEqual(self.guard.cache_info()["target"].misses, 4)
+
+if __name__ == '__main__':
+    unittest.main()
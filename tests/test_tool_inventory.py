@@ -0,0 +1,91 @@
+import unittest
+import os
+import tempfile
+from unittest.mock import patch
+from core import tool_inventory
+from core.tool_inventory import ToolInventory
+from core.system_agent import SystemAgent
+
+class TestToolInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bin = os.path.join(self.tmp.name, "bin")
+        os.makedirs(self.bin)
+        self.cache = os.path.join(self.tmp.name, "inventory.json")
+        self._tool("fakescan", "echo 'Fakescan version 7.94SVN ( https://example.test )'")
+        self._tool("fakeweb", "echo fakeweb")
+        path = patch.dict(os.environ, {"PATH": self.bin})
+        path.start()
+        self.addCleanup(path.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _tool(self, name, body):
+        path = os.path.join(self.bin, name)
+        with open(path, "w") as f:
+            f.write(f"#!/bin/sh\n{body}\n")
+        os.chmod(path, 0o755)
+        return path
+
+    def _inventory(self):
+        return ToolInventory({"fakescan": ["--version"], "fakeweb": None, "fakemissing": ["-V"]},
+                             cache_path=self.cache).scan()
+
+    def test_scan_and_versions(self):
+        inventory = self._inventory()
+        self.assertTrue(inventory.has("fakescan"))
+        self.assertEqual(inventory.version("fakescan"), "7.94SVN")
+        self.assertEqual(inventory.path("fakeweb"), os.path.join(self.bin, "fakeweb"))
+        self.assertIsNone(inventory.version("fakeweb"))
+        self.assertFalse(inventory.has("fakemissing"))
+        self.assertEqual(inventory.describe(), "fakescan 7.94SVN, fakeweb (not installed: fakemissing)")
+
+    def test_versions_cached_on_path_and_mtime(self):
+        self._inventory()
+        with patch.object(tool_inventory, "probe_version", return_value="0.0") as probe:
+            self.assertEqual(self._inventory().version("fakescan"), "7.94SVN")
+            probe.assert_not_called()
+            # An upgraded binary is probed again
+            path = self._tool("fakescan", "echo 'Fakescan version 7.95'")
+            os.utime(path, (1, 1))
+            self.assertEqual(self._inventory().version("fakescan"), "0.0")
+            self.assertEqual(probe.call_count, 1)
+
+    def test_path_change_rescans(self):
+        inventory = self._inventory()
+        other = os.path.join(self.tmp.name, "other")
+        os.makedirs(other)
+        os.symlink(os.path.join(self.bin, "fakeweb"), os.path.join(other, "fakemissing"))
+        with patch.dict(os.environ, {"PATH": other}):
+            self.assertTrue(inventory.has("fakemissing"))
+            self.assertFalse(inventory.has("fakescan"))
+
+    def test_missing_tool_looked_up_again(self):
+        now = [0.0]
+        inventory = ToolInventory({"fakemissing": ["-V"]}, cache_path=self.cache, miss_ttl=30,
+                                  clock=lambda: now[0]).scan()
+        self._tool("fakemissing", "echo 'fakemissing 2.1'")
+        self.assertFalse(inventory.has("fakemissing"))
+        now[0] = 31.0
+        self.assertTrue(inventory.has("fakemissing"))
+        self.assertEqual(inventory.version("fakemissing"), "2.1")
+
+    def test_refresh_after_install(self):
+        inventory = self._inventory()
+        self._tool("fakemissing", "echo 'fakemissing 2.1'")
+        self.assertTrue(inventory.refresh("fakemissing"))
+        self.assertTrue(inventory.has("fakemissing"))
+        self.assertIn("fakemissing 2.1", inventory.describe())
+
+    def test_check_tool_does_not_fork(self):
+        agent = SystemAgent()
+        with patch.object(tool_inventory, "_inventory", self._inventory()), \
+             patch.object(agent.executor, "run_sync", side_effect=AssertionError("forked")):
+            self.assertTrue(agent.check_tool("fakescan"))
+            self.assertFalse(agent.check_tool("fakemissing"))
+            # Tools the inventory does not know are resolved in-process too (PATH has no sh here)
+            self.assertFalse(agent.check_tool("sh"))
+
+if __name__ == '__main__':
+    unittest.main()
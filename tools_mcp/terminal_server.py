@@ -1,29 +1,22 @@
-import subprocess
-import os
-from orchestrator.guardrails import Guardrails
+from orchestrator.guardrails import get_guardrails
+from core.executor import get_executor
 
 class TerminalServer:
     """Safe shell execution interface for agents."""
     
-    def __init__(self):
-        self.guard = Guardrails()
+    def __init__(self, guard=None):
+        self.guard = guard or get_guardrails()
+        self.executor = get_executor()
 
-    def execute(self, cmd, timeout=300):
+    def execute(self, cmd, timeout=None):
         # 1. APPLY GUARDRAILS
         safe, reason = self.guard.filter_action("terminal", cmd)
         if not safe:
             return {"stdout": "", "stderr": f"SECURITY BLOCK: {reason}", "code": 1}
 
         # 2. EXECUTE
+        # Note: In production, this would run inside a Docker container
         try:
-            # Note: In production, this would run inside a Docker container
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=timeout)
-            return {
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "code": result.returncode
-            }
-        except subprocess.TimeoutExpired:
-            return {"stdout": "", "stderr": "Execution TImeout", "code": -1}
+            return self.executor.run_sync(cmd, timeout)
         except Exception as e:
             return {"stdout": "", "stderr": str(e), "code": -1}